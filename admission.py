@@ -0,0 +1,189 @@
+"""
+Admission control for processing jobs.
+
+Each heavy request (parsing logs, matching rosters, extracting workbooks)
+is costed before it starts, from the size of its input and its session or
+file counts, and only runs while the jobs already running leave room in a
+machine-wide budget of CPU slots and memory. The budget is shared by every
+gunicorn worker through a small ledger file under root, rewritten under an
+exclusive lock; entries of workers that died are dropped when it is read.
+
+A job that does not fit waits its turn (first come, first served) for up
+to queue_timeout seconds, as long as fewer than queue_limit jobs are
+already waiting. Otherwise Overloaded is raised at once with a Retry-After
+estimate, so waiting jobs never tie up more than queue_limit workers and
+light routes such as /login stay fast.
+"""
+import os
+import json
+import math
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: the budget is kept per process
+    fcntl = None
+
+MB = 1024 * 1024
+# Cost model, rough figures for the vectorized engine: a CSV log parses at
+# about 15 MB/s and takes about 8 bytes of memory per input byte; every
+# session adds a pass over the merged intervals. Workbooks (openpyxl) and
+# fuzzy matching are several times heavier per byte.
+BASE_JOB_MEMORY = 96 * MB
+LOG_BYTES_PER_SECOND = 15 * MB
+LOG_MEMORY_PER_BYTE = 8
+SESSION_WEIGHT = 0.05
+WORKBOOK_BYTES_PER_SECOND = 2 * MB
+WORKBOOK_MEMORY_PER_BYTE = 30
+MATCH_BYTES_PER_SECOND = 4 * MB
+MATCH_MEMORY_PER_BYTE = 12
+POLL_SECONDS = 0.25
+MAX_RETRY_AFTER = 300
+
+class Overloaded(Exception):
+    """No room for the job; retry_after is the suggested wait in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Server is busy, retry in {retry_after} seconds.")
+        self.retry_after = retry_after
+
+def log_job_cost(log_bytes, sessions):
+    """Cost of parsing log_bytes of (uncompressed) CSV and evaluating `sessions` windows."""
+    return {
+        "cpu": 1,
+        "memory": BASE_JOB_MEMORY + log_bytes * LOG_MEMORY_PER_BYTE,
+        "seconds": log_bytes / LOG_BYTES_PER_SECOND * (1 + SESSION_WEIGHT * sessions)
+    }
+
+def workbook_job_cost(workbook_bytes):
+    """Cost of loading and rewriting workbook_bytes of .xlsx."""
+    return {
+        "cpu": 1,
+        "memory": BASE_JOB_MEMORY + workbook_bytes * WORKBOOK_MEMORY_PER_BYTE,
+        "seconds": workbook_bytes / WORKBOOK_BYTES_PER_SECOND
+    }
+
+def matching_job_cost(master_bytes, raw_bytes, pairs):
+    """Cost of matching `pairs` rosters (master_bytes in all) against raw logs (raw_bytes in all)."""
+    total = master_bytes + raw_bytes
+    return {
+        "cpu": 1,
+        "memory": BASE_JOB_MEMORY + total * MATCH_MEMORY_PER_BYTE // max(pairs, 1),
+        "seconds": total / MATCH_BYTES_PER_SECOND
+    }
+
+def default_memory_budget():
+    """Half of physical memory (2 GB where that cannot be read)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+    except (AttributeError, ValueError, OSError):
+        return 2048 * MB
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by someone else
+    return True
+
+class AdmissionController:
+    """CPU slots and memory shared by the jobs of every worker, with a bounded waiting line."""
+
+    def __init__(self, root, cpu_slots, memory_bytes, queue_limit, queue_timeout):
+        self.cpu_slots = cpu_slots
+        self.memory_bytes = memory_bytes
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.root = root
+        self._lock = threading.Lock()
+        self._path = os.path.join(root, "ledger.json")
+        self._lock_path = os.path.join(root, "ledger.lock")
+
+    @contextmanager
+    def _ledger(self):
+        """The ledger, locked; changes to it are written back."""
+        # Created here, not once, since temp directories get cleaned
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with open(self._path) as f:
+                    ledger = json.load(f)
+            except (OSError, ValueError):
+                ledger = {"running": {}, "waiting": {}}
+            for entries in ledger.values():
+                for ticket in [t for t, entry in entries.items() if not _alive(entry["pid"])]:
+                    del entries[ticket]
+            try:
+                yield ledger
+            finally:
+                staging = f"{self._path}.{os.getpid()}"
+                with open(staging, "w") as f:
+                    json.dump(ledger, f)
+                os.replace(staging, self._path)
+
+    def _clamp(self, cost):
+        # A job bigger than the whole budget still runs, alone
+        return dict(cost, cpu=min(cost["cpu"], self.cpu_slots), memory=min(cost["memory"], self.memory_bytes))
+
+    def _fits(self, ledger, cost):
+        running = ledger["running"].values()
+        return (sum(entry["cpu"] for entry in running) + cost["cpu"] <= self.cpu_slots
+                and sum(entry["memory"] for entry in running) + cost["memory"] <= self.memory_bytes)
+
+    def _retry_after(self, ledger, now):
+        """Seconds until the running and waiting work should be done, spread over the CPU slots."""
+        remaining = sum(max(entry["started"] + entry["seconds"] - now, 0) for entry in ledger["running"].values())
+        remaining += sum(entry["seconds"] for entry in ledger["waiting"].values())
+        return min(max(math.ceil(remaining / self.cpu_slots), 1), MAX_RETRY_AFTER)
+
+    def admit(self, cost):
+        """
+        Waits until the job fits and returns its ticket (pass it to release);
+        raises Overloaded if the line is full or the wait times out.
+        """
+        cost = self._clamp(cost)
+        ticket = uuid.uuid4().hex
+        deadline = time.monotonic() + self.queue_timeout
+        waiting = False
+        while True:
+            with self._ledger() as ledger:
+                now = time.time()
+                if waiting and ticket not in ledger["waiting"]:
+                    waiting = False  # the ledger was reset; join the line again
+                line = sorted(ledger["waiting"], key=lambda t: (ledger["waiting"][t]["since"], t))
+                first = not line or line[0] == ticket
+                if first and self._fits(ledger, cost):
+                    ledger["waiting"].pop(ticket, None)
+                    ledger["running"][ticket] = dict(cost, pid=os.getpid(), started=now)
+                    return ticket
+                if not waiting:
+                    if len(ledger["waiting"]) >= self.queue_limit:
+                        raise Overloaded(self._retry_after(ledger, now))
+                    ledger["waiting"][ticket] = dict(cost, pid=os.getpid(), since=now)
+                    waiting = True
+                elif time.monotonic() >= deadline:
+                    del ledger["waiting"][ticket]
+                    raise Overloaded(self._retry_after(ledger, now))
+            time.sleep(POLL_SECONDS)
+
+    def release(self, ticket):
+        with self._ledger() as ledger:
+            ledger["running"].pop(ticket, None)
+
+    def status(self):
+        """Jobs running and waiting, with the CPU slots and memory in use."""
+        with self._ledger() as ledger:
+            running = ledger["running"].values()
+            return {
+                "running": len(ledger["running"]),
+                "waiting": len(ledger["waiting"]),
+                "cpu": sum(entry["cpu"] for entry in running),
+                "memory": sum(entry["memory"] for entry in running)
+            }
@@ -0,0 +1,195 @@
+"""
+Content-addressed storage for uploads and generated reports.
+
+Artifacts are keyed by the SHA-256 of their bytes, so the id alone is enough
+for any worker or node to find a file and identical uploads are stored once.
+The cookie session keeps only ids and display names, never local paths.
+
+LocalArtifactStore keeps objects in a directory that may be a shared mount
+(NFS, EFS, ...). Writes go to a temporary file inside the store and are
+renamed into place, so readers never see a partial artifact.
+
+An object's mtime is its last use (stored or downloaded), which reap()
+uses to expire and evict least-recently-used artifacts. Jobs pin the
+artifacts they are reading or producing so they are never reaped mid-use.
+"""
+import os
+import re
+import time
+import hashlib
+import tempfile
+import secrets
+
+CHUNK_SIZE = 1024 * 1024
+# Pins older than this are left over from a crashed worker and no longer protect an artifact
+STALE_PIN_SECONDS = 6 * 3600
+_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+class ArtifactNotFound(KeyError):
+    pass
+
+def validate_artifact_id(artifact_id):
+    if not isinstance(artifact_id, str) or not _ID_RE.match(artifact_id):
+        raise ArtifactNotFound(artifact_id)
+    return artifact_id
+
+class LocalArtifactStore:
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.staging_dir = os.path.join(root, "staging")
+        self.pins_dir = os.path.join(root, "pins")
+        for directory in (self.objects_dir, self.staging_dir, self.pins_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def _object_path(self, artifact_id):
+        return os.path.join(self.objects_dir, artifact_id[:2], artifact_id)
+
+    def put(self, source_path):
+        """Stores a copy of the file and returns its artifact id."""
+        return self.put_parts([source_path])
+
+    def put_parts(self, source_paths):
+        """Stores the concatenation of the files (e.g. upload chunks) and returns its artifact id."""
+        digest = hashlib.sha256()
+        fd, staging_path = tempfile.mkstemp(dir=self.staging_dir)
+        try:
+            # Hash while copying so each source is read only once
+            with os.fdopen(fd, "wb") as out:
+                for source_path in source_paths:
+                    with open(source_path, "rb") as src:
+                        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            artifact_id = digest.hexdigest()
+            final_path = self._object_path(artifact_id)
+            if os.path.exists(final_path):
+                try:
+                    self.touch(artifact_id)
+                    os.remove(staging_path)
+                    return artifact_id
+                except ArtifactNotFound:
+                    pass  # reaped in the meantime; store this copy
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(staging_path, final_path)
+        except BaseException:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            raise
+        return artifact_id
+
+    def path(self, artifact_id):
+        """Local filesystem path of the artifact; raises ArtifactNotFound if it is missing."""
+        final_path = self._object_path(validate_artifact_id(artifact_id))
+        if not os.path.isfile(final_path):
+            raise ArtifactNotFound(artifact_id)
+        return final_path
+
+    def exists(self, artifact_id):
+        try:
+            self.path(artifact_id)
+            return True
+        except ArtifactNotFound:
+            return False
+
+    def touch(self, artifact_id):
+        """Marks the artifact as just used (it becomes the last candidate for eviction)."""
+        try:
+            os.utime(self._object_path(validate_artifact_id(artifact_id)))
+        except FileNotFoundError:
+            raise ArtifactNotFound(artifact_id)
+
+    def pin(self, artifact_id):
+        """Protects the artifact from reap() until unpin() is called with the returned token."""
+        pin_dir = os.path.join(self.pins_dir, validate_artifact_id(artifact_id))
+        token = os.path.join(pin_dir, f"{os.getpid()}-{secrets.token_hex(4)}")
+        while True:
+            os.makedirs(pin_dir, exist_ok=True)
+            try:
+                open(token, "w").close()
+                return token
+            except FileNotFoundError:
+                continue  # another unpin removed the empty directory
+
+    def unpin(self, token):
+        try:
+            os.remove(token)
+            os.rmdir(os.path.dirname(token))
+        except OSError:
+            pass
+
+    def _is_pinned(self, artifact_id):
+        try:
+            return bool(os.listdir(os.path.join(self.pins_dir, artifact_id)))
+        except FileNotFoundError:
+            return False
+
+    def _pinned_ids(self, now):
+        pinned = set()
+        for artifact_id in os.listdir(self.pins_dir):
+            pin_dir = os.path.join(self.pins_dir, artifact_id)
+            for name in os.listdir(pin_dir):
+                pin_path = os.path.join(pin_dir, name)
+                try:
+                    if now - os.path.getmtime(pin_path) < STALE_PIN_SECONDS:
+                        pinned.add(artifact_id)
+                    else:
+                        os.remove(pin_path)
+                except OSError:
+                    continue
+        return pinned
+
+    def reap(self, ttl_seconds, quota_bytes):
+        """
+        Deletes artifacts unused for ttl_seconds, then the least recently used
+        ones until the store fits in quota_bytes. Pinned artifacts are kept.
+        Returns counts and bytes reclaimed.
+        """
+        now = time.time()
+        pinned = self._pinned_ids(now)
+        entries = []
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for entry in os.scandir(prefix_dir):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+        entries.sort()
+        total_bytes = sum(size for _, size, _, _ in entries)
+        stats = {"expired": 0, "evicted": 0, "reclaimed_bytes": 0, "kept_bytes": total_bytes, "pinned": len(pinned)}
+        for mtime, size, artifact_id, path in entries:
+            if artifact_id in pinned:
+                continue
+            if now - mtime > ttl_seconds:
+                reason = "expired"
+            elif total_bytes > quota_bytes:
+                reason = "evicted"
+            else:
+                # Entries are oldest first, so nothing later is expired either
+                break
+            # Moved aside first: a job that pinned it after `pinned` was read gets it back
+            doomed = os.path.join(self.staging_dir, f"reap-{artifact_id}-{secrets.token_hex(4)}")
+            try:
+                os.rename(path, doomed)
+            except FileNotFoundError:
+                continue
+            if self._is_pinned(artifact_id):
+                os.rename(doomed, path)
+                continue
+            os.remove(doomed)
+            total_bytes -= size
+            stats[reason] += 1
+            stats["reclaimed_bytes"] += size
+        stats["kept_bytes"] = total_bytes
+        # Staging files are only left behind by a crashed write
+        for entry in os.scandir(self.staging_dir):
+            try:
+                if now - entry.stat().st_mtime > STALE_PIN_SECONDS:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+        return stats
@@ -0,0 +1,188 @@
+"""
+Headless batch runner for the attendance engine.
+
+Processes every export in a directory with a pool of worker processes and
+writes a JSON report with per-file timing, memory use and outcome, e.g.
+
+    python attendance_batch.py generate exports/ --sessions sessions.csv --workers 4
+    python attendance_batch.py match matching/ --workers 4 --report match_report.json
+
+Each entry records the worker's RSS before and after the job and its peak;
+--tracemalloc adds the top allocation sites of every stage.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from instrumentation import start_timings, stop_timings
+from compressed_logs import display_name
+from attendance_processing import (
+    load_log, process_sessions_for_log, write_excel, read_raw_log, read_session_config,
+    process_file_match, session_occupancy, parse_resolution
+)
+
+GENERATE_SUFFIX = "_processed.xlsx"
+MATCH_SUFFIX = "_processed_match_attendance.xlsx"
+
+# ====================================================
+# Per-file Jobs
+# ====================================================
+
+def sessions_for_file(sessions, file_name):
+    """Rows naming this file, plus rows with no 'File' value (they apply to all)."""
+    return [
+        {k: row[k] for k in ("session_start", "session_end", "time_required")}
+        for row in sessions
+        if row["file"] is None or row["file"] == file_name
+    ]
+
+def generate_job(file_path, sessions_info, output_dir, resolution):
+    log = load_log(file_path)
+    output_records, session_labels, session_summary = process_sessions_for_log(log, sessions_info)
+    occupancy = session_occupancy(log, sessions_info, resolution)
+    name_part = os.path.splitext(display_name(os.path.basename(file_path)))[0]
+    output_file = os.path.join(output_dir or os.path.dirname(file_path), name_part + GENERATE_SUFFIX)
+    write_excel(read_raw_log(file_path), output_records, output_file, occupancy)
+    return {
+        "output": output_file,
+        "participants": len(output_records),
+        "sessions": len(sessions_info),
+        "summary": session_summary,
+        "peaks": [session["peak"] for session in occupancy]
+    }
+
+def match_job(file_path, output_dir):
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    output_file = os.path.join(output_dir or os.path.dirname(file_path), base_name + MATCH_SUFFIX)
+    result = process_file_match(file_path, output_file)
+    result["output"] = output_file
+    return result
+
+def timed(job, file_path, *args, trace_allocations=False):
+    """Runs one job in a worker and turns its result or error into a report entry."""
+    start_time = time.time()
+    entry = {"file": file_path}
+    timings, token = start_timings(memory=True, trace_allocations=trace_allocations)
+    try:
+        entry.update(job(file_path, *args))
+        entry["status"] = "ok"
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    finally:
+        timings.finish()
+        stop_timings(token)
+    entry["seconds"] = round(time.time() - start_time, 3)
+    recorded = timings.as_dict()
+    entry["stages_ms"] = recorded["stages_ms"]
+    entry["memory"] = recorded["memory"]
+    if "allocations" in recorded:
+        entry["allocations"] = recorded["allocations"]
+    return entry
+
+# ====================================================
+# Batch Driver
+# ====================================================
+
+def collect_files(directory, extension, exclude_suffixes=(), exclude=()):
+    exclude = {os.path.abspath(p) for p in exclude}
+    files = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or not name.lower().endswith(extension):
+            continue
+        if name.endswith(exclude_suffixes) or os.path.abspath(path) in exclude:
+            continue
+        files.append(path)
+    return files
+
+def run_batch(args):
+    if args.command == "generate":
+        sessions = read_session_config(args.sessions)
+        if not sessions:
+            raise ValueError("No valid session configurations found in the CSV file.")
+        files = collect_files(args.directory, (".csv", ".csv.gz"), exclude=[args.sessions])
+        jobs = []
+        skipped = []
+        for file_path in files:
+            sessions_info = sessions_for_file(sessions, display_name(os.path.basename(file_path)))
+            if sessions_info:
+                jobs.append((generate_job, file_path, sessions_info, args.output_dir, args.occupancy_resolution))
+            else:
+                skipped.append({"file": file_path, "status": "skipped", "error": "No sessions configured for this file.", "seconds": 0})
+    else:
+        files = collect_files(args.directory, ".xlsx", exclude_suffixes=(GENERATE_SUFFIX, MATCH_SUFFIX))
+        jobs = [(match_job, file_path, args.output_dir) for file_path in files]
+        skipped = []
+
+    started_at = datetime.now()
+    start_time = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(timed, *job, trace_allocations=args.tracemalloc) for job in jobs]
+        for future in as_completed(futures):
+            entry = future.result()
+            results.append(entry)
+            if entry["status"] == "ok":
+                peak = entry["memory"].get("peak_rss")
+                peak_note = f", peak RSS {peak / 2**20:.0f} MiB" if peak else ""
+                print(f"{os.path.basename(entry['file'])}: {entry['seconds']:.2f} seconds{peak_note}")
+            else:
+                print(f"{os.path.basename(entry['file'])}: failed after {entry['seconds']:.2f} seconds: {entry['error']}", file=sys.stderr)
+    results.sort(key=lambda entry: entry["file"])
+    results.extend(skipped)
+
+    return {
+        "command": args.command,
+        "directory": os.path.abspath(args.directory),
+        "workers": args.workers,
+        "started_at": started_at.strftime('%Y-%m-%d %H:%M:%S'),
+        "total_seconds": round(time.time() - start_time, 3),
+        "succeeded": sum(1 for entry in results if entry["status"] == "ok"),
+        "failed": sum(1 for entry in results if entry["status"] == "error"),
+        "skipped": len(skipped),
+        "files": results
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run attendance generation or name matching over a directory of exports.")
+    parser.add_argument("command", choices=["generate", "match"],
+                        help="'generate' processes Zoom CSV logs (.csv or .csv.gz), 'match' processes matching workbooks")
+    parser.add_argument("directory", help="Directory containing the input files")
+    parser.add_argument("--sessions", help="Session config CSV (Session Start, Session End, Time Required[, File]); required for 'generate'")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--output-dir", help="Write outputs here instead of next to each input")
+    parser.add_argument("--occupancy-resolution", type=parse_resolution, default=1,
+                        help="Minutes between samples on the Occupancy sheet ('generate')")
+    parser.add_argument("--report", help="Path of the JSON report (default: <directory>/<command>_report.json)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Record the top allocation sites of every stage (slow)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "generate" and not args.sessions:
+        parser.error("--sessions is required for 'generate'")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    report_path = args.report or os.path.join(args.directory, f"{args.command}_report.json")
+    try:
+        report = run_batch(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Processed {report['succeeded']} of {len(report['files'])} file(s) in {report['total_seconds']:.2f} seconds. Report: {report_path}")
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
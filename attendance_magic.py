@@ -1,28 +1,24 @@
 import os
-import csv
-import math
-import threading
 import time
-from datetime import datetime, timedelta
-import pandas as pd
-from difflib import get_close_matches
-
-# GUI-related imports will be imported locally in functions that need them
-# import tkinter as tk
-# from tkinter import filedialog, messagebox
-# import ttkbootstrap as ttk  # using ttkbootstrap for styling
-# from ttkbootstrap.constants import PRIMARY, SUCCESS, INFO, DANGER, SECONDARY
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from attendance_processing import (
+    parse_datetime, process_sessions_for_file, write_excel, read_raw_log,
+    process_file_match as match_file, read_session_config
+)
+from compressed_logs import display_name
+
+import tkinter as tk
+from tkinter import filedialog, messagebox
+import ttkbootstrap as ttk  # using ttkbootstrap for styling
+from ttkbootstrap.constants import PRIMARY, SUCCESS, INFO, DANGER, SECONDARY
 
 # ====================================================
 # Helper Functions
 # ====================================================
 
-def format_time(time_in_minutes):
-    """Converts a float (minutes) to a string 'M minutes S seconds'."""
-    minutes = int(math.floor(time_in_minutes))
-    seconds = int(round((time_in_minutes - minutes) * 60))
-    return f"{minutes} minutes {seconds} seconds"
-
 class AutocompleteCombobox(ttk.Combobox):
     """
     A combobox that provides autocomplete suggestions based on a provided list.
@@ -44,240 +40,120 @@ class AutocompleteCombobox(ttk.Combobox):
         data = self._completion_list if not value else [item for item in self._completion_list if item.lower().startswith(value.lower())]
         self['values'] = data
 
-def get_column(df, candidates, col_description="column"):
-    for candidate in candidates:
-        if candidate in df.columns:
-            return candidate
-    raise ValueError(f"CSV file must contain one of the following {col_description}: {', '.join(candidates)}")
+# ====================================================
+# Background Jobs
+# ====================================================
 
-def parse_datetime(dt_str):
-    try:
-        return datetime.strptime(dt_str.strip(), '%Y-%m-%d %H:%M:%S')
-    except Exception:
-        raise ValueError(f"Invalid datetime format: {dt_str}. Expected format: YYYY-MM-DD HH:MM:SS")
-
-def merge_intervals(intervals):
-    if not intervals:
-        return []
-    intervals.sort(key=lambda x: x[0])
-    merged = [intervals[0]]
-    for current in intervals[1:]:
-        last = merged[-1]
-        if current[0] <= last[1]:
-            merged[-1] = (last[0], max(last[1], current[1]))
-        else:
-            merged.append(current)
-    return merged
-
-def compute_total_duration(intervals):
-    total = timedelta()
-    for start, end in intervals:
-        total += (end - start)
-    return total.total_seconds() / 60
-
-def intersect_interval(interval, period):
-    start, end = interval
-    p_start, p_end = period
-    new_start = max(start, p_start)
-    new_end = min(end, p_end)
-    return (new_start, new_end) if new_start < new_end else None
-
-def get_global_times(file_path):
-    try:
-        df = pd.read_csv(file_path, skiprows=3)
-        df.columns = df.columns.str.strip()
-    except Exception as e:
-        raise ValueError(f"Error reading file '{file_path}' for global times: {e}")
-    name_col = get_column(df, ["Name", "Name (Original Name)", "Name (original name)"], "name column")
-    join_col = get_column(df, ["Join Time", "Join time"], "Join Time")
-    leave_col = get_column(df, ["Leave Time", "Leave time"], "Leave Time")
-    try:
-        df[join_col] = pd.to_datetime(df[join_col])
-        df[leave_col] = pd.to_datetime(df[leave_col])
-    except Exception as e:
-        raise ValueError(f"Error converting join/leave times in '{file_path}': {e}")
-    df["Name_lower"] = df[name_col].str.lower()
-    global_times = {}
-    for name_lower, group in df.groupby("Name_lower"):
-        global_times[name_lower] = (group[join_col].min(), group[leave_col].max())
-    return global_times
-
-def get_total_durations(file_path):
+# Jobs run in worker processes (the per-file work is pure Python and would
+# serialize on the GIL in threads); spawn keeps Tk state out of the workers.
+_executor = None
+
+def get_executor():
+    """The executor shared by every tool, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def submit_job(func, *args):
+    """Submits to the shared executor, replacing it if a worker died (e.g. out of memory)."""
+    global _executor
     try:
-        df = pd.read_csv(file_path, skiprows=3)
-        df.columns = df.columns.str.strip()
-        name_col = get_column(df, ["Name", "Name (Original Name)", "Name (original name)"], "name column")
-        duration_col = get_column(df, ["Duration", "Duration (minutes)"], "duration column")
-        df[duration_col] = pd.to_numeric(df[duration_col], errors="coerce")
-        df["Name_lower"] = df[name_col].str.lower()
-        return df.groupby("Name_lower")[duration_col].sum().to_dict()
-    except Exception as e:
-        raise ValueError(f"Error computing total durations from '{file_path}': {e}")
-
-def process_csv_session(file_path, session_start, session_end, time_required):
-    try:
-        df = pd.read_csv(file_path, skiprows=3)
-        df.columns = df.columns.str.strip()
-    except Exception as e:
-        raise ValueError(f"Error reading file '{file_path}': {e}")
-    name_col = get_column(df, ["Name", "Name (Original Name)", "Name (original name)"], "name column")
-    email_col = get_column(df, ["Email", "User Email"], "Email")
-    join_col = get_column(df, ["Join Time", "Join time"], "Join Time")
-    leave_col = get_column(df, ["Leave Time", "Leave time"], "Leave Time")
-    try:
-        df[join_col] = pd.to_datetime(df[join_col])
-        df[leave_col] = pd.to_datetime(df[leave_col])
-    except Exception as e:
-        raise ValueError(f"Error converting join/leave times in '{file_path}': {e}")
-    df["Name_lower"] = df[name_col].str.lower()
-    session_results = {}
-    for name_lower, group in df.groupby("Name_lower"):
-        original_name = group.iloc[0][name_col]
-        email = group.iloc[0][email_col]
-        intervals = [(row[join_col], row[leave_col]) for _, row in group.iterrows()]
-        merged = merge_intervals(intervals)
-        session_intervals = [intersect_interval(interval, (session_start, session_end))
-                             for interval in merged if intersect_interval(interval, (session_start, session_end))]
-        session_intervals = merge_intervals(session_intervals)
-        session_duration = compute_total_duration(session_intervals)
-        if session_duration >= time_required:
-            status = "P"
-            shortfall = 0
+        return get_executor().submit(func, *args)
+    except BrokenProcessPool:
+        _executor = None
+        return get_executor().submit(func, *args)
+
+def shutdown_executor():
+    """Drops pending jobs and waits for the running ones, so no report is left half-written."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+def generate_file_job(file_path, sessions_info):
+    """Attendance report for one log, saved next to it as <name>_processed.xlsx."""
+    output_records, session_labels, session_summary = process_sessions_for_file(file_path, sessions_info)
+    raw_log_df = read_raw_log(file_path)
+    name_part, _ = os.path.splitext(display_name(os.path.basename(file_path)))
+    output_file = os.path.join(os.path.dirname(file_path), name_part + "_processed.xlsx")
+    write_excel(raw_log_df, output_records, output_file)
+    return {"output": output_file, "summary": session_summary}
+
+def match_file_job(file_path):
+    """Matching for one workbook, saved next to it as <name>_processed_match_attendance.xlsx."""
+    start_time = time.time()
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    output_file = os.path.join(os.path.dirname(file_path), base_name + "_processed_match_attendance.xlsx")
+    match_file(file_path, output_file)
+    return {"output": output_file, "seconds": time.time() - start_time}
+
+class JobBatch:
+    """
+    One batch of (label, function, *args) jobs on the shared executor.
+    Executor threads only put finished futures on a queue; the widget polls
+    it with after(), so every callback runs on the Tk thread:
+    on_progress(label, finished, total) per job and on_done(results) once,
+    where results lists (label, status, value) in job order: status is "ok"
+    (value is the job's result), "error" (value is the message) or
+    "cancelled". Labels are only for display and may repeat.
+    """
+    POLL_MS = 100
+
+    def __init__(self, widget, jobs, on_progress, on_done):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.events = queue.Queue()
+        self.labels = []
+        self.futures = []
+        for index, (label, func, *args) in enumerate(jobs):
+            future = submit_job(func, *args)
+            future.add_done_callback(lambda f, index=index: self.events.put(index))
+            self.labels.append(label)
+            self.futures.append(future)
+        self.results = [None] * len(self.futures)
+        self.finished = 0
+        self.widget.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        """Cancels the jobs not started yet; running ones finish and are reported."""
+        for future in self.futures:
+            future.cancel()
+
+    def _poll(self):
+        if not self.widget.winfo_exists():
+            # The tool was closed (e.g. Back): drop what has not started
+            self.cancel()
+            return
+        try:
+            while True:
+                index = self.events.get_nowait()
+                future, label = self.futures[index], self.labels[index]
+                if future.cancelled():
+                    self.results[index] = (label, "cancelled", None)
+                elif future.exception() is not None:
+                    self.results[index] = (label, "error", str(future.exception()))
+                else:
+                    self.results[index] = (label, "ok", future.result())
+                self.finished += 1
+                self.on_progress(label, self.finished, len(self.futures))
+        except queue.Empty:
+            pass
+        if self.finished < len(self.futures):
+            self.widget.after(self.POLL_MS, self._poll)
         else:
-            status = "A"
-            shortfall = round(time_required - session_duration, 2)
-        session_results[name_lower] = {
-            "Name": original_name,
-            "Email": email,
-            "session_duration": session_duration,
-            "status": status,
-            "shortfall": shortfall
-        }
-    return session_results
+            self.on_done(self.results)
 
-def process_sessions_for_file(file_path, sessions_info):
-    global_participants = {}
-    total_sessions = len(sessions_info)
-    session_labels = []
-    for session_index, session in enumerate(sessions_info, start=1):
-        try:
-            session_results = process_csv_session(file_path, session["session_start"], session["session_end"], session["time_required"])
-            session_global_times = get_global_times(file_path)
-        except ValueError as ve:
-            raise ValueError(str(ve))
-        for name_lower, details in session_results.items():
-            if name_lower not in session_global_times:
-                continue
-            g_join, g_leave = session_global_times[name_lower]
-            session_detail = {
-                "status": details["status"],
-                "shortfall": details["shortfall"],
-                "session_duration": details["session_duration"]
-            }
-            if name_lower not in global_participants:
-                global_participants[name_lower] = {
-                    "Name": details["Name"],
-                    "Email": details["Email"],
-                    "global_join": g_join,
-                    "global_leave": g_leave,
-                    "total_duration": details["session_duration"],
-                    "sessions": {session_index: session_detail}
-                }
-            else:
-                curr = global_participants[name_lower]
-                curr["global_join"] = min(curr["global_join"], g_join)
-                curr["global_leave"] = max(curr["global_leave"], g_leave)
-                curr["total_duration"] += details["session_duration"]
-                curr["sessions"][session_index] = session_detail
-        session_labels.append(f"Session {session_index} ({session['session_start'].strftime('%Y-%m-%d %H:%M:%S')})")
-    for participant in global_participants.values():
-        for i in range(1, total_sessions + 1):
-            if i not in participant["sessions"]:
-                req = sessions_info[i-1]["time_required"]
-                participant["sessions"][i] = {"status": "A", "shortfall": req, "session_duration": 0}
-    try:
-        raw_durations = get_total_durations(file_path)
-    except Exception as e:
-        raise ValueError(str(e))
-    for name_lower, participant in global_participants.items():
-        if name_lower in raw_durations:
-            participant["total_duration"] = raw_durations[name_lower]
-    output_records = []
-    for participant in global_participants.values():
-        record = {
-            "Name": participant["Name"],
-            "Email": participant["Email"],
-            "Join Time": participant["global_join"].strftime('%Y-%m-%d %H:%M:%S'),
-            "Leave Time": participant["global_leave"].strftime('%Y-%m-%d %H:%M:%S')
-        }
-        for i in range(1, total_sessions + 1):
-            record[session_labels[i-1]] = participant["sessions"][i]["status"]
-        record["Total Duration"] = round(participant["total_duration"], 2)
-        breakdown_msgs = []
-        for i in range(1, total_sessions + 1):
-            sess = participant["sessions"][i]
-            if sess["status"] == "A":
-                req = sessions_info[i-1]["time_required"]
-                computed = sess["session_duration"]
-                breakdown_msgs.append(f"User duration is just {format_time(computed)} out of {format_time(req)} minutes, which is why marking absent in {session_labels[i-1]}")
-        record["Shortfall Reason"] = "; ".join(breakdown_msgs) if breakdown_msgs else ""
-        output_records.append(record)
-    session_summary = []
-    for i in range(1, total_sessions + 1):
-        present_count = sum(1 for p in global_participants.values() if p["sessions"].get(i, {}).get("status", "A") == "P")
-        absent_count = sum(1 for p in global_participants.values() if p["sessions"].get(i, {}).get("status", "A") == "A")
-        session_summary.append(f"Session {i}: Present: {present_count}, Absent: {absent_count}")
-    return output_records, session_labels, session_summary
-
-def write_excel(raw_log_df, output_records, output_file):
-    try:
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-            raw_log_df.to_excel(writer, sheet_name="Sheet1", index=False, header=False)
-            pd.DataFrame(output_records).to_excel(writer, sheet_name="Attendance", index=False)
-    except Exception as e:
-        raise ValueError(f"Error saving output Excel file: {e}")
-
-def match_names_v4(main_name, zoom_names):
-    valid_zoom_names = [name for name in zoom_names if isinstance(name, str)]
-    if main_name in valid_zoom_names:
-        return main_name
-    main_parts = main_name.lower().split()
-    for zoom_name in valid_zoom_names:
-        zoom_parts = zoom_name.lower().split()
-        if len(main_parts) >= 2:
-            if main_parts[0] in zoom_parts and main_parts[-1] in zoom_parts:
-                return zoom_name
-        if len(main_parts) == 1 and main_parts[0] in zoom_parts:
-            return zoom_name
-    return None
-
-def process_file_match(input_path, output_path, silent=False):
-    df = pd.read_excel(input_path)
-    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-    main_list = df.iloc[:, 1]
-    zoom_log_names = df.iloc[:, 2]
-    arranged_data_v4 = df.iloc[:, :2].copy()
-    for col in df.columns[2:]:
-        arranged_data_v4[col] = 'N/A'
-    unmatched_zoom_log_v4 = []
-    for index, main_name in enumerate(main_list):
-        if pd.isna(main_name):
-            continue
-        matched_name = match_names_v4(main_name, zoom_log_names)
-        if matched_name:
-            matched_row = df[df.iloc[:, 2] == matched_name].iloc[0]
-            arranged_data_v4.iloc[index, 2:] = matched_row.iloc[2:]
-    for zoom_name in zoom_log_names:
-        if pd.isna(zoom_name) or zoom_name in arranged_data_v4.iloc[:, 2].values:
-            continue
-        unmatched_row = df[df.iloc[:, 2] == zoom_name].iloc[0]
-        unmatched_zoom_log_v4.append(unmatched_row)
-    unmatched_df = pd.DataFrame(unmatched_zoom_log_v4)
-    with pd.ExcelWriter(output_path) as writer:
-        arranged_data_v4.to_excel(writer, index=False, sheet_name="Matched Records")
-        unmatched_df.to_excel(writer, index=False, sheet_name="Unmatched Records")
-    if not silent:
-        messagebox.showinfo("Success", f"Data arranged successfully! Saved to: {output_path}")
+def batch_report(results, describe):
+    """Message lines for a finished batch: describe(label, value) per success, then errors and cancellations."""
+    lines = [describe(label, value) for label, status, value in results if status == "ok"]
+    lines += [f"{label}: failed: {value}" for label, status, value in results if status == "error"]
+    cancelled = sum(1 for _, status, _ in results if status == "cancelled")
+    if cancelled:
+        lines.append(f"{cancelled} file(s) cancelled")
+    return lines
 
 # ====================================================
 # Attendance Generator Tool as a Class
@@ -370,11 +246,15 @@ class AttendanceGeneratorApp:
         self.add_session_button.pack(side="left", padx=5)
         self.generate_button = ttk.Button(action_frame, text="Generate Attendance", command=self.generate_attendance, bootstyle=PRIMARY)
         self.generate_button.pack(side="right", padx=5)
+        self.cancel_button = ttk.Button(action_frame, text="Cancel", command=self.cancel_generation, bootstyle=DANGER, state="disabled")
+        self.cancel_button.pack(side="right", padx=5)
+        self.batch = None
 
         # Progress Indicator
-        self.progress_bar = ttk.Progressbar(self.main_frame, mode="indeterminate")
+        self.progress_bar = ttk.Progressbar(self.main_frame, mode="determinate")
         self.progress_bar.pack(fill="x", pady=5)
         self.progress_bar.pack_forget()
+        self.progress_label = ttk.Label(self.main_frame, text="")
 
         # Bottom Navigation (Back button)
         bottom_nav = ttk.Frame(master, padding=10)
@@ -389,7 +269,9 @@ class AttendanceGeneratorApp:
         self.switch_mode()
 
     def go_back(self):
-        # Simply call the back callback to clear and rebuild the main menu
+        # Pending files are dropped; the callback clears and rebuilds the main menu
+        if self.batch is not None:
+            self.batch.cancel()
         self.back_callback()
 
     def switch_mode(self):
@@ -433,23 +315,13 @@ class AttendanceGeneratorApp:
         if not file_path:
             return
         try:
-            df = pd.read_csv(file_path)
-            df.columns = df.columns.str.strip()
-            required_cols = ["Session Start", "Session End", "Time Required"]
-            for col in required_cols:
-                if col not in df.columns:
-                    raise ValueError(f"Session Config CSV must contain column '{col}'.")
-            has_file = "File" in df.columns
             options = []
             mapping = {}
-            for _, row in df.iterrows():
-                try:
-                    session_start = parse_datetime(row["Session Start"])
-                    session_end = parse_datetime(row["Session End"])
-                    time_required = float(row["Time Required"])
-                    file_val = row["File"] if has_file else None
-                except Exception:
-                    continue
+            for row in read_session_config(file_path):
+                session_start = row["session_start"]
+                session_end = row["session_end"]
+                time_required = row["time_required"]
+                file_val = row["file"]
                 display = (f"{file_val} | " if file_val else "") + f"{session_start.strftime('%Y-%m-%d %H:%M:%S')} to {session_end.strftime('%Y-%m-%d %H:%M:%S')} ({time_required} min)"
                 options.append(display)
                 mapping[display] = (session_start, session_end, time_required, file_val)
@@ -550,134 +422,71 @@ class AttendanceGeneratorApp:
             messagebox.showerror("Error", "Please ensure a CSV file(s) and at least one session are selected.")
             return
 
+        # Widgets are read here on the Tk thread; only plain data goes to the workers
+        sessions_by_file = {}
+        for sess in self.session_rows:
+            s_text = sess["start_entry"].get().strip()
+            e_text = sess["end_entry"].get().strip()
+            tr_text = sess["time_required_entry"].get().strip()
+            if not s_text or not e_text or not tr_text:
+                messagebox.showerror("Error", "Session details missing in one of the session rows.")
+                return
+            try:
+                s_dt = parse_datetime(s_text)
+                e_dt = parse_datetime(e_text)
+                time_req_val = float(tr_text)
+            except ValueError as ve:
+                messagebox.showerror("Error", f"Error in session details: {ve}")
+                return
+            if s_dt >= e_dt:
+                messagebox.showerror("Error", "Session Start must be before Session End.")
+                return
+            file_name = sess["file_widget"].get() if mode == "multiple" else os.path.basename(self.selected_file)
+            if mode == "multiple" and file_name not in self.file_mapping:
+                messagebox.showerror("Error", f"Selected file '{file_name}' not found.")
+                return
+            file_path = self.file_mapping[file_name] if mode == "multiple" else self.selected_file
+            sessions_by_file.setdefault(file_path, []).append({
+                "session_start": s_dt,
+                "session_end": e_dt,
+                "time_required": time_req_val
+            })
+
         self.generate_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(maximum=len(sessions_by_file), value=0)
         self.progress_bar.pack(fill="x", pady=5)
-        self.progress_bar.start()
-        self.master.update_idletasks()
-
-        def task():
-            try:
-                if mode == "single":
-                    sessions_info = []
-                    for sess in self.session_rows:
-                        s_text = sess["start_entry"].get().strip()
-                        e_text = sess["end_entry"].get().strip()
-                        tr_text = sess["time_required_entry"].get().strip()
-                        if not s_text or not e_text or not tr_text:
-                            self.master.after(0, lambda: messagebox.showerror("Error", "Session details missing in one of the session rows."))
-                            return
-                        try:
-                            s_dt = parse_datetime(s_text)
-                            e_dt = parse_datetime(e_text)
-                            time_req_val = float(tr_text)
-                        except ValueError as ve:
-                            self.master.after(0, lambda: messagebox.showerror("Error", f"Error in session details: {ve}"))
-                            return
-                        if s_dt >= e_dt:
-                            self.master.after(0, lambda: messagebox.showerror("Error", "Session Start must be before Session End."))
-                            return
-                        sessions_info.append({
-                            "session_start": s_dt,
-                            "session_end": e_dt,
-                            "time_required": time_req_val
-                        })
-                    try:
-                        output_records, session_labels, session_summary = process_sessions_for_file(self.selected_file, sessions_info)
-                    except ValueError as ve:
-                        self.master.after(0, lambda: messagebox.showerror("Error", str(ve)))
-                        return
-                    try:
-                        with open(self.selected_file, 'r', encoding='utf-8') as f:
-                            sample = f.read(1024)
-                            f.seek(0)
-                            dialect = csv.Sniffer().sniff(sample)
-                            raw_data = list(csv.reader(f, dialect))
-                        raw_log_df = pd.DataFrame(raw_data)
-                    except Exception as e:
-                        self.master.after(0, lambda: messagebox.showerror("Error", f"Error reading raw log from '{self.selected_file}': {e}"))
-                        return
-                    base = os.path.basename(self.selected_file)
-                    name_part, _ = os.path.splitext(base)
-                    # Automatically use same folder and same name with suffix
-                    output_file = os.path.join(os.path.dirname(self.selected_file), name_part + "_processed.xlsx")
-                    try:
-                        write_excel(raw_log_df, output_records, output_file)
-                    except ValueError as e:
-                        self.master.after(0, lambda: messagebox.showerror("Error", str(e)))
-                        return
-                    summary_str = "\n".join(session_summary)
-                    self.master.after(0, lambda: messagebox.showinfo("Attendance Generated",
-                                                    f"Attendance generated and saved to:\n{output_file}\n\nAttendance Summary:\n{summary_str}"))
-                else:
-                    sessions_by_file = {}
-                    for sess in self.session_rows:
-                        s_text = sess["start_entry"].get().strip()
-                        e_text = sess["end_entry"].get().strip()
-                        tr_text = sess["time_required_entry"].get().strip()
-                        if not s_text or not e_text or not tr_text:
-                            self.master.after(0, lambda: messagebox.showerror("Error", "Session details missing in one of the session rows."))
-                            return
-                        try:
-                            s_dt = parse_datetime(s_text)
-                            e_dt = parse_datetime(e_text)
-                            time_req_val = float(tr_text)
-                        except ValueError as ve:
-                            self.master.after(0, lambda: messagebox.showerror("Error", f"Error in session details: {ve}"))
-                            return
-                        if s_dt >= e_dt:
-                            self.master.after(0, lambda: messagebox.showerror("Error", "Session Start must be before Session End."))
-                            return
-                        file_name = sess["file_widget"].get() if mode == "multiple" else os.path.basename(self.selected_file)
-                        if mode == "multiple" and file_name not in self.file_mapping:
-                            self.master.after(0, lambda: messagebox.showerror("Error", f"Selected file '{file_name}' not found."))
-                            return
-                        file_path = self.file_mapping[file_name] if mode == "multiple" else self.selected_file
-                        sessions_by_file.setdefault(file_path, []).append({
-                            "session_start": s_dt,
-                            "session_end": e_dt,
-                            "time_required": time_req_val
-                        })
-                    if not sessions_by_file:
-                        self.master.after(0, lambda: messagebox.showerror("Error", "No session information available."))
-                        return
-                    summary_all = {}
-                    for file_path, sessions_info in sessions_by_file.items():
-                        try:
-                            output_records, session_labels, session_summary = process_sessions_for_file(file_path, sessions_info)
-                        except ValueError as ve:
-                            self.master.after(0, lambda: messagebox.showerror("Error", str(ve)))
-                            return
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                sample = f.read(1024)
-                                f.seek(0)
-                                dialect = csv.Sniffer().sniff(sample)
-                                raw_data = list(csv.reader(f, dialect))
-                            raw_log_df = pd.DataFrame(raw_data)
-                        except Exception as e:
-                            self.master.after(0, lambda: messagebox.showerror("Error", f"Error reading raw log from '{file_path}': {e}"))
-                            return
-                        base = os.path.basename(file_path)
-                        name_part, _ = os.path.splitext(base)
-                        # Save automatically with suffix _processed.xlsx
-                        output_file = os.path.join(os.path.dirname(file_path), name_part + "_processed.xlsx")
-                        try:
-                            write_excel(raw_log_df, output_records, output_file)
-                        except ValueError as e:
-                            self.master.after(0, lambda: messagebox.showerror("Error", f"Error saving output Excel file for {base}: {e}"))
-                            return
-                        summary_all[base] = "\n".join(session_summary)
-                    summary_str = "\n\n".join([f"{fname}:\n{summary}" for fname, summary in summary_all.items()])
-                    self.master.after(0, lambda: messagebox.showinfo("Attendance Generated",
-                                                    f"Processed {len(summary_all)} files.\n\nAttendance Summary:\n{summary_str}"))
-            finally:
-                self.master.after(0, self.reset_generate_button)
-
-        threading.Thread(target=task).start()
+        self.progress_label.config(text=f"Processing {len(sessions_by_file)} file(s)...")
+        self.progress_label.pack()
+        jobs = [(os.path.basename(file_path), generate_file_job, file_path, sessions_info)
+                for file_path, sessions_info in sessions_by_file.items()]
+        self.batch = JobBatch(self.main_frame, jobs, self.generation_progress, self.generation_done)
+
+    def cancel_generation(self):
+        if self.batch is not None:
+            self.batch.cancel()
+            self.cancel_button.config(state="disabled")
+            self.progress_label.config(text="Cancelling: waiting for the files already running...")
+
+    def generation_progress(self, label, finished, total):
+        self.progress_bar.config(value=finished)
+        self.progress_label.config(text=f"Finished {label} ({finished}/{total})")
+
+    def generation_done(self, results):
+        self.batch = None
+        self.reset_generate_button()
+        processed = sum(1 for _, status, _ in results if status == "ok")
+        lines = batch_report(results, lambda label, value: f"{label} (saved to {value['output']}):\n" + "\n".join(value["summary"]))
+        message = f"Processed {processed} of {len(results)} file(s).\n\nAttendance Summary:\n" + "\n\n".join(lines)
+        if any(status == "error" for _, status, _ in results):
+            messagebox.showerror("Error", message)
+        else:
+            messagebox.showinfo("Attendance Generated", message)
 
     def reset_generate_button(self):
-        self.progress_bar.stop()
         self.progress_bar.pack_forget()
+        self.progress_label.pack_forget()
+        self.cancel_button.config(state="disabled")
         self.generate_button.config(state="normal")
 
 # ====================================================
@@ -723,50 +532,59 @@ def show_attendance_match_tool():
                 file_entry.insert(0, f"{len(selected_files)} file(s) selected")
     tk.Button(file_frame, text="Browse", command=browse_files, font=("Helvetica", 12)).pack(side="left")
 
-    # Process Button
-    process_button = tk.Button(match_frame, text="Process to match", font=("Helvetica", 12), width=20)
-    process_button.pack(pady=10)
+    # Process and Cancel Buttons
+    button_frame = tk.Frame(match_frame, bg="#f5f5f5")
+    button_frame.pack(pady=10)
+    process_button = tk.Button(button_frame, text="Process to match", font=("Helvetica", 12), width=20)
+    process_button.pack(side="left", padx=5)
+    cancel_button = tk.Button(button_frame, text="Cancel", font=("Helvetica", 12), width=10, state="disabled")
+    cancel_button.pack(side="left", padx=5)
 
     # Progress Bar and Label
     progress_bar = ttk.Progressbar(match_frame, mode="determinate")
     progress_bar.pack(fill="x", pady=5)
     progress_label = tk.Label(match_frame, text="", font=("Helvetica", 12), bg="#f5f5f5")
     progress_label.pack()
+    batch = None
+
+    def on_progress(label, finished, total):
+        progress_bar['value'] = finished
+        progress_label.config(text=f"Finished {label} ({finished}/{total})")
+
+    def on_done(results):
+        nonlocal batch
+        batch = None
+        lines = batch_report(results, lambda label, value: f"{label}: {value['seconds']:.2f} seconds")
+        summary_text = "\n".join(lines)
+        progress_label.config(text="Processing complete")
+        process_button.config(state="normal")
+        cancel_button.config(state="disabled")
+        if any(status == "error" for _, status, _ in results):
+            messagebox.showerror("Error", f"Files processed:\n{summary_text}")
+        else:
+            messagebox.showinfo("Processing Complete", f"Files processed:\n{summary_text}")
 
     def process_match():
+        nonlocal batch
         if not selected_files:
             messagebox.showerror("Error", "Please select at least one Excel file.")
             return
         process_button.config(state="disabled")
-        num_files = len(selected_files)
-        progress_bar.config(maximum=num_files)
+        cancel_button.config(state="normal")
+        progress_bar.config(maximum=len(selected_files))
         progress_bar['value'] = 0
-        results = {}  # to store processing time for each file
-
-        def task():
-            for i, file in enumerate(selected_files):
-                progress_label.config(text=f"Processing: {os.path.basename(file)}")
-                start_time = time.time()
-                dir_name = os.path.dirname(file)
-                base_name = os.path.splitext(os.path.basename(file))[0]
-                output_file = os.path.join(dir_name, base_name + "_processed_match_attendance.xlsx")
-                try:
-                    process_file_match(file, output_file, silent=True)
-                except Exception as e:
-                    match_frame.after(0, lambda: messagebox.showerror("Error", f"Error processing {os.path.basename(file)}: {e}"))
-                    continue
-                elapsed = time.time() - start_time
-                results[file] = elapsed
-                progress_bar['value'] = i + 1
-            summary_lines = [f"{os.path.basename(f)}: {results[f]:.2f} seconds" for f in results]
-            summary_text = "\n".join(summary_lines)
-            match_frame.after(0, lambda: messagebox.showinfo("Processing Complete", f"Files processed:\n{summary_text}"))
-            match_frame.after(0, lambda: progress_label.config(text="Processing complete"))
-            match_frame.after(0, lambda: process_button.config(state="normal"))
-
-        threading.Thread(target=task).start()
+        progress_label.config(text=f"Processing {len(selected_files)} file(s)...")
+        jobs = [(os.path.basename(file), match_file_job, file) for file in selected_files]
+        batch = JobBatch(match_frame, jobs, on_progress, on_done)
+
+    def cancel_match():
+        if batch is not None:
+            batch.cancel()
+            cancel_button.config(state="disabled")
+            progress_label.config(text="Cancelling: waiting for the files already running...")
 
     process_button.config(command=process_match)
+    cancel_button.config(command=cancel_match)
 
     # Back Button
     tk.Button(match_frame, text="Back", command=show_main_menu, font=("Helvetica", 12)).pack(pady=10)
@@ -840,4 +658,9 @@ if __name__ == "__main__":
 
     show_main_menu()
 
+    def on_close():
+        # The window goes away at once; files already running are finished first
+        root.destroy()
+        shutdown_executor()
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
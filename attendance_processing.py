@@ -1,8 +1,18 @@
 import os
+import re
 import csv
 import math
 from datetime import datetime, timedelta
-import pandas as pd
+from lazy_imports import lazy_module
+
+# Loaded on first use, so importing this module stays cheap
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+fuzz = lazy_module("rapidfuzz.fuzz")
+process = lazy_module("rapidfuzz.process")
+
+from instrumentation import stage, count
+from compressed_logs import csv_compression, open_text
 
 # ====================================================
 # Helper Functions
@@ -52,41 +62,18 @@ def intersect_interval(interval, period):
     new_end = min(end, p_end)
     return (new_start, new_end) if new_start < new_end else None
 
-def get_global_times(file_path):
-    try:
-        df = pd.read_csv(file_path, skiprows=3)
-        df.columns = df.columns.str.strip()
-    except Exception as e:
-        raise ValueError(f"Error reading file '{file_path}' for global times: {e}")
-    name_col = get_column(df, ["Name", "Name (Original Name)", "Name (original name)"], "name column")
-    join_col = get_column(df, ["Join Time", "Join time"], "Join Time")
-    leave_col = get_column(df, ["Leave Time", "Leave time"], "Leave Time")
-    try:
-        df[join_col] = pd.to_datetime(df[join_col])
-        df[leave_col] = pd.to_datetime(df[leave_col])
-    except Exception as e:
-        raise ValueError(f"Error converting join/leave times in '{file_path}': {e}")
-    df["Name_lower"] = df[name_col].str.lower()
-    global_times = {}
-    for name_lower, group in df.groupby("Name_lower"):
-        global_times[name_lower] = (group[join_col].min(), group[leave_col].max())
-    return global_times
-
-def get_total_durations(file_path):
-    try:
-        df = pd.read_csv(file_path, skiprows=3)
-        df.columns = df.columns.str.strip()
-        name_col = get_column(df, ["Name", "Name (Original Name)", "Name (original name)"], "name column")
-        duration_col = get_column(df, ["Duration", "Duration (minutes)"], "duration column")
-        df[duration_col] = pd.to_numeric(df[duration_col], errors="coerce")
-        df["Name_lower"] = df[name_col].str.lower()
-        return df.groupby("Name_lower")[duration_col].sum().to_dict()
-    except Exception as e:
-        raise ValueError(f"Error computing total durations from '{file_path}': {e}")
+# ====================================================
+# Indexed Session Engine
+# ====================================================
 
-def process_csv_session(file_path, session_start, session_end, time_required):
+def load_zoom_log(file_path):
+    """
+    Reads a Zoom participant export once into canonical columns: Name, Email,
+    Name_lower, Join Time, Leave Time (datetimes) and Duration (numeric).
+    Gzipped exports are decompressed as they are parsed.
+    """
     try:
-        df = pd.read_csv(file_path, skiprows=3)
+        df = pd.read_csv(file_path, skiprows=3, compression=csv_compression(file_path))
         df.columns = df.columns.str.strip()
     except Exception as e:
         raise ValueError(f"Error reading file '{file_path}': {e}")
@@ -94,84 +81,276 @@ def process_csv_session(file_path, session_start, session_end, time_required):
     email_col = get_column(df, ["Email", "User Email"], "Email")
     join_col = get_column(df, ["Join Time", "Join time"], "Join Time")
     leave_col = get_column(df, ["Leave Time", "Leave time"], "Leave Time")
+    duration_col = get_column(df, ["Duration", "Duration (minutes)"], "duration column")
     try:
-        df[join_col] = pd.to_datetime(df[join_col])
-        df[leave_col] = pd.to_datetime(df[leave_col])
+        join_times = pd.to_datetime(df[join_col])
+        leave_times = pd.to_datetime(df[leave_col])
     except Exception as e:
         raise ValueError(f"Error converting join/leave times in '{file_path}': {e}")
-    df["Name_lower"] = df[name_col].str.lower()
-    session_results = {}
-    for name_lower, group in df.groupby("Name_lower"):
-        original_name = group.iloc[0][name_col]
-        email = group.iloc[0][email_col]
-        intervals = [(row[join_col], row[leave_col]) for _, row in group.iterrows()]
-        merged = merge_intervals(intervals)
-        session_intervals = [intersect_interval(interval, (session_start, session_end))
-                             for interval in merged if intersect_interval(interval, (session_start, session_end))]
-        session_intervals = merge_intervals(session_intervals)
-        session_duration = compute_total_duration(session_intervals)
-        if session_duration >= time_required:
-            status = "P"
-            shortfall = 0
-        else:
-            status = "A"
-            shortfall = round(time_required - session_duration, 2)
-        session_results[name_lower] = {
-            "Name": original_name,
-            "Email": email,
-            "session_duration": session_duration,
-            "status": status,
-            "shortfall": shortfall
-        }
-    return session_results
+    return pd.DataFrame({
+        "Name": df[name_col],
+        "Email": df[email_col],
+        "Name_lower": df[name_col].str.lower(),
+        "Join Time": join_times,
+        "Leave Time": leave_times,
+        "Duration": pd.to_numeric(df[duration_col], errors="coerce")
+    })
 
-def process_sessions_for_file(file_path, sessions_info):
-    global_participants = {}
+# ====================================================
+# Identity Resolution
+# ====================================================
+
+_PARENTHETICAL_RE = re.compile(r"\([^)]*\)")
+# Only the possessive form ("John's iPhone") is a sure device suffix; a bare
+# trailing word may be a surname ("Anna Pixel")
+_DEVICE_SUFFIX_RE = re.compile(r"['\u2019]s\s+(?:iphone|ipad|android|galaxy|pixel)\b.*$")
+_NAME_PUNCT_RE = re.compile(r"[^\w\s]")
+_NAME_SPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+
+FUZZY_NAME_THRESHOLD = 92
+MAX_FUZZY_BLOCK = 500
+
+def clean_display_names(names):
+    """Lower-cases display names and drops '(iPhone)'-style tags and "'s iPhone" suffixes."""
+    return (names.str.lower()
+                 .str.replace(_PARENTHETICAL_RE, " ", regex=True)
+                 .str.replace(_DEVICE_SUFFIX_RE, "", regex=True)
+                 .str.replace(_NAME_PUNCT_RE, "", regex=True)
+                 .str.replace(_NAME_SPACE_RE, " ", regex=True)
+                 .str.strip())
+
+def clean_display_name(name):
+    """clean_display_names for one name, for callers that see names one at a time."""
+    clean = _PARENTHETICAL_RE.sub(" ", name.lower())
+    clean = _NAME_PUNCT_RE.sub("", _DEVICE_SUFFIX_RE.sub("", clean))
+    return _NAME_SPACE_RE.sub(" ", clean).strip()
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def _union(parent, email_of, a, b):
+    """Joins the sets of a and b unless they carry two different emails."""
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a == root_b:
+        return
+    if email_of[root_a] and email_of[root_b] and email_of[root_a] != email_of[root_b]:
+        return
+    parent[root_b] = root_a
+    email_of[root_a] = email_of[root_a] or email_of[root_b]
+
+def resolve_identities(log, threshold=FUZZY_NAME_THRESHOLD):
+    """
+    Adds a Participant_key column that groups the rows of one person.
+    Rows are reduced to (clean name, email) variants, which are unioned when
+    they share an email, when they share a clean name used with at most one
+    email, and when their clean names are near-identical (rapidfuzz ratio at
+    or above threshold, same digits) within a first-token or last-token block.
+    A set never takes in two different emails, so namesakes with their own
+    addresses stay apart. The key is the set's email, or else its smallest
+    clean name, so it does not depend on row order.
+    """
+    named = log["Name_lower"].notna()
+    clean = clean_display_names(log["Name"].where(named))
+    clean = clean.where(clean.fillna("") != "", log["Name_lower"])
+    emails = log["Email"].where(log["Email"].notna(), "").astype(str).str.strip().str.lower()
+    variant_of_row, variants = pd.MultiIndex.from_arrays([clean[named], emails[named]]).factorize()
+    variant_names = list(variants.get_level_values(0))
+    variant_emails = list(variants.get_level_values(1))
+    parent = list(range(len(variants)))
+    email_of = [email or None for email in variant_emails]
+
+    by_email = {}
+    by_name = {}
+    for i, (name, email) in enumerate(zip(variant_names, variant_emails)):
+        if email:
+            by_email.setdefault(email, []).append(i)
+        by_name.setdefault(name, []).append(i)
+    for members in by_email.values():
+        for i in members[1:]:
+            _union(parent, email_of, members[0], i)
+    # A name used with several emails is ambiguous: only unambiguous names are
+    # unioned outright or offered to the fuzzy pass.
+    representative = {}
+    for name, members in by_name.items():
+        if len({variant_emails[i] for i in members if variant_emails[i]}) <= 1:
+            for i in members[1:]:
+                _union(parent, email_of, members[0], i)
+            representative[name] = members[0]
+
+    blocks = {}
+    for name in representative:
+        tokens = name.split()
+        if tokens:
+            blocks.setdefault(("first", tokens[0]), []).append(name)
+            blocks.setdefault(("last", tokens[-1]), []).append(name)
+    for block in blocks.values():
+        if len(block) < 2 or len(block) > MAX_FUZZY_BLOCK:
+            continue
+        scores = process.cdist(block, block, scorer=fuzz.ratio, score_cutoff=threshold, dtype=np.uint8)
+        for a, b in zip(*np.nonzero(np.triu(scores, k=1))):
+            if _DIGITS_RE.findall(block[a]) == _DIGITS_RE.findall(block[b]):
+                _union(parent, email_of, representative[block[a]], representative[block[b]])
+
+    set_key = {}
+    for i, name in enumerate(variant_names):
+        root = _find(parent, i)
+        if email_of[root]:
+            set_key[root] = email_of[root]
+        elif root not in set_key or name < set_key[root]:
+            set_key[root] = name
+    keys = np.array([set_key[_find(parent, i)] for i in range(len(variants))], dtype=object)
+    log = log.copy()
+    log["Participant_key"] = pd.Series(keys[variant_of_row], index=log.index[named], dtype=object)
+    return log
+
+def participant_key_column(log):
+    return "Participant_key" if "Participant_key" in log.columns else "Name_lower"
+
+def merge_log_intervals(log):
+    """
+    Vectorized merge_intervals for every participant at once. Returns the
+    sorted participant keys and, for each merged interval, the owner's
+    position in that list plus start/end as int64 nanoseconds.
+    """
+    key_col = participant_key_column(log)
+    valid = log.dropna(subset=[key_col, "Join Time", "Leave Time"])
+    keys, owner = np.unique(valid[key_col].to_numpy(dtype=object), return_inverse=True)
+    starts = valid["Join Time"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    ends = valid["Leave Time"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    order = np.lexsort((starts, owner))
+    owner, starts, ends = owner[order], starts[order], ends[order]
+    # An interval opens a new block when it starts after every earlier interval
+    # of the same participant has ended (touching intervals merge, as before).
+    running_end = pd.Series(ends).groupby(owner).cummax().to_numpy()
+    new_block = np.ones(len(starts), dtype=bool)
+    if len(starts) > 1:
+        same_owner = owner[1:] == owner[:-1]
+        new_block[1:] = ~same_owner | (starts[1:] > running_end[:-1])
+    block_ids = np.cumsum(new_block) - 1
+    block_starts = starts[new_block]
+    block_ends = np.full(len(block_starts), np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(block_ends, block_ids, ends)
+    return list(keys), owner[new_block], block_starts, block_ends
+
+def build_session_index(sessions_info):
+    """Sorts session windows by start, with a running max of ends for lookups."""
+    starts = np.array([s["session_start"] for s in sessions_info], dtype="datetime64[ns]").astype(np.int64)
+    ends = np.array([s["session_end"] for s in sessions_info], dtype="datetime64[ns]").astype(np.int64)
+    order = np.argsort(starts, kind="stable")
+    return {
+        "order": order,
+        "starts": starts[order],
+        "ends": ends[order],
+        "max_end": np.maximum.accumulate(ends[order]) if len(order) else ends
+    }
+
+def session_minutes(log, sessions_info):
+    """
+    Minutes each participant attended each session, as a (participants x
+    sessions) array, plus the participant keys in row order. Each merged
+    interval only visits the windows it can overlap, found by binary search
+    in the session index, so the cost grows with overlaps, not windows.
+    """
+    keys, owner, iv_starts, iv_ends = merge_log_intervals(log)
+    index = build_session_index(sessions_info)
+    attended = np.zeros((len(keys), len(sessions_info)), dtype=np.int64)
+    # Windows before `lo` all end by the interval start; windows from `hi` on
+    # start at or after the interval end.
+    lo = np.searchsorted(index["max_end"], iv_starts, side="right")
+    hi = np.searchsorted(index["starts"], iv_ends, side="left")
+    counts = np.clip(hi - lo, 0, None)
+    if counts.sum():
+        pair_iv = np.repeat(np.arange(len(iv_starts)), counts)
+        offsets = np.arange(len(pair_iv)) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_sess = lo[pair_iv] + offsets
+        overlap = (np.minimum(iv_ends[pair_iv], index["ends"][pair_sess])
+                   - np.maximum(iv_starts[pair_iv], index["starts"][pair_sess]))
+        hit = overlap > 0
+        np.add.at(attended, (owner[pair_iv[hit]], index["order"][pair_sess[hit]]), overlap[hit])
+    return keys, attended / 1e9 / 60
+
+def load_log(file_path, merge_identities=True):
+    """load_zoom_log plus identity resolution, timed as the parse and identity stages."""
+    with stage("parse"):
+        log = load_zoom_log(file_path)
+    count(rows=len(log), bytes=os.path.getsize(file_path))
+    if merge_identities:
+        with stage("identity"):
+            log = resolve_identities(log)
+    return log
+
+def process_sessions_for_file(file_path, sessions_info, merge_identities=True):
+    return process_sessions_for_log(load_log(file_path, merge_identities), sessions_info)
+
+def process_sessions_for_log(log, sessions_info):
+    with stage("sessions"):
+        sessions_info, session_labels, global_participants = evaluate_participants(log, sessions_info)
+    with stage("records"):
+        output_records, session_summary = build_attendance_records(global_participants, sessions_info, session_labels)
+    count(participants=len(output_records), sessions=len(session_labels))
+    return output_records, session_labels, session_summary
+
+def evaluate_participants(log, sessions_info):
+    """
+    Evaluates every session window against a log from load_zoom_log in one
+    pass. Windows generated from a schedule that nobody attended are dropped.
+    Returns the kept sessions, their labels and the per-participant state
+    keyed by participant key (Participant_key when resolve_identities ran,
+    else Name_lower), in sorted key order.
+    """
+    keys, minutes = session_minutes(log, sessions_info)
+    if any(session.get("generated") for session in sessions_info):
+        attended = (minutes > 0).any(axis=0)
+        keep = [i for i, session in enumerate(sessions_info) if attended[i] or not session.get("generated")]
+        sessions_info = [sessions_info[i] for i in keep]
+        minutes = minutes[:, keep]
     total_sessions = len(sessions_info)
-    session_labels = []
-    for session_index, session in enumerate(sessions_info, start=1):
-        try:
-            session_results = process_csv_session(file_path, session["session_start"], session["session_end"], session["time_required"])
-            session_global_times = get_global_times(file_path)
-        except ValueError as ve:
-            raise ValueError(str(ve))
-        for name_lower, details in session_results.items():
-            if name_lower not in session_global_times:
-                continue
-            g_join, g_leave = session_global_times[name_lower]
-            session_detail = {
-                "status": details["status"],
-                "shortfall": details["shortfall"],
-                "session_duration": details["session_duration"]
-            }
-            if name_lower not in global_participants:
-                global_participants[name_lower] = {
-                    "Name": details["Name"],
-                    "Email": details["Email"],
-                    "global_join": g_join,
-                    "global_leave": g_leave,
-                    "total_duration": details["session_duration"],
-                    "sessions": {session_index: session_detail}
-                }
+    session_labels = [f"Session {i} ({session['session_start'].strftime('%Y-%m-%d %H:%M:%S')})"
+                      for i, session in enumerate(sessions_info, start=1)]
+    global_participants = {}
+    if not total_sessions:
+        return sessions_info, session_labels, global_participants
+    key_col = participant_key_column(log)
+    named = log.dropna(subset=[key_col])
+    first_rows = named.drop_duplicates(key_col).set_index(key_col)
+    grouped = named.groupby(key_col)
+    global_join = grouped["Join Time"].min()
+    global_leave = grouped["Leave Time"].max()
+    # Rejoins often come from devices without a signed-in email
+    known_email = grouped["Email"].first()
+    raw_durations = grouped["Duration"].sum().to_dict()
+    for row, name_lower in enumerate(keys):
+        sessions = {}
+        for i in range(1, total_sessions + 1):
+            session_duration = float(minutes[row, i - 1])
+            time_required = sessions_info[i-1]["time_required"]
+            if session_duration >= time_required:
+                sessions[i] = {"status": "P", "shortfall": 0, "session_duration": session_duration}
             else:
-                curr = global_participants[name_lower]
-                curr["global_join"] = min(curr["global_join"], g_join)
-                curr["global_leave"] = max(curr["global_leave"], g_leave)
-                curr["total_duration"] += details["session_duration"]
-                curr["sessions"][session_index] = session_detail
-        session_labels.append(f"Session {session_index} ({session['session_start'].strftime('%Y-%m-%d %H:%M:%S')})")
+                sessions[i] = {"status": "A", "shortfall": round(time_required - session_duration, 2), "session_duration": session_duration}
+        global_participants[name_lower] = {
+            "Name": first_rows.at[name_lower, "Name"],
+            "Email": first_rows.at[name_lower, "Email"] if pd.notna(first_rows.at[name_lower, "Email"]) else known_email.get(name_lower),
+            "global_join": global_join[name_lower],
+            "global_leave": global_leave[name_lower],
+            "total_duration": raw_durations.get(name_lower, float(minutes[row].sum())),
+            "sessions": sessions
+        }
+    return sessions_info, session_labels, global_participants
+
+def build_attendance_records(global_participants, sessions_info, session_labels, summary_labels=None):
+    """Turns per-participant state into output rows and per-session summary lines."""
+    total_sessions = len(sessions_info)
+    summary_labels = summary_labels or [f"Session {i}" for i in range(1, total_sessions + 1)]
     for participant in global_participants.values():
         for i in range(1, total_sessions + 1):
             if i not in participant["sessions"]:
                 req = sessions_info[i-1]["time_required"]
                 participant["sessions"][i] = {"status": "A", "shortfall": req, "session_duration": 0}
-    try:
-        raw_durations = get_total_durations(file_path)
-    except Exception as e:
-        raise ValueError(str(e))
-    for name_lower, participant in global_participants.items():
-        if name_lower in raw_durations:
-            participant["total_duration"] = raw_durations[name_lower]
     output_records = []
     for participant in global_participants.values():
         record = {
@@ -196,13 +375,584 @@ def process_sessions_for_file(file_path, sessions_info):
     for i in range(1, total_sessions + 1):
         present_count = sum(1 for p in global_participants.values() if p["sessions"].get(i, {}).get("status", "A") == "P")
         absent_count = sum(1 for p in global_participants.values() if p["sessions"].get(i, {}).get("status", "A") == "A")
-        session_summary.append(f"Session {i}: Present: {present_count}, Absent: {absent_count}")
-    return output_records, session_labels, session_summary
+        session_summary.append(f"{summary_labels[i-1]}: Present: {present_count}, Absent: {absent_count}")
+    return output_records, session_summary
 
-def write_excel(raw_log_df, output_records, output_file):
+def write_excel(raw_log_df, output_records, output_file, occupancy=None):
+    """Writes the report; `occupancy` (from session_occupancy) adds an Occupancy sheet."""
     try:
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        with stage("write_excel"), pd.ExcelWriter(output_file, engine="openpyxl") as writer:
             raw_log_df.to_excel(writer, sheet_name="Sheet1", index=False, header=False)
             pd.DataFrame(output_records).to_excel(writer, sheet_name="Attendance", index=False)
+            if occupancy:
+                pd.DataFrame(occupancy_rows(occupancy)).to_excel(writer, sheet_name="Occupancy", index=False)
     except Exception as e:
-        raise ValueError(f"Error saving output Excel file: {e}")
\ No newline at end of file
+        raise ValueError(f"Error saving output Excel file: {e}")
+
+# ====================================================
+# Multi-meeting Consolidation
+# ====================================================
+
+def _fold_participant(global_participants, key, participant):
+    """Adds one file's participant to the consolidated state, keeping running totals and global join/leave."""
+    if key not in global_participants:
+        global_participants[key] = participant
+        return
+    curr = global_participants[key]
+    curr["global_join"] = min(curr["global_join"], participant["global_join"])
+    curr["global_leave"] = max(curr["global_leave"], participant["global_leave"])
+    curr["total_duration"] += participant["total_duration"]
+    curr["sessions"].update(participant["sessions"])
+
+def email_keys_by_name(log):
+    """Maps each clean name used by an email-keyed participant of the log to those emails."""
+    if "Participant_key" not in log.columns:
+        return {}
+    emailed = log[log["Email"].notna() & log["Participant_key"].notna()]
+    clean = clean_display_names(emailed["Name"].fillna(""))
+    emails = emailed["Email"].astype(str).str.strip().str.lower()
+    keyed = emailed["Participant_key"] == emails
+    names = {}
+    for name, key in zip(clean[keyed], emailed["Participant_key"][keyed]):
+        if name:
+            names.setdefault(name, set()).add(key)
+    return names
+
+def merge_meetings(meetings, merge_identities=True, loader=None):
+    """
+    Consolidates many logs into one participant x session report. meetings is
+    an iterable of (file_name, file_path, sessions_info); loader(file_path),
+    if given, replaces load_log (e.g. to read a snapshot). Each log is parsed
+    and evaluated on its own and folded into the consolidated state right
+    away, so only per-participant state is kept, never more than one log.
+
+    A participant's key is their email when the export had one, else their
+    clean name, so the same person can be keyed by email in one file and by
+    name in another. After the fold, a name key whose clean name was used
+    with exactly one email across all files is merged into that email's row,
+    the same rule resolve_identities applies within a file.
+    """
+    global_participants = {}
+    name_emails = {}
+    all_sessions = []
+    session_labels = []
+    summary_labels = []
+    for file_name, file_path, sessions_info in meetings:
+        log = loader(file_path) if loader else load_log(file_path, merge_identities)
+        with stage("sessions"):
+            kept, labels, participants = evaluate_participants(log, sessions_info)
+        with stage("merge"):
+            for name, emails in email_keys_by_name(log).items():
+                name_emails.setdefault(name, set()).update(emails)
+            offset = len(all_sessions)
+            for key, participant in participants.items():
+                sessions = {i + offset: detail for i, detail in participant["sessions"].items()}
+                _fold_participant(global_participants, key, dict(participant, sessions=sessions))
+        all_sessions.extend(kept)
+        session_labels.extend(f"{file_name} | {label}" for label in labels)
+        summary_labels.extend(f"{file_name} | Session {i}" for i in range(1, len(kept) + 1))
+    with stage("merge"):
+        for key in list(global_participants):
+            emails = name_emails.get(key, ())
+            if len(emails) == 1 and key not in emails:
+                email, = emails
+                if email in global_participants:
+                    _fold_participant(global_participants, email, global_participants.pop(key))
+        global_participants = dict(sorted(global_participants.items()))
+    with stage("records"):
+        output_records, session_summary = build_attendance_records(global_participants, all_sessions, session_labels, summary_labels)
+    count(participants=len(output_records), sessions=len(session_labels))
+    return output_records, session_labels, session_summary
+
+def write_consolidated_excel(output_records, session_summary, output_file):
+    try:
+        with stage("write_excel"), pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+            pd.DataFrame(output_records).to_excel(writer, sheet_name="Attendance", index=False)
+            pd.DataFrame({"Summary": session_summary}).to_excel(writer, sheet_name="Summary", index=False)
+    except Exception as e:
+        raise ValueError(f"Error saving output Excel file: {e}")
+
+def read_raw_log(file_path):
+    """Reads the whole log (preamble included) as untyped rows for the raw sheet."""
+    with stage("raw_log"):
+        with open_text(file_path) as f:
+            sample = f.read(1024)
+            f.seek(0)
+            dialect = csv.Sniffer().sniff(sample)
+            raw_data = list(csv.reader(f, dialect))
+        return pd.DataFrame(raw_data)
+
+# ====================================================
+# Session Config
+# ====================================================
+
+def read_session_config(file_path):
+    """
+    Reads a session config CSV with 'Session Start', 'Session End' and
+    'Time Required' columns plus an optional 'File' column. Rows that do not
+    parse are skipped; each valid row becomes a sessions_info entry with an
+    extra "file" key (None when the row applies to every file).
+    """
+    try:
+        df = pd.read_csv(file_path)
+        df.columns = df.columns.str.strip()
+    except Exception as e:
+        raise ValueError(f"Error reading session config '{file_path}': {e}")
+    for col in ["Session Start", "Session End", "Time Required"]:
+        if col not in df.columns:
+            raise ValueError(f"Session Config CSV must contain column '{col}'.")
+    has_file = "File" in df.columns
+    sessions = []
+    for _, row in df.iterrows():
+        try:
+            session_start = parse_datetime(row["Session Start"])
+            session_end = parse_datetime(row["Session End"])
+            time_required = float(row["Time Required"])
+        except Exception:
+            continue
+        file_val = row["File"] if has_file and not pd.isna(row["File"]) else None
+        sessions.append({
+            "session_start": session_start,
+            "session_end": session_end,
+            "time_required": time_required,
+            "file": file_val
+        })
+    return sessions
+
+# ====================================================
+# Recurring Schedules
+# ====================================================
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MAX_SCHEDULE_WEEKS = 104
+
+def parse_weekdays(days):
+    """Turns 'Mon/Wed', 'mon,wed' or ['Monday', 'Wed'] into sorted weekday numbers."""
+    if isinstance(days, str):
+        days = days.replace("/", ",").split(",")
+    weekdays = set()
+    for day in days:
+        key = str(day).strip().lower()[:3]
+        if not key:
+            continue
+        if key not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday: {day}")
+        weekdays.add(WEEKDAYS.index(key))
+    if not weekdays:
+        raise ValueError("Schedule must include at least one weekday.")
+    return sorted(weekdays)
+
+def expand_schedule(days, start_time, end_time, start_date, weeks, time_required):
+    """
+    Expands a rule such as "Mon/Wed 10:00-11:00 for 16 weeks, 40 minutes
+    required" into sessions_info windows, starting on start_date. The windows
+    are marked as generated so the ones nobody attended get pruned.
+    """
+    weekdays = parse_weekdays(days)
+    try:
+        start_clock = datetime.strptime(str(start_time).strip(), '%H:%M').time()
+        end_clock = datetime.strptime(str(end_time).strip(), '%H:%M').time()
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date.strip(), '%Y-%m-%d').date()
+        weeks = int(weeks)
+        time_required = float(time_required)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid schedule. Expected times as HH:MM, start date as YYYY-MM-DD and a whole number of weeks.")
+    if start_clock >= end_clock:
+        raise ValueError("Schedule start time must be before end time.")
+    if not 1 <= weeks <= MAX_SCHEDULE_WEEKS:
+        raise ValueError(f"Schedule must span between 1 and {MAX_SCHEDULE_WEEKS} weeks.")
+    sessions_info = []
+    for offset in range(weeks * 7):
+        day = start_date + timedelta(days=offset)
+        if day.weekday() in weekdays:
+            sessions_info.append({
+                "session_start": datetime.combine(day, start_clock),
+                "session_end": datetime.combine(day, end_clock),
+                "time_required": time_required,
+                "generated": True
+            })
+    return sessions_info
+
+# ====================================================
+# API Results
+# ====================================================
+
+def parse_session_list(entries):
+    """
+    Turns a JSON session list such as
+    [{"start": "2024-01-01 10:00", "end": "2024-01-01 11:00", "time_required": 40}]
+    into sessions_info windows. Times are ISO 8601; time_required defaults to 30 minutes.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("sessions must be a non-empty list.")
+    sessions_info = []
+    for i, entry in enumerate(entries, start=1):
+        try:
+            session_start = datetime.fromisoformat(str(entry["start"]).strip())
+            session_end = datetime.fromisoformat(str(entry["end"]).strip())
+            time_required = float(entry.get("time_required", 30))
+        except (TypeError, KeyError, AttributeError, ValueError):
+            raise ValueError(f"Invalid session {i}. Expected start and end as ISO datetimes and a numeric time_required.")
+        if session_start >= session_end:
+            raise ValueError(f"Session {i}: start must be before end.")
+        sessions_info.append({
+            "session_start": session_start.replace(tzinfo=None),
+            "session_end": session_end.replace(tzinfo=None),
+            "time_required": time_required
+        })
+    return sessions_info
+
+def attendance_results(log, sessions_info):
+    """
+    Evaluates the sessions against a parsed log and returns (sessions,
+    participants) as plain JSON-ready lists, skipping the report rows: each
+    participant has name, email, one status and minutes value per session.
+    """
+    with stage("sessions"):
+        sessions_info, _, global_participants = evaluate_participants(log, sessions_info)
+    with stage("results"):
+        participants = []
+        present = [0] * len(sessions_info)
+        for participant in global_participants.values():
+            statuses = []
+            minutes = []
+            for i in range(1, len(sessions_info) + 1):
+                detail = participant["sessions"][i]
+                statuses.append(detail["status"])
+                minutes.append(round(detail["session_duration"], 2))
+                if detail["status"] == "P":
+                    present[i - 1] += 1
+            participants.append({
+                "name": participant["Name"] if pd.notna(participant["Name"]) else None,
+                "email": participant["Email"] if pd.notna(participant["Email"]) else None,
+                "status": statuses,
+                "minutes": minutes
+            })
+        sessions = [{
+            "start": session["session_start"].isoformat(),
+            "end": session["session_end"].isoformat(),
+            "time_required": session["time_required"],
+            "present": present[i],
+            "absent": len(participants) - present[i]
+        } for i, session in enumerate(sessions_info)]
+    count(participants=len(participants), sessions=len(sessions))
+    return sessions, participants
+
+# ====================================================
+# Occupancy
+# ====================================================
+
+DEFAULT_OCCUPANCY_RESOLUTION = 1  # minutes between curve samples
+MAX_OCCUPANCY_RESOLUTION = 24 * 60
+DROP_OFF_FRACTION = 0.05  # of the session peak
+MAX_DROP_OFFS = 5
+
+def parse_resolution(value):
+    """Curve resolution in minutes from a form or query value; blank means the default."""
+    if value is None or str(value).strip() == "":
+        return DEFAULT_OCCUPANCY_RESOLUTION
+    try:
+        resolution = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Resolution must be a number of minutes.")
+    if not 0 < resolution <= MAX_OCCUPANCY_RESOLUTION:
+        raise ValueError(f"Resolution must be between 0 and {MAX_OCCUPANCY_RESOLUTION} minutes.")
+    return resolution
+
+def occupancy_timeline(log):
+    """
+    How many participants are in the meeting over time, as a step function:
+    (times, counts) where counts[i] holds from times[i] (int64 ns) until
+    times[i + 1]. One sweep over the sorted join (+1) and leave (-1) events
+    of the merged intervals, so each participant counts once however many
+    devices they joined from. O(n log n) for the sort, O(n) after it.
+    """
+    _, _, starts, ends = merge_log_intervals(log)
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), np.full(len(ends), -1, dtype=np.int64)])
+    order = np.argsort(times, kind="stable")
+    times, running = times[order], np.cumsum(deltas[order])
+    # Everything happening at the same instant is applied together
+    change_times, first = np.unique(times, return_index=True)
+    last = np.append(first[1:] - 1, len(times) - 1) if len(times) else first
+    return change_times, running[last]
+
+def occupancy_at(timeline, at):
+    """Participants present at each int64 ns time in `at`."""
+    times, counts = timeline
+    idx = np.searchsorted(times, at, side="right") - 1
+    return np.where(idx >= 0, counts[np.clip(idx, 0, None)] if len(counts) else 0, 0)
+
+def session_occupancy(log, sessions_info, resolution_minutes=DEFAULT_OCCUPANCY_RESOLUTION):
+    """
+    Occupancy curve, peak and drop-offs for each session window. The curve
+    samples the timeline every resolution_minutes from start until end (the
+    end itself is left out, so the meeting closing is not a drop-off); the
+    peak is exact (taken from the timeline, not the samples). A drop-off is
+    a fall of at least DROP_OFF_FRACTION of the peak between two samples;
+    the MAX_DROP_OFFS largest are kept, in time order. Generated windows
+    nobody attended are dropped, as in evaluate_participants.
+    """
+    with stage("occupancy"):
+        timeline = occupancy_timeline(log)
+        times, counts = timeline
+        step = int(resolution_minutes * 60 * 1e9)
+        results = []
+        for session in sessions_info:
+            start = np.datetime64(session["session_start"], "ns").astype(np.int64)
+            end = np.datetime64(session["session_end"], "ns").astype(np.int64)
+            lo = np.searchsorted(times, start, side="right")
+            hi = np.searchsorted(times, end, side="left")
+            window_times = np.append(start, times[lo:hi])
+            window_counts = np.append(occupancy_at(timeline, [start]), counts[lo:hi])
+            peak_idx = int(np.argmax(window_counts))
+            peak = int(window_counts[peak_idx])
+            if session.get("generated") and peak == 0:
+                continue
+            grid = np.arange(start, end, step)
+            curve = occupancy_at(timeline, grid)
+            drops = curve[:-1] - curve[1:]
+            candidates = np.flatnonzero(drops >= max(1, math.ceil(DROP_OFF_FRACTION * peak)))
+            largest = candidates[np.argsort(-drops[candidates], kind="stable")[:MAX_DROP_OFFS]]
+            results.append({
+                "start": session["session_start"],
+                "end": session["session_end"],
+                "peak": peak,
+                "peak_at": pd.Timestamp(window_times[peak_idx]).to_pydatetime(),
+                "curve": list(zip(pd.to_datetime(grid).to_pydatetime(), curve.tolist())),
+                "drop_offs": [{
+                    "at": pd.Timestamp(grid[i + 1]).to_pydatetime(),
+                    "from": int(curve[i]),
+                    "to": int(curve[i + 1])
+                } for i in np.sort(largest)]
+            })
+    return results
+
+def occupancy_rows(occupancy):
+    """Occupancy sheet rows: one per curve sample, with the peak and drop-offs noted."""
+    rows = []
+    for i, session in enumerate(occupancy, start=1):
+        label = f"Session {i} ({session['start'].strftime('%Y-%m-%d %H:%M:%S')})"
+        drops = {drop["at"]: drop for drop in session["drop_offs"]}
+        rows.append({"Session": label, "Time": session["peak_at"].strftime('%Y-%m-%d %H:%M:%S'),
+                     "In Meeting": session["peak"], "Note": "Peak"})
+        for sample_time, present in session["curve"]:
+            drop = drops.get(sample_time)
+            rows.append({
+                "Session": label,
+                "Time": sample_time.strftime('%Y-%m-%d %H:%M:%S'),
+                "In Meeting": present,
+                "Note": f"Drop-off: {drop['from'] - drop['to']} left" if drop else ""
+            })
+    return rows
+
+def occupancy_results(occupancy):
+    """session_occupancy output as JSON-ready dicts with ISO times."""
+    return [{
+        "start": session["start"].isoformat(),
+        "end": session["end"].isoformat(),
+        "peak": session["peak"],
+        "peak_at": session["peak_at"].isoformat(),
+        "drop_offs": [{"at": drop["at"].isoformat(), "from": drop["from"], "to": drop["to"]}
+                      for drop in session["drop_offs"]],
+        "curve": [[sample_time.isoformat(), present] for sample_time, present in session["curve"]]
+    } for session in occupancy]
+
+# ====================================================
+# Log Preview
+# ====================================================
+
+ARRIVAL_WINDOW_MINUTES = 10
+SURGE_FRACTION = 0.35  # of the way from typical to busiest arrival rate
+ARRIVAL_QUANTILE = 0.4  # most people arrive in the few minutes around the start
+END_OCCUPANCY_FRACTION = 0.5  # of the session's peak
+MIN_PROPOSED_SESSION_MINUTES = 15
+MAX_PROPOSED_SESSIONS = 50
+PROPOSAL_ROUNDING_MINUTES = 5
+
+def read_meeting_info(file_path):
+    """The meeting preamble skipped by load_zoom_log (Topic, Start Time, ...) as a dict; {} if there is none."""
+    with open_text(file_path) as f:
+        rows = list(csv.reader(line for _, line in zip(range(2), f)))
+    if len(rows) < 2 or len(rows[0]) != len(rows[1]) or "Join Time" in [c.strip() for c in rows[0]]:
+        return {}
+    return {header.strip(): value.strip() for header, value in zip(rows[0], rows[1]) if header.strip()}
+
+def _round_ns(value, minutes, direction=0):
+    step = minutes * 60 * 10**9
+    if direction < 0:
+        return value // step * step
+    return (value + step // 2) // step * step
+
+def propose_sessions(log):
+    """
+    Suggested session windows for a log. A class starts with a surge of
+    arrivals (merged intervals starting, so rejoins from a second device do
+    not count): minutes where the arrivals over the last
+    ARRIVAL_WINDOW_MINUTES stand out from the log's typical rate form
+    clusters, and each cluster's ARRIVAL_QUANTILE arrival time, rounded to
+    PROPOSAL_ROUNDING_MINUTES, is a session start. The session ends when
+    occupancy last drops below END_OCCUPANCY_FRACTION of its peak before the
+    next start. Returns sessions_info-style dicts, earliest first.
+    """
+    _, _, starts, _ = merge_log_intervals(log)
+    starts = np.sort(starts)
+    if not len(starts):
+        return []
+    minute = 60 * 10**9
+    origin = starts[0]
+    arrivals = np.bincount((starts - origin) // minute)
+    rolling = np.convolve(arrivals, np.ones(ARRIVAL_WINDOW_MINUTES, dtype=np.int64))[:len(arrivals)]
+    baseline = float(np.median(rolling[rolling > 0]))
+    surge = rolling >= max(3, baseline + SURGE_FRACTION * (rolling.max() - baseline))
+    edges = np.diff(np.concatenate([[0], surge.astype(np.int8), [0]]))
+    clusters = []
+    # A surge at minute i counts the arrivals of minutes i - window + 1 .. i
+    for first, last in zip(np.flatnonzero(edges == 1) - ARRIVAL_WINDOW_MINUTES + 1, np.flatnonzero(edges == -1)):
+        first = max(int(first), 0)
+        if clusters and first - clusters[-1][0] < MIN_PROPOSED_SESSION_MINUTES:
+            clusters[-1][1] = int(last)
+        else:
+            clusters.append([first, int(last)])
+    session_starts = []
+    for first, last in clusters[:MAX_PROPOSED_SESSIONS]:
+        lo, hi = np.searchsorted(starts, [origin + first * minute, origin + last * minute])
+        start = _round_ns(int(np.quantile(starts[lo:hi], ARRIVAL_QUANTILE)), PROPOSAL_ROUNDING_MINUTES)
+        if not session_starts or start - session_starts[-1] >= MIN_PROPOSED_SESSION_MINUTES * minute:
+            session_starts.append(start)
+
+    times, counts = occupancy_timeline(log)
+    proposed = []
+    for i, start in enumerate(session_starts):
+        limit = session_starts[i + 1] if i + 1 < len(session_starts) else times[-1]
+        lo = max(np.searchsorted(times, start, side="right") - 1, 0)
+        hi = np.searchsorted(times, limit, side="left")
+        window = counts[lo:hi]
+        if not len(window) or window.max() == 0:
+            continue
+        busy = np.flatnonzero(window >= END_OCCUPANCY_FRACTION * window.max())
+        end = times[lo + busy[-1] + 1] if lo + busy[-1] + 1 < len(times) else limit
+        end = min(_round_ns(int(end), PROPOSAL_ROUNDING_MINUTES), int(limit))
+        if end - start < MIN_PROPOSED_SESSION_MINUTES * minute:
+            continue
+        proposed.append({
+            "session_start": pd.Timestamp(start).to_pydatetime(),
+            "session_end": pd.Timestamp(end).to_pydatetime(),
+            "time_required": float(min(30, _round_ns(end - start, 1, -1) // minute // 2))
+        })
+    return proposed
+
+def log_preview(file_path, log):
+    """
+    What the session form shows about a freshly uploaded log: the meeting
+    preamble, row and participant counts, the first join and last leave,
+    and propose_sessions' windows (times as "YYYY-MM-DDTHH:MM").
+    """
+    key_col = participant_key_column(log)
+    joins = log["Join Time"].dropna()
+    leaves = log["Leave Time"].dropna()
+    return {
+        "meeting": read_meeting_info(file_path),
+        "rows": len(log),
+        "participants": int(log[key_col].nunique()),
+        "first_join": joins.min().strftime('%Y-%m-%d %H:%M') if len(joins) else None,
+        "last_leave": leaves.max().strftime('%Y-%m-%d %H:%M') if len(leaves) else None,
+        "sessions": [{
+            "start": session["session_start"].strftime('%Y-%m-%dT%H:%M'),
+            "end": session["session_end"].strftime('%Y-%m-%dT%H:%M'),
+            "time_required": session["time_required"]
+        } for session in propose_sessions(log)]
+    }
+
+# ====================================================
+# Name Matching
+# ====================================================
+
+def match_names_v4(main_name, zoom_names):
+    valid_zoom_names = [name for name in zoom_names if isinstance(name, str)]
+    if main_name in valid_zoom_names:
+        return main_name
+    main_parts = main_name.lower().split()
+    for zoom_name in valid_zoom_names:
+        zoom_parts = zoom_name.lower().split()
+        if len(main_parts) >= 2:
+            if main_parts[0] in zoom_parts and main_parts[-1] in zoom_parts:
+                return zoom_name
+        if len(main_parts) == 1 and main_parts[0] in zoom_parts:
+            return zoom_name
+    return None
+
+def build_zoom_name_index(zoom_names):
+    """
+    Builds the lookup structures used by match_names_indexed, once per file:
+    the first row position of every name, and a lower-cased token -> sorted
+    row positions inverted index over the string names.
+    """
+    positions = {}
+    tokens = {}
+    for pos, name in enumerate(zoom_names):
+        if pd.isna(name):
+            continue
+        positions.setdefault(name, pos)
+        if not isinstance(name, str):
+            continue
+        for token in set(name.lower().split()):
+            tokens.setdefault(token, []).append(pos)
+    return {"names": list(zoom_names), "positions": positions, "tokens": tokens}
+
+def match_names_indexed(main_name, index):
+    """Same result as match_names_v4(main_name, zoom_names) using a prebuilt index."""
+    if isinstance(main_name, str) and main_name in index["positions"]:
+        return main_name
+    main_parts = main_name.lower().split()
+    if not main_parts:
+        return None
+    first_hits = index["tokens"].get(main_parts[0])
+    if not first_hits:
+        return None
+    if len(main_parts) == 1:
+        return index["names"][first_hits[0]]
+    last_hits = index["tokens"].get(main_parts[-1])
+    if not last_hits:
+        return None
+    # Postings are in row order, so the first common position is the earliest
+    # zoom name containing both tokens -- the one the linear scan would return.
+    shorter, longer = (first_hits, last_hits) if len(first_hits) <= len(last_hits) else (last_hits, first_hits)
+    longer = set(longer)
+    for pos in shorter:
+        if pos in longer:
+            return index["names"][pos]
+    return None
+
+def process_file_match(input_path, output_path):
+    with stage("read_excel"):
+        df = pd.read_excel(input_path)
+        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    with stage("match"):
+        main_list = df.iloc[:, 1]
+        zoom_log_names = df.iloc[:, 2]
+        arranged_data_v4 = df.iloc[:, :2].copy()
+        for col in df.columns[2:]:
+            arranged_data_v4[col] = 'N/A'
+        name_index = build_zoom_name_index(zoom_log_names)
+        row_of_name = name_index["positions"]
+        target_rows = []
+        source_rows = []
+        for index, main_name in enumerate(main_list):
+            if pd.isna(main_name):
+                continue
+            matched_name = match_names_indexed(main_name, name_index)
+            if matched_name:
+                target_rows.append(index)
+                source_rows.append(row_of_name[matched_name])
+        if target_rows:
+            arranged_data_v4.iloc[target_rows, 2:] = df.iloc[source_rows, 2:].to_numpy()
+        matched_names = set(arranged_data_v4.iloc[:, 2])
+        unmatched_rows = [row_of_name[zoom_name] for zoom_name in zoom_log_names
+                          if not pd.isna(zoom_name) and zoom_name not in matched_names]
+        unmatched_df = df.iloc[unmatched_rows] if unmatched_rows else pd.DataFrame()
+    with stage("write_excel"), pd.ExcelWriter(output_path) as writer:
+        arranged_data_v4.to_excel(writer, index=False, sheet_name="Matched Records")
+        unmatched_df.to_excel(writer, index=False, sheet_name="Unmatched Records")
+    return {"matched": len(target_rows), "unmatched": len(unmatched_rows)}
@@ -0,0 +1,122 @@
+"""
+Times the attendance pipeline stages on synthetic Zoom exports.
+
+For every combination of the given parameters a log is generated and run
+through process_sessions_for_file, session_occupancy, write_excel,
+extract_raw_from_excel and match_and_write. Wall time and tracemalloc peak are recorded per stage and
+written as JSON, tagged with the current git commit, so runs can be compared:
+
+    python benchmarks/run_benchmarks.py --participants 100 1000 5000 --sessions 2 8 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from itertools import product
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_logs import generate_zoom_log, generate_master_list
+from attendance_processing import process_sessions_for_file, load_log, session_occupancy, write_excel, read_raw_log
+from comprehensive_app import extract_raw_from_excel, match_and_write
+
+def measure(func, *args, **kwargs):
+    """Runs func once; returns its result, wall seconds and tracemalloc peak in bytes."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def run_case(work_dir, participants, rejoins, sessions, noise, repeat, seed):
+    case = f"p{participants}_r{rejoins}_s{sessions}_n{noise}"
+    log_path = os.path.join(work_dir, case + ".csv")
+    sessions_info = generate_zoom_log(log_path, participants, rejoins, sessions, noise, seed=seed)
+    master_path = generate_master_list(os.path.join(work_dir, case + "_master.xlsx"), participants, noise, seed=seed)
+    processed_path = os.path.join(work_dir, case + "_processed.xlsx")
+    raw_path = os.path.join(work_dir, case + "-RAW.xlsx")
+
+    stages = {}
+    def record(stage, elapsed, peak):
+        entry = stages.setdefault(stage, {"seconds": [], "peak_bytes": []})
+        entry["seconds"].append(round(elapsed, 4))
+        entry["peak_bytes"].append(peak)
+
+    rows = None
+    for _ in range(repeat):
+        (output_records, _, _), elapsed, peak = measure(process_sessions_for_file, log_path, sessions_info)
+        record("process_sessions_for_file", elapsed, peak)
+        occupancy, elapsed, peak = measure(session_occupancy, load_log(log_path), sessions_info)
+        record("session_occupancy", elapsed, peak)
+        raw_log_df = read_raw_log(log_path)
+        rows = len(raw_log_df)
+        _, elapsed, peak = measure(write_excel, raw_log_df, output_records, processed_path, occupancy)
+        record("write_excel", elapsed, peak)
+        raw_df, elapsed, peak = measure(extract_raw_from_excel, processed_path)
+        record("extract_raw_from_excel", elapsed, peak)
+        raw_df.to_excel(raw_path, index=False)
+        _, elapsed, peak = measure(match_and_write, master_path, raw_path)
+        record("match_and_write", elapsed, peak)
+
+    for entry in stages.values():
+        entry["best_seconds"] = min(entry["seconds"])
+        entry["max_peak_bytes"] = max(entry["peak_bytes"])
+    return {
+        "case": case,
+        "params": {"participants": participants, "rejoins": rejoins, "sessions": sessions, "name_noise": noise, "seed": seed},
+        "log_rows": rows,
+        "log_bytes": os.path.getsize(log_path),
+        "stages": stages
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the attendance pipeline on synthetic Zoom logs.")
+    parser.add_argument("--participants", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--rejoins", type=int, nargs="+", default=[2])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[2])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; best time and max peak are reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    cases = []
+    with tempfile.TemporaryDirectory(prefix="attendancify-bench-") as work_dir:
+        for participants, rejoins, sessions, noise in product(args.participants, args.rejoins, args.sessions, args.noise):
+            result = run_case(work_dir, participants, rejoins, sessions, noise, args.repeat, args.seed)
+            cases.append(result)
+            timings = ", ".join(f"{stage} {entry['best_seconds']:.3f}s/{entry['max_peak_bytes'] / 2**20:.1f}MiB"
+                                for stage, entry in result["stages"].items())
+            print(f"{result['case']} ({result['log_rows']} rows): {timings}")
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": cases
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measures how long the app takes to import, and which modules that time goes to.
+
+Each run imports the target in a fresh interpreter with `-X importtime`, then
+times lazy_imports.preload(), i.e. the pandas/numpy/rapidfuzz/openpyxl cost
+that is deferred to the first processing request (or paid once by the
+gunicorn master when preloading):
+
+    python benchmarks/startup_imports.py --target comprehensive_app --repeat 5 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {target}
+imported = time.perf_counter()
+heavy_loaded = sorted(name for name in ("numpy", "pandas", "rapidfuzz", "openpyxl") if name in sys.modules)
+from lazy_imports import preload
+preload()
+print(json.dumps({{"import_seconds": imported - start, "preload_seconds": time.perf_counter() - imported,
+                  "heavy_loaded_at_import": heavy_loaded}}))
+"""
+
+def parse_importtime(stderr, target):
+    """Returns {module: (self_us, cumulative_us)} for the import phase only (before preload)."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+        if name.strip() == target:
+            break
+    return modules
+
+def run_once(target, work_dir):
+    env = dict(os.environ,
+               ATTENDANCIFY_USER_DB=os.path.join(work_dir, "users.db"),
+               ATTENDANCIFY_ARTIFACT_DIR=os.path.join(work_dir, "artifacts"),
+               ATTENDANCIFY_REAPER_INTERVAL="0")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(root=ROOT, target=target)],
+                            capture_output=True, text=True, env=env, cwd=ROOT, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["modules"] = parse_importtime(result.stderr, target)
+    return timings
+
+def package_totals(modules):
+    """Self time summed per top-level package."""
+    totals = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app import time per module.")
+    parser.add_argument("--target", default="comprehensive_app", help="Module to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="attendancify-startup-") as work_dir:
+        runs = [run_once(args.target, work_dir) for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["import_seconds"])
+    packages = sorted(package_totals(best["modules"]).items(), key=lambda item: -item[1])[:args.top]
+
+    print(f"import {args.target}: {best['import_seconds'] * 1000:.0f} ms "
+          f"(heavy modules loaded at import: {', '.join(best['heavy_loaded_at_import']) or 'none'})")
+    print(f"deferred heavy imports (first processing request / preload): {min(run['preload_seconds'] for run in runs) * 1000:.0f} ms")
+    print("self time per package during import:")
+    for package, self_us in packages:
+        print(f"  {package:<28} {self_us / 1000:8.1f} ms")
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.target,
+            "repeat": args.repeat,
+            "import_seconds": [round(run["import_seconds"], 4) for run in runs],
+            "preload_seconds": [round(run["preload_seconds"], 4) for run in runs],
+            "heavy_loaded_at_import": best["heavy_loaded_at_import"],
+            "package_self_ms": {package: round(self_us / 1000, 2) for package, self_us in packages},
+            "modules": {name: {"self_us": s, "cumulative_us": c} for name, (s, c) in best["modules"].items()}
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Synthetic Zoom participant exports for benchmarking.
+
+Files use the same layout as real exports: a meeting preamble (header row,
+values row, blank line) that the engine skips with skiprows=3, then the
+participant table.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+FIRST_NAMES = ["Aarav", "Priya", "John", "Maria", "Wei", "Fatima", "Carlos", "Aisha", "Liam", "Sofia",
+               "Rahul", "Emma", "Kenji", "Olivia", "Amit", "Chloe", "Diego", "Hannah", "Ivan", "Zara"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Chen", "Khan", "Lopez", "Okafor", "Brown", "Kumar", "Silva",
+              "Nguyen", "Patel", "Müller", "Rossi", "Tanaka", "Kim", "Singh", "Novak", "Haddad", "Costa"]
+DEVICE_TAGS = [" (iPhone)", " (Android)", "'s iPad", " (Guest)"]
+
+def participant_names(count, seed=0):
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        names.append(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}")
+    return names
+
+def noisy_name(name, rng):
+    """One display-name variant: device tag, case change, dropped letter or extra spaces."""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return name + rng.choice(DEVICE_TAGS)
+    if kind == 1:
+        return name.upper() if rng.random() < 0.5 else name.lower()
+    if kind == 2 and len(name) > 4:
+        cut = rng.randrange(1, len(name) - 1)
+        return name[:cut] + name[cut + 1:]
+    return name.replace(" ", "  ")
+
+def generate_zoom_log(path, participants=100, rejoins=2, sessions=2, name_noise=0.0,
+                      session_minutes=60, break_minutes=15, start=datetime(2024, 1, 8, 9, 0), seed=0):
+    """
+    Writes a synthetic export to path and returns the matching sessions_info.
+    Each participant joins up to `rejoins` + 1 times per session; with
+    probability `name_noise` a rejoin uses a noisy variant of their name.
+    """
+    rng = random.Random(seed)
+    sessions_info = []
+    for s in range(sessions):
+        session_start = start + timedelta(minutes=s * (session_minutes + break_minutes))
+        sessions_info.append({
+            "session_start": session_start,
+            "session_end": session_start + timedelta(minutes=session_minutes),
+            "time_required": round(session_minutes * 0.6, 1)
+        })
+    names = participant_names(participants, seed)
+    rows = []
+    for i, name in enumerate(names):
+        email = f"user{i}@example.edu"
+        for session in sessions_info:
+            if rng.random() < 0.1:
+                continue
+            t = session["session_start"] + timedelta(minutes=rng.randint(-5, 10))
+            for _ in range(rng.randint(1, rejoins + 1)):
+                stay = timedelta(minutes=rng.randint(3, session_minutes), seconds=rng.randint(0, 59))
+                display = noisy_name(name, rng) if rng.random() < name_noise else name
+                rows.append((display, email, t, t + stay))
+                t += stay + timedelta(minutes=rng.randint(0, 5))
+    rows.sort(key=lambda row: row[2])
+    meeting_start = sessions_info[0]["session_start"]
+    meeting_end = max(row[3] for row in rows) if rows else meeting_start
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Meeting ID,Topic,Start Time,End Time,User Email,Duration (minutes),Participants\n")
+        f.write(f"81234567890,Synthetic Class,{meeting_start:%Y-%m-%d %H:%M:%S},{meeting_end:%Y-%m-%d %H:%M:%S},"
+                f"host@example.edu,{int((meeting_end - meeting_start).total_seconds() // 60)},{participants}\n")
+        f.write("\n")
+        f.write("Name (Original Name),User Email,Join Time,Leave Time,Duration (minutes),Guest,In Waiting Room\n")
+        for display, email, join, leave in rows:
+            duration = max(1, int(round((leave - join).total_seconds() / 60)))
+            f.write(f"\"{display}\",{email},{join:%Y-%m-%d %H:%M:%S},{leave:%Y-%m-%d %H:%M:%S},{duration},No,No\n")
+    return sessions_info
+
+def generate_master_list(path, participants=100, name_noise=0.0, seed=0):
+    """Writes a roster (Email, Participant Name) for the matching stage."""
+    rng = random.Random(seed + 1)
+    names = participant_names(participants, seed)
+    pd.DataFrame({
+        "Email": [f"user{i}@example.edu" for i in range(participants)],
+        "Participant Name": [noisy_name(name, rng) if rng.random() < name_noise else name for name in names]
+    }).to_excel(path, index=False)
+    return path
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic Zoom participant export.")
+    parser.add_argument("output")
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--rejoins", type=int, default=2)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_zoom_log(args.output, args.participants, args.rejoins, args.sessions, args.noise, seed=args.seed)
+    print(f"Wrote {os.path.abspath(args.output)}")
@@ -0,0 +1,185 @@
+"""
+Resumable chunked uploads.
+
+A client creates an upload with the file's name and size (and optionally
+its SHA-256), PUTs the numbered chunks with a SHA-256 each, in any order
+and from any worker, then finalizes it. After a dropped connection it asks
+which chunks are missing and sends only those.
+
+Every verified chunk is renamed into place in the upload's directory, so a
+failed or repeated PUT never corrupts a chunk already received. Finalizing
+streams the chunks into the artifact store, hashing the whole file on the
+way; nothing is held in memory. The finished upload keeps only its
+metadata, which maps the upload id to the stored artifact.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import secrets
+import tempfile
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+_ID_LENGTH = 32
+
+class UploadNotFound(KeyError):
+    pass
+
+class UploadError(ValueError):
+    pass
+
+def _write_json(path, data):
+    fd, staging = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(staging, path)
+
+class UploadStore:
+    def __init__(self, root, artifact_store, chunk_size=DEFAULT_CHUNK_SIZE, max_size=None):
+        self.root = root
+        self.artifacts = artifact_store
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, upload_id):
+        if not isinstance(upload_id, str) or len(upload_id) != _ID_LENGTH or not upload_id.isalnum():
+            raise UploadNotFound(upload_id)
+        return os.path.join(self.root, upload_id)
+
+    def _meta(self, upload_id, owner):
+        try:
+            with open(os.path.join(self._dir(upload_id), "meta.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            raise UploadNotFound(upload_id)
+        if meta["owner"] != owner:
+            raise UploadNotFound(upload_id)
+        return meta
+
+    def _received(self, upload_id):
+        chunks_dir = os.path.join(self._dir(upload_id), "chunks")
+        try:
+            return sorted(int(name) for name in os.listdir(chunks_dir) if name.isdigit())
+        except FileNotFoundError:
+            return []
+
+    def create(self, owner, filename, size, sha256=None):
+        """Starts an upload; returns its status (see status())."""
+        if not filename:
+            raise UploadError("filename is required.")
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            raise UploadError("size must be a whole number of bytes.")
+        if size <= 0:
+            raise UploadError("size must be positive.")
+        if self.max_size and size > self.max_size:
+            raise UploadError(f"File is larger than the {self.max_size // (1024 * 1024)} MB upload limit.")
+        if sha256 is not None and (len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256)):
+            raise UploadError("sha256 must be 64 lowercase hex digits.")
+        upload_id = secrets.token_hex(_ID_LENGTH // 2)
+        upload_dir = self._dir(upload_id)
+        os.makedirs(os.path.join(upload_dir, "chunks"))
+        meta = {
+            "id": upload_id,
+            "owner": owner,
+            "filename": filename,
+            "size": size,
+            "sha256": sha256,
+            "chunk_size": self.chunk_size,
+            "chunks": -(-size // self.chunk_size),
+            "created_at": time.time(),
+            "artifact_id": None
+        }
+        _write_json(os.path.join(upload_dir, "meta.json"), meta)
+        return self.status(upload_id, owner)
+
+    def status(self, upload_id, owner):
+        """Upload metadata plus the chunk numbers still missing."""
+        meta = self._meta(upload_id, owner)
+        received = set(self._received(upload_id))
+        missing = [] if meta["artifact_id"] else [i for i in range(meta["chunks"]) if i not in received]
+        return dict(meta, missing=missing)
+
+    def write_chunk(self, upload_id, owner, index, stream, sha256):
+        """
+        Reads chunk `index` from the stream and keeps it if its length and
+        SHA-256 match; a chunk that was already received is replaced.
+        """
+        meta = self._meta(upload_id, owner)
+        if meta["artifact_id"]:
+            raise UploadError("Upload is already finalized.")
+        if not 0 <= index < meta["chunks"]:
+            raise UploadError(f"Chunk number must be between 0 and {meta['chunks'] - 1}.")
+        expected = min(meta["chunk_size"], meta["size"] - index * meta["chunk_size"])
+        chunks_dir = os.path.join(self._dir(upload_id), "chunks")
+        digest = hashlib.sha256()
+        written = 0
+        fd, staging = tempfile.mkstemp(dir=chunks_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while written <= expected:
+                    block = stream.read(min(READ_SIZE, expected + 1 - written))
+                    if not block:
+                        break
+                    digest.update(block)
+                    out.write(block)
+                    written += len(block)
+            if written != expected:
+                raise UploadError(f"Chunk {index} should be exactly {expected} bytes.")
+            if digest.hexdigest() != (sha256 or "").lower():
+                raise UploadError(f"Chunk {index} does not match its SHA-256.")
+            os.replace(staging, os.path.join(chunks_dir, str(index)))
+        except BaseException:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+        return expected
+
+    def finalize(self, upload_id, owner):
+        """Assembles the chunks into an artifact; returns the artifact id. Finalizing twice is harmless."""
+        meta = self._meta(upload_id, owner)
+        if meta["artifact_id"] and self.artifacts.exists(meta["artifact_id"]):
+            return meta["artifact_id"]
+        missing = self.status(upload_id, owner)["missing"]
+        if missing:
+            raise UploadError(f"{len(missing)} chunk(s) missing, starting with chunk {missing[0]}.")
+        chunks_dir = os.path.join(self._dir(upload_id), "chunks")
+        artifact_id = self.artifacts.put_parts([os.path.join(chunks_dir, str(i)) for i in range(meta["chunks"])])
+        if meta["sha256"] and artifact_id != meta["sha256"]:
+            # The stored object is unreferenced and expires with the reaper's TTL
+            raise UploadError("Assembled file does not match its SHA-256; please upload it again.")
+        meta["artifact_id"] = artifact_id
+        _write_json(os.path.join(self._dir(upload_id), "meta.json"), meta)
+        shutil.rmtree(chunks_dir, ignore_errors=True)
+        return artifact_id
+
+    def finalized(self, upload_id, owner):
+        """(artifact id, filename) of a finalized upload; raises UploadNotFound otherwise."""
+        meta = self._meta(upload_id, owner)
+        if not meta["artifact_id"]:
+            raise UploadNotFound(upload_id)
+        return meta["artifact_id"], meta["filename"]
+
+    def reap(self, ttl_seconds):
+        """Removes uploads started more than ttl_seconds ago; returns (count, bytes)."""
+        now = time.time()
+        removed = 0
+        reclaimed = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                if now - entry.stat().st_mtime <= ttl_seconds:
+                    continue
+                size = sum(os.path.getsize(os.path.join(dirpath, name))
+                           for dirpath, _, names in os.walk(entry.path) for name in names)
+            except OSError:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed
@@ -1,21 +1,51 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, session, jsonify
+from __future__ import annotations
+
+from flask import Flask, render_template, request, redirect, url_for, send_file, flash, session, jsonify, g, Response, abort, make_response
 import os
-import pandas as pd
+import gzip
+import mimetypes
+from functools import wraps
+import json
+import logging
 from datetime import datetime, timedelta
 import io
 import tempfile
 import csv
 import re
 import zipfile
+import shutil
 import hashlib
 import secrets
-from rapidfuzz import fuzz
+import zlib
+import time
 from werkzeug.utils import secure_filename
 
 # Import the core processing functions from the new module
 from attendance_processing import (
-    process_sessions_for_file, parse_datetime, write_excel
+    load_log, process_sessions_for_log, parse_datetime, write_excel, expand_schedule,
+    merge_meetings, write_consolidated_excel, read_raw_log,
+    parse_session_list, attendance_results,
+    parse_resolution, session_occupancy, occupancy_results, log_preview
+)
+from instrumentation import stage, count, start_timings, stop_timings
+import metrics
+from user_store import UserStore
+from artifact_store import LocalArtifactStore, ArtifactNotFound
+from workspaces import create_workspace, remove_workspace, Reaper
+from chunked_uploads import UploadStore, UploadNotFound, UploadError
+from live_attendance import LiveStore, MeetingNotFound
+from log_snapshots import SnapshotStore
+from static_assets import AssetManifest
+from compressed_logs import csv_compression, display_name, is_zip_upload, split_zip, expanded_size
+from admission import (
+    AdmissionController, Overloaded, log_job_cost, workbook_job_cost, matching_job_cost, default_memory_budget
 )
+from lazy_imports import lazy_module
+
+# Heavy modules are imported by the first route that needs them
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+fuzz = lazy_module("rapidfuzz.fuzz")
 
 app = Flask(__name__, static_url_path='/static', static_folder='static')
 app.secret_key = 'your_secret_key_here'  # Change this in production
@@ -28,21 +58,268 @@ def inject_remaining_time():
 # Directory for temporary files
 TEMP_DIR = tempfile.gettempdir()
 
+# ----------- Static Assets and Compression -----------
+# Static files are hashed and gzipped once at startup; templates link them with
+# asset_url(), whose ?v=<hash> URLs can be cached by browsers for a year
+assets = AssetManifest(app.static_folder, os.path.join(TEMP_DIR, 'attendancify-static')).build()
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json')
+MIN_GZIP_BYTES = 1024
+
+@app.template_global()
+def asset_url(filename):
+    asset = assets.lookup(filename)
+    if asset is None:
+        return url_for('static', filename=filename)
+    return url_for('static', filename=filename, v=asset.digest)
+
+def accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+def serve_static(filename):
+    asset = assets.lookup(filename)
+    if asset is None:
+        return app.send_static_file(filename)
+    use_gzip = asset.gzip_path is not None and accepts_gzip()
+    response = send_file(
+        asset.gzip_path if use_gzip else asset.path,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        etag=asset.digest + ('-gz' if use_gzip else ''),
+        conditional=True
+    )
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    if asset.gzip_path is not None:
+        response.vary.add('Accept-Encoding')
+    if request.args.get('v') == asset.digest:
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+app.view_functions['static'] = serve_static
+
+@app.after_request
+def compress_response(response):
+    # HTML pages and JSON responses only; files (send_file) are streamed untouched
+    if (response.direct_passthrough or response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_GZIP_BYTES or not accepts_gzip():
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6, mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    if response.headers.get('ETag') and not response.headers['ETag'].startswith('W/'):
+        response.headers['ETag'] = 'W/' + response.headers['ETag']
+    return response
+
+# Rendered HTML of public pages for anonymous visitors, per endpoint
+_public_page_cache = {}
+
+def cacheable_public_page(f):
+    """
+    Serves a public page to anonymous visitors from a per-process cache of its
+    rendered HTML, with an ETag so repeat visits get a 304. Logged-in users and
+    requests with pending flash messages are rendered as usual.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' in session or session.get('_flashes') or app.debug:
+            return f(*args, **kwargs)
+        cached = _public_page_cache.get(request.endpoint)
+        if cached is None:
+            body = f(*args, **kwargs)
+            cached = (body, hashlib.sha256(body.encode()).hexdigest()[:32])
+            _public_page_cache[request.endpoint] = cached
+        response = make_response(cached[0])
+        response.set_etag(cached[1], weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return decorated_function
+
+# Uploads and reports are kept in a content-addressed artifact store; the session
+# only holds artifact ids, so any worker (or node sharing the directory) can serve them
+ARTIFACT_DIR = os.environ.get('ATTENDANCIFY_ARTIFACT_DIR', os.path.join(TEMP_DIR, 'attendancify-artifacts'))
+artifacts = LocalArtifactStore(ARTIFACT_DIR)
+
+# Each request that writes files gets its own scratch directory, removed when it ends
+WORKSPACE_DIR = os.path.join(TEMP_DIR, 'attendancify-jobs')
+
+# Resumable chunked uploads live next to the artifacts they become, so any worker
+# can take any chunk; they are not bound by MAX_CONTENT_LENGTH
+app.config['MAX_UPLOAD_MB'] = int(os.environ.get('ATTENDANCIFY_MAX_UPLOAD_MB', 1024))
+uploads = UploadStore(os.path.join(ARTIFACT_DIR, 'uploads'), artifacts, max_size=app.config['MAX_UPLOAD_MB'] * 1024 * 1024)
+
+# Live meetings fed by join/leave events (see the JSON API routes)
+live_meetings = LiveStore(os.path.join(ARTIFACT_DIR, 'live'))
+# Parsed logs of attendance uploads, reused each time the sessions are reconfigured
+snapshots = SnapshotStore(os.path.join(ARTIFACT_DIR, 'snapshots'))
+
+# Background reaper: expires artifacts not used for ARTIFACT_TTL_HOURS, evicts the least
+# recently downloaded beyond ARTIFACT_QUOTA_MB and removes workspaces of crashed jobs
+app.config['REAPER_INTERVAL'] = int(os.environ.get('ATTENDANCIFY_REAPER_INTERVAL', 600))  # seconds, 0 disables
+app.config['ARTIFACT_TTL_HOURS'] = float(os.environ.get('ATTENDANCIFY_ARTIFACT_TTL_HOURS', 24))
+app.config['ARTIFACT_QUOTA_MB'] = float(os.environ.get('ATTENDANCIFY_ARTIFACT_QUOTA_MB', 2048))
+WORKSPACE_TTL_SECONDS = 6 * 3600
+reaper_logger = logging.getLogger('attendancify.reaper')
+if not reaper_logger.handlers:
+    reaper_logger.addHandler(logging.StreamHandler())
+    reaper_logger.setLevel(logging.INFO)
+_reaper_pid = None
+
+@app.before_request
+def start_reaper():
+    # Started per process on its first request, so it also runs in forked gunicorn workers
+    global _reaper_pid
+    if app.config['REAPER_INTERVAL'] > 0 and _reaper_pid != os.getpid():
+        _reaper_pid = os.getpid()
+        Reaper(
+            artifacts, WORKSPACE_DIR,
+            interval=app.config['REAPER_INTERVAL'],
+            artifact_ttl=app.config['ARTIFACT_TTL_HOURS'] * 3600,
+            quota_bytes=app.config['ARTIFACT_QUOTA_MB'] * 1024 * 1024,
+            workspace_ttl=WORKSPACE_TTL_SECONDS,
+            expiring={'uploads': uploads, 'live_meetings': live_meetings, 'snapshots': snapshots}
+        ).start()
+
 # Configure upload settings
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
 
-# In-memory user storage (in production, use a database)
-users = {
-    'superadmin@attendancify.com': {
-        'password_hash': hashlib.sha256('admin'.encode()).hexdigest(),
-        'role': 'superadmin',
-        'created_at': datetime.now(),
-        'expires_at': None,  # Permanent account
-        'must_change_password': True,  # Force password change on first login
-        'password_plain': 'admin'  # Store plain password for superadmin viewing (as requested)
-    }
+# Per-stage request timing (Server-Timing header + one log line per request)
+app.config['STAGE_TIMING'] = os.environ.get('ATTENDANCIFY_STAGE_TIMING', '').lower() in ('1', 'true', 'yes')
+timing_logger = logging.getLogger('attendancify.timing')
+if app.config['STAGE_TIMING'] and not timing_logger.handlers:
+    timing_logger.addHandler(logging.StreamHandler())
+    timing_logger.setLevel(logging.INFO)
+
+# Prometheus metrics served on /metrics (set ATTENDANCIFY_METRICS=0 to disable)
+app.config['METRICS'] = os.environ.get('ATTENDANCIFY_METRICS', '1').lower() not in ('0', 'false', 'no')
+app.config['METRICS_TOKEN'] = os.environ.get('ATTENDANCIFY_METRICS_TOKEN')
+
+# JSON API clients, as comma-separated "client:token" pairs (the API is off when unset)
+app.config['API_TOKENS'] = dict(
+    entry.strip().split(':', 1) if ':' in entry else ('api', entry.strip())
+    for entry in os.environ.get('ATTENDANCIFY_API_TOKENS', '').split(',') if entry.strip()
+)
+
+# Per-job memory accounting: RSS before/after and peak are always recorded for
+# processing and matching jobs; ATTENDANCIFY_TRACEMALLOC=1 adds the top
+# allocation sites of every stage (slow, for investigating problem inputs)
+app.config['TRACEMALLOC'] = os.environ.get('ATTENDANCIFY_TRACEMALLOC', '').lower() in ('1', 'true', 'yes')
+job_logger = logging.getLogger('attendancify.jobs')
+if not job_logger.handlers:
+    job_logger.addHandler(logging.StreamHandler())
+    job_logger.setLevel(logging.INFO)
+
+# Admission control: heavy jobs are costed from their input and only run within a
+# budget of CPU slots and memory shared by every worker on this machine. Jobs that
+# do not fit wait up to JOB_QUEUE_TIMEOUT seconds in a line of at most JOB_QUEUE
+# (each waiting job holds a worker), then get a 429 with Retry-After.
+# ATTENDANCIFY_JOB_CPU_SLOTS=0 turns admission control off.
+app.config['JOB_CPU_SLOTS'] = int(os.environ.get('ATTENDANCIFY_JOB_CPU_SLOTS', os.cpu_count() or 1))
+app.config['JOB_MEMORY_MB'] = float(os.environ.get('ATTENDANCIFY_JOB_MEMORY_MB', default_memory_budget() / (1024 * 1024)))
+app.config['JOB_QUEUE'] = int(os.environ.get('ATTENDANCIFY_JOB_QUEUE', app.config['JOB_CPU_SLOTS']))
+app.config['JOB_QUEUE_TIMEOUT'] = float(os.environ.get('ATTENDANCIFY_JOB_QUEUE_TIMEOUT', 30))
+# Kept in the local temp directory: the budget is per machine, even when artifacts are shared
+admission = AdmissionController(
+    os.path.join(TEMP_DIR, 'attendancify-admission'),
+    cpu_slots=app.config['JOB_CPU_SLOTS'],
+    memory_bytes=app.config['JOB_MEMORY_MB'] * 1024 * 1024,
+    queue_limit=app.config['JOB_QUEUE'],
+    queue_timeout=app.config['JOB_QUEUE_TIMEOUT']
+)
+
+# Endpoints that run a processing or matching job, labelled by job kind
+JOB_ENDPOINTS = {
+    'process_attendance': 'attendance',
+    'process_raw_excel': 'raw_excel',
+    'process_attendance_matching': 'matching',
+    'api_attendance': 'api',
+    'api_occupancy': 'api'
 }
 
+def mark_job_failed():
+    g.job_failed = True
+
+def current_job_kind():
+    if request.method == 'POST':
+        return JOB_ENDPOINTS.get(request.endpoint)
+    return None
+
+@app.before_request
+def begin_stage_timing():
+    is_job = current_job_kind() is not None
+    if app.config['STAGE_TIMING'] or app.config['METRICS'] or is_job:
+        request.environ['attendancify.timings'] = start_timings(
+            memory=is_job, trace_allocations=is_job and app.config['TRACEMALLOC']
+        )
+
+@app.after_request
+def report_stage_timing(response):
+    started = request.environ.get('attendancify.timings')
+    if started:
+        timings = started[0]
+        timings.finish()
+        job_kind = current_job_kind()
+        failed = g.get('job_failed', False)
+        rejected = g.get('job_rejected', False)
+        if app.config['STAGE_TIMING']:
+            response.headers['Server-Timing'] = timings.server_timing_header()
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **timings.as_dict()
+            }))
+        if job_kind:
+            job_logger.info(json.dumps({
+                'job': job_kind,
+                'user': session.get('user_id') or g.get('api_client'),
+                'outcome': 'rejected' if rejected else 'error' if failed else 'ok',
+                **timings.as_dict()
+            }))
+        if app.config['METRICS']:
+            elapsed = timings.total_seconds()
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe_request(route, request.method, response.status_code, elapsed)
+            if job_kind and not rejected:
+                metrics.observe_job(job_kind, elapsed, failed, timings.counters, timings.memory)
+    return response
+
+@app.teardown_request
+def release_job_files(exc):
+    for token in g.pop('artifact_pins', []):
+        artifacts.unpin(token)
+    workspace = g.pop('workspace', None)
+    if workspace:
+        remove_workspace(workspace)
+
+@app.teardown_request
+def end_stage_timing(exc):
+    started = request.environ.pop('attendancify.timings', None)
+    if started:
+        started[0].finish()
+        stop_timings(started[1])
+
+# User accounts live in SQLite so every gunicorn worker sees the same users;
+# the superadmin is only seeded into an empty database
+USER_DB_PATH = os.environ.get('ATTENDANCIFY_USER_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'attendancify_users.db'))
+users = UserStore(
+    USER_DB_PATH,
+    seed_users={
+        'superadmin@attendancify.com': {
+            'password_hash': hashlib.sha256('admin'.encode()).hexdigest(),
+            'role': 'superadmin',
+            'created_at': datetime.now(),
+            'expires_at': None,  # Permanent account
+            'must_change_password': True,  # Force password change on first login
+            'password_plain': 'admin'  # Store plain password for superadmin viewing (as requested)
+        }
+    },
+    on_cache_lookup=(lambda hit: metrics.record_cache('users', hit)) if app.config['METRICS'] else None
+)
+
 # ----------- Authentication Functions -----------
 def hash_password(password):
     """Hash a password for storing."""
@@ -209,15 +486,11 @@ def force_change_password():
             flash('Password must be at least 6 characters long.', 'error')
             return render_template('force_change_password.html')
         
-        # Update password
-        user['password_hash'] = hash_password(new_password)
-        user['must_change_password'] = False
-        
-        # Update plain password for superadmin viewing (as requested)
-        if session.get('role') == 'superadmin' or user.get('role') == 'superadmin':
-            user['password_plain'] = new_password
-        else:
-            user['password_plain'] = new_password
+        # Update password, keeping the plain password for superadmin viewing (as requested)
+        users.update(session['user_id'],
+                     password_hash=hash_password(new_password),
+                     must_change_password=False,
+                     password_plain=new_password)
         
         # Remove force change flag from session
         session.pop('force_password_change', None)
@@ -251,7 +524,7 @@ def change_password():
                 return jsonify({'success': False, 'message': 'New passwords do not match.'}), 400
         
         # Update password
-        user['password_hash'] = hash_password(new_password)
+        users.update(session['user_id'], password_hash=hash_password(new_password))
         flash('Password changed successfully.')
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'success': True, 'message': 'Password changed successfully.'})
@@ -289,7 +562,9 @@ def create_user():
                 'must_change_password': True,  # Force password change on first login
                 'password_plain': password  # Store plain password for superadmin viewing
             }
-            users[email] = user_data
+            if not users.create(email, user_data):
+                flash('User already exists.')
+                return render_template('create_user.html', show_navigation=True)
             flash('User created successfully. They will be required to change password on first login.')
             return redirect(url_for('admin_panel'))
     
@@ -326,22 +601,22 @@ def edit_user(user_id):
             return redirect(url_for('admin_panel'))
         
         # Update user data
+        changes = {}
         if 'role' in request.form:
-            user['role'] = request.form['role']
+            changes['role'] = request.form['role']
         
         if 'expires_at' in request.form:
             expires_at = request.form['expires_at']
-            user['expires_at'] = datetime.strptime(expires_at, '%Y-%m-%dT%H:%M') if expires_at else None
+            changes['expires_at'] = datetime.strptime(expires_at, '%Y-%m-%dT%H:%M') if expires_at else None
+        users.update(user_id, **changes)
+        user.update(changes)
         
         # Handle email change
         if 'email' in request.form and request.form['email'] != user_id:
             new_email = request.form['email']
-            if new_email in users:
+            if not users.rename(user_id, new_email):
                 flash('Email already exists.')
                 return render_template('edit_user.html', user=user, user_id=user_id, show_navigation=True)
-            # Update the users dictionary
-            users[new_email] = user
-            del users[user_id]
             flash('User email updated successfully.')
             return redirect(url_for('edit_user', user_id=new_email))
         
@@ -387,18 +662,53 @@ def admin_change_password(user_id):
         return redirect(url_for('admin_panel'))
     
     # Update password
-    user['password_hash'] = hash_password(new_password)
+    users.update(user_id, password_hash=hash_password(new_password))
     flash(f'Password for {user_id} changed successfully.')
     return redirect(url_for('admin_panel'))
 
 # ----------- Name Normalization -----------
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
 def normalize_name(name: str) -> str:
     if not isinstance(name, str):
         name = str(name)
-    name = re.sub(r"[^\w\s]", "", name)
-    name = re.sub(r"\s+", " ", name)
+    name = _PUNCT_RE.sub("", name)
+    name = _SPACE_RE.sub(" ", name)
     return name.strip().lower()
 
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Vectorized normalize_name over a whole name column."""
+    return (names.fillna("nan").astype(str)
+                 .str.replace(_PUNCT_RE, "", regex=True)
+                 .str.replace(_SPACE_RE, " ", regex=True)
+                 .str.strip()
+                 .str.lower())
+
+# ----------- Status Normalization -----------
+# Raw cell value -> canonical status code; anything else becomes "N/A".
+RAW_STATUS_CODES = {"P": "P", "A": "A"}
+# Status code -> label written to matching output; other values are kept.
+STATUS_LABELS = {"P": "present", "A": "absent", "p": "present", "a": "absent"}
+
+def map_status_columns(df: pd.DataFrame, session_cols, mapping, default=None) -> pd.DataFrame:
+    """Map every session column through a single categorical lookup.
+
+    Values found in ``mapping`` are replaced by their target, all others by
+    ``default`` (or left untouched when ``default`` is None).
+    """
+    if not session_cols or df.empty:
+        return df
+    block = df[session_cols].to_numpy(dtype=object)
+    codes = pd.Categorical(block.ravel(), categories=list(mapping)).codes.reshape(block.shape)
+    # Code -1 (not in mapping) indexes the trailing default slot.
+    lookup = np.array(list(mapping.values()) + [default], dtype=object)
+    mapped = lookup[codes]
+    if default is None:
+        mapped = np.where(codes == -1, block, mapped)
+    df[session_cols] = pd.DataFrame(mapped, index=df.index, columns=session_cols)
+    return df
+
 # ----------- Raw Excel Generator Functions -----------
 SHEET_NAME = "Attendance"
 
@@ -424,7 +734,10 @@ def extract_raw_from_excel(xl_path):
 
 # ----------- Attendance Matching Functions -----------
 def read_raw_file(raw_path: str) -> pd.DataFrame:
-    df = pd.read_csv(raw_path) if raw_path.lower().endswith(".csv") else pd.read_excel(raw_path)
+    if display_name(raw_path).lower().endswith(".csv"):
+        df = pd.read_csv(raw_path, compression=csv_compression(raw_path))
+    else:
+        df = pd.read_excel(raw_path)
     df.columns = [str(c).strip() for c in df.columns]
     name_col = next((c for c in df.columns if c.lower() in ("name", "participant name")), None)
     if name_col is None:
@@ -432,21 +745,20 @@ def read_raw_file(raw_path: str) -> pd.DataFrame:
     session_cols = [c for c in df.columns if c != name_col]
     if not session_cols:
         raise ValueError("Raw file contains no session/status columns.")
-    def norm(x): return x if str(x) in ("P", "A") else "N/A"
-    for col in session_cols:
-        df[col] = df[col].apply(norm)
     out = df[[name_col] + session_cols].copy()
+    map_status_columns(out, session_cols, RAW_STATUS_CODES, default="N/A")
     out.columns = ["Name"] + session_cols
     return out
 
 def postprocess_attendance(df, session_cols):
     # Replace P→present, A→absent (case-insensitive), but only in session columns
-    for col in session_cols:
-        df[col] = df[col].replace({"P": "present", "A": "absent", "p": "present", "a": "absent"})
-    return df
+    return map_status_columns(df, session_cols, STATUS_LABELS)
 
 def match_and_write(master_file: str, raw_file: str, out_fmt: str = "xlsx") -> str:
-    mdf = pd.read_csv(master_file) if master_file.lower().endswith(".csv") else pd.read_excel(master_file)
+    if display_name(master_file).lower().endswith(".csv"):
+        mdf = pd.read_csv(master_file, compression=csv_compression(master_file))
+    else:
+        mdf = pd.read_excel(master_file)
     email_col = next((c for c in mdf.columns if str(c).strip().lower() in ("email", "email_id")), None)
     name_col = next((c for c in mdf.columns if str(c).strip().lower() in ("participant name", "name")), None)
     if email_col is None or name_col is None:
@@ -455,14 +767,14 @@ def match_and_write(master_file: str, raw_file: str, out_fmt: str = "xlsx") -> s
     mdf.columns = ["Email", "Participant Name"]
     rdf = read_raw_file(raw_file)
     session_cols = list(rdf.columns[1:])
-    raw_norm_names = [normalize_name(n) for n in list(rdf["Name"])]
+    raw_norm_names = normalize_names(rdf["Name"]).tolist()
+    master_norm_names = normalize_names(mdf["Participant Name"]).tolist()
     matched_df = mdf.copy()
     for col in session_cols:
         matched_df[col] = "N/A"
     threshold = 85
     matched_indices = set()
-    for idx, row in matched_df.iterrows():
-        master_name = normalize_name(str(row["Participant Name"]))
+    for idx, master_name in zip(matched_df.index, master_norm_names):
         best_score, best_j = -1, None
         for j, raw_norm in enumerate(raw_norm_names):
             score = fuzz.token_set_ratio(master_name, raw_norm)
@@ -482,8 +794,8 @@ def match_and_write(master_file: str, raw_file: str, out_fmt: str = "xlsx") -> s
     if not unmatched_df.empty:
         unmatched_df = postprocess_attendance(unmatched_df, session_cols)
     out_dir = os.path.dirname(master_file)
-    mbase = os.path.splitext(os.path.basename(master_file))[0]
-    rbase = os.path.splitext(os.path.basename(raw_file))[0]
+    mbase = os.path.splitext(display_name(os.path.basename(master_file)))[0]
+    rbase = os.path.splitext(display_name(os.path.basename(raw_file)))[0]
     if out_fmt == "xlsx":
         out_path = os.path.join(out_dir, f"{mbase}_matched_with_{rbase}_attendance.xlsx")
         with pd.ExcelWriter(out_path, engine="openpyxl") as w:
@@ -499,65 +811,354 @@ def match_and_write(master_file: str, raw_file: str, out_fmt: str = "xlsx") -> s
     pd.DataFrame([], columns=["email_id", "attendance(absent/present/leave)"]).to_csv(prefix + "summary.csv", index=False)
     return prefix + "matched.csv"
 
+def workspace_path(filename):
+    """Path for filename inside this request's private workspace."""
+    if 'workspace' not in g:
+        g.workspace = create_workspace(WORKSPACE_DIR)
+    return os.path.join(g.workspace, filename)
+
+def hold_artifact(artifact_id):
+    """Keeps the reaper away from the artifact until the request ends."""
+    g.setdefault('artifact_pins', []).append(artifacts.pin(artifact_id))
+
+def observe_upload_size(file_path):
+    size = os.path.getsize(file_path)
+    count(bytes=size)
+    if app.config['METRICS']:
+        metrics.observe_upload(size)
+
+def save_upload(file, file_path):
+    """Saves an upload to file_path and stores it as an artifact; returns the artifact id."""
+    with stage("upload_save"):
+        file.save(file_path)
+        artifact_id = artifacts.put(file_path)
+        hold_artifact(artifact_id)
+    observe_upload_size(file_path)
+    return artifact_id
+
+def unpack_zip(zip_path, extensions):
+    """
+    Stores each member of an uploaded zip that ends with one of `extensions`
+    as its own artifact (CSVs stay compressed, as gzip); returns
+    (filename, file_path, artifact id) for each. The zip itself is not kept.
+    """
+    members = []
+    with stage("unzip"):
+        extracted = split_zip(zip_path, zip_path + '.d', extensions,
+                              max_uncompressed=app.config['MAX_UPLOAD_MB'] * 1024 * 1024)
+        for name, path in extracted:
+            artifact_id = artifacts.put(path)
+            hold_artifact(artifact_id)
+            members.append((secure_filename(name) or 'upload' + os.path.splitext(name)[1], path, artifact_id))
+    return members
+
+def receive_uploads(field, extensions):
+    """
+    Saves the files posted in `field`, plus the finalized chunked uploads whose
+    ids are posted in `<field>_upload_id`, into the workspace. `.gz` files are
+    kept compressed and `.zip` files contribute every member ending with one
+    of `extensions`. Returns (filename, file_path, artifact id) for each;
+    raises ValueError for an unknown or expired upload id or a bad zip.
+    """
+    received = []
+    for file in request.files.getlist(field):
+        if file.filename:
+            filename = secure_filename(file.filename)
+            file_path = workspace_path(filename)
+            if is_zip_upload(filename):
+                with stage("upload_save"):
+                    file.save(file_path)
+                observe_upload_size(file_path)
+                received.extend(unpack_zip(file_path, extensions))
+            else:
+                received.append((display_name(filename), file_path, save_upload(file, file_path)))
+    for upload_id in request.form.getlist(f'{field}_upload_id'):
+        try:
+            artifact_id, filename = uploads.finalized(upload_id, session.get('user_id'))
+        except UploadNotFound:
+            raise ValueError('Upload not found. Please upload the file again.')
+        source = artifact_path(artifact_id)
+        if not source:
+            raise ValueError('Uploaded file has expired. Please upload it again.')
+        filename = secure_filename(filename) or 'upload'
+        file_path = workspace_path(filename)
+        # The artifact is held for the request, so a link is enough
+        try:
+            os.symlink(source, file_path)
+        except OSError:
+            shutil.copyfile(source, file_path)
+        if is_zip_upload(filename):
+            received.extend(unpack_zip(file_path, extensions))
+        else:
+            received.append((display_name(filename), file_path, artifact_id))
+    return received
+
+def snapshot_uploads(received):
+    """
+    Parses each uploaded log once, right away, so every later processing run
+    starts from its snapshot, and stores the preview the session form shows.
+    """
+    for _, file_path, artifact_id in received:
+        if snapshots.exists(artifact_id):
+            continue
+        try:
+            log = load_log(file_path)
+        except ValueError:
+            continue  # reported when the log is processed
+        with stage("preview"):
+            preview = log_preview(file_path, log)
+        with stage("snapshot_save"):
+            snapshots.save(artifact_id, log, preview)
+
+def attendance_log(artifact_id, file_path):
+    """The parsed, identity-resolved log of an upload, from its snapshot when there is one."""
+    with stage("snapshot_load"):
+        log = snapshots.load(artifact_id)
+    if log is None:
+        log = load_log(file_path)
+        with stage("snapshot_save"):
+            snapshots.save(artifact_id, log)
+    else:
+        count(rows=len(log))
+    return log
+
+def store_output(output_path, name):
+    """Stores a generated file; returns the {'id', 'name'} entry kept in the session."""
+    with stage("store_output"):
+        artifact_id = artifacts.put(output_path)
+        hold_artifact(artifact_id)
+    return {'id': artifact_id, 'name': name}
+
+def artifact_path(artifact_id):
+    """Local path of an artifact (held for the rest of the request), or None if it is missing or expired."""
+    # Pinned before the path is resolved, so the reaper cannot remove it in between
+    try:
+        token = artifacts.pin(artifact_id)
+    except ArtifactNotFound:
+        return None
+    try:
+        path = artifacts.path(artifact_id)
+    except ArtifactNotFound:
+        artifacts.unpin(token)
+        return None
+    g.setdefault('artifact_pins', []).append(token)
+    return path
+
+def send_artifact(file_info):
+    """
+    Sends an artifact with its content hash as a strong ETag, so a repeat
+    download with If-None-Match gets a 304 and an interrupted one can resume
+    with a Range request.
+    """
+    # A download counts as a use, so often-downloaded reports are evicted last
+    artifacts.touch(file_info['id'])
+    response = send_file(artifacts.path(file_info['id']), as_attachment=True, download_name=file_info['name'],
+                         etag=file_info['id'], conditional=True, last_modified=None)
+    # Reports belong to one user; browsers may keep them but must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def send_zip(file_infos, zip_filename, cache_key):
+    """
+    Zips the given artifacts under their display names and sends the archive.
+    The zip is built once per result set and its artifact id kept in
+    session[cache_key], so later visits (and resumed downloads) reuse it.
+    """
+    contents = hashlib.sha256(json.dumps([[f['id'], f['name']] for f in file_infos]).encode()).hexdigest()
+    cached = session.get(cache_key)
+    hit = bool(cached and cached['contents'] == contents and artifact_path(cached['id']))
+    if app.config['METRICS']:
+        metrics.record_cache('zip', hit)
+    if hit:
+        return send_artifact(cached)
+    zip_path = workspace_path(zip_filename)
+    with stage("zip"), zipfile.ZipFile(zip_path, 'w') as zipf:
+        for file_info in file_infos:
+            zipf.write(artifacts.path(file_info['id']), file_info['name'])
+    zip_info = store_output(zip_path, zip_filename)
+    session[cache_key] = dict(zip_info, contents=contents)
+    return send_artifact(zip_info)
+
+# ----------- Admission Control -----------
+def posted_upload_bytes(*fields):
+    """
+    (decompressed bytes, file count) of the files and finalized chunked uploads
+    posted in `fields`; unknown uploads are left to receive_uploads to report.
+    """
+    total = 0
+    files = 0
+    for field in fields:
+        for file in request.files.getlist(field):
+            if file.filename:
+                total += expanded_size(file.stream, file.filename)
+                files += 1
+        for upload_id in request.form.getlist(f'{field}_upload_id'):
+            try:
+                artifact_id, filename = uploads.finalized(upload_id, session.get('user_id'))
+                with open(artifacts.path(artifact_id), 'rb') as f:
+                    total += expanded_size(f, filename)
+                files += 1
+            except (UploadNotFound, ArtifactNotFound, OSError):
+                continue
+    return total, files
+
+def stored_log_bytes(artifact_ids):
+    """Decompressed bytes of the stored logs (missing ones count as empty)."""
+    total = 0
+    for artifact_id in artifact_ids:
+        try:
+            with open(artifacts.path(artifact_id), 'rb') as f:
+                total += expanded_size(f, '')
+        except (ArtifactNotFound, OSError):
+            continue
+    return total
+
+def posted_session_count(form):
+    """Session windows on the configure form, counting each week of the schedule."""
+    windows = sum(1 for key, value in form.items() if key.startswith('start_time_') and value)
+    try:
+        windows += len(form.getlist('schedule_days')) * max(int(form.get('schedule_weeks', 1)), 1)
+    except ValueError:
+        pass
+    return windows
+
+def estimate_upload():
+    # Uploaded logs are parsed right away (see snapshot_uploads)
+    return log_job_cost(posted_upload_bytes('csv_file', 'csv_files')[0], 0)
+
+def estimate_attendance():
+    file_ids = [session.get('file_id')] if session.get('mode', 'single') == 'single' else session.get('file_ids', [])
+    return log_job_cost(stored_log_bytes(file_ids), posted_session_count(request.form))
+
+def estimate_raw_excel():
+    return workbook_job_cost(posted_upload_bytes('excel_files')[0])
+
+def estimate_matching():
+    master_bytes, masters = posted_upload_bytes('master_files')
+    raw_bytes, raws = posted_upload_bytes('raw_files')
+    return matching_job_cost(master_bytes, raw_bytes, min(masters, raws))
+
+def estimate_api():
+    try:
+        sessions = len(json.loads(request.form.get('sessions', '')))
+    except (ValueError, TypeError):
+        sessions = 0
+    return log_job_cost(posted_upload_bytes('log')[0], sessions)
+
+def admission_controlled(kind, estimate, api=False):
+    """
+    Runs the route once its job (costed by `estimate`) is admitted; answers
+    429 with Retry-After when the server is full. API routes get a JSON error.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not app.config['JOB_CPU_SLOTS']:
+                return f(*args, **kwargs)
+            cost = estimate()
+            started = time.monotonic()
+            try:
+                with stage("admission"):
+                    ticket = admission.admit(cost)
+            except Overloaded as e:
+                g.job_rejected = True
+                if app.config['METRICS']:
+                    metrics.observe_admission(kind, False, time.monotonic() - started)
+                if api:
+                    response = make_response(api_error(str(e), 429))
+                else:
+                    response = make_response(render_template('server_busy.html', retry_after=e.retry_after,
+                                                             show_navigation=True), 429)
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            if app.config['METRICS']:
+                metrics.observe_admission(kind, True, time.monotonic() - started)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                admission.release(ticket)
+        return decorated_function
+    return decorator
+
 # ----------- Routes -----------
+@app.route('/metrics')
+def prometheus_metrics():
+    if not app.config['METRICS']:
+        abort(404)
+    token = app.config['METRICS_TOKEN']
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    body, content_type = metrics.render_metrics([
+        ARTIFACT_DIR, WORKSPACE_DIR, uploads.root, snapshots.root, live_meetings.root
+    ])
+    return Response(body, content_type=content_type)
+
 @app.route('/')
+@cacheable_public_page
 def index():
     # Allow public access to the homepage
     return render_template('comprehensive_index.html', show_navigation=True)
 
 # ----------- Attendance Generator Routes -----------
 @app.route('/attendance_generator')
+@cacheable_public_page
 def attendance_generator():
     # Allow public viewing of the tool UI
     return render_template('attendance_generator.html', show_navigation=True)
 
+def schedule_from_form(form):
+    """Expands the optional recurring schedule on the configure form into session windows."""
+    days = form.getlist('schedule_days')
+    if not days:
+        return []
+    return expand_schedule(
+        days,
+        form.get('schedule_start_time'),
+        form.get('schedule_end_time'),
+        form.get('schedule_start_date'),
+        form.get('schedule_weeks', 1),
+        form.get('schedule_time_required', 30)
+    )
+
 @app.route('/upload_attendance', methods=['POST'])
 @login_required
+@admission_controlled('upload', estimate_upload)
 def upload_attendance_file():
     # Get the mode (single or multiple)
     mode = request.form.get('mode', 'single')
     
-    if mode == 'single':
-        if 'csv_file' not in request.files:
+    # File fields (.csv, .csv.gz or .zip), or ids of finalized chunked uploads
+    try:
+        received = receive_uploads('csv_file' if mode == 'single' else 'csv_files', ('.csv',))
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('attendance_generator'))
+    snapshot_uploads(received)
+    
+    # A zip with several logs goes straight to multiple mode
+    if mode == 'single' and len(received) <= 1:
+        if not received:
             flash('No file selected')
             return redirect(url_for('attendance_generator'))
         
-        file = request.files['csv_file']
-        if file.filename == '':
-            flash('No file selected')
-            return redirect(url_for('attendance_generator'))
+        filename, _, file_id = received[0]
         
-        if file:
-            # Save file temporarily
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(TEMP_DIR, filename)
-            file.save(file_path)
-            
-            # Store file info in session
-            session['file_path'] = file_path
-            session['filename'] = filename
-            session['mode'] = 'single'
-            
-            return redirect(url_for('configure_attendance_sessions'))
+        # Store file info in session
+        session['file_id'] = file_id
+        session['filename'] = filename
+        session['mode'] = 'single'
+        
+        return redirect(url_for('configure_attendance_sessions'))
     else:  # multiple mode
-        files = request.files.getlist('csv_files')
-        if not files or not any(f.filename for f in files):
+        if not received:
             flash('No files selected')
             return redirect(url_for('attendance_generator'))
         
-        # Save all files
-        file_paths = []
-        file_names = []
-        for file in files:
-            if file.filename:
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(TEMP_DIR, filename)
-                file.save(file_path)
-                file_paths.append(file_path)
-                file_names.append(filename)
+        file_ids = [file_id for _, _, file_id in received]
+        file_names = [filename for filename, _, _ in received]
         
         # Store file info in session
-        session['file_paths'] = file_paths
+        session['file_ids'] = file_ids
         session['file_names'] = file_names
         session['mode'] = 'multiple'
         
@@ -568,27 +1169,35 @@ def upload_attendance_file():
 def configure_attendance_sessions():
     mode = session.get('mode', 'single')
     if mode == 'single':
-        return render_template('configure_attendance.html', mode='single', show_navigation=True)
+        file_names = [session.get('filename')]
+        file_ids = [session.get('file_id')]
     else:
+        mode = 'multiple'
         file_names = session.get('file_names', [])
-        return render_template('configure_attendance.html', mode='multiple', file_names=file_names, show_navigation=True)
+        file_ids = session.get('file_ids', [])
+    # Span, counts and proposed session windows worked out at upload time
+    previews = [snapshots.preview(file_id) if file_id else None for file_id in file_ids]
+    return render_template('configure_attendance.html', mode=mode, file_names=file_names,
+                           previews=previews, show_navigation=True)
 
 @app.route('/process_attendance', methods=['POST'])
 @login_required
+@admission_controlled('attendance', estimate_attendance)
 def process_attendance():
     try:
         mode = session.get('mode', 'single')
         
         if mode == 'single':
             # Get session data
-            file_path = session.get('file_path')
-            if not file_path or not os.path.exists(file_path):
+            file_id = session.get('file_id')
+            file_path = artifact_path(file_id)
+            if not file_path:
                 flash('File not found. Please upload again.')
                 return redirect(url_for('attendance_generator'))
             
             # Get session configurations from form
             sessions_info = []
-            session_count = int(request.form.get('session_count', 0))
+            session_count = int(request.form.get('session_count', request.form.get('session_row_count', 0)))
             
             for i in range(session_count):
                 start_str = request.form.get(f'start_time_{i}')
@@ -610,16 +1219,31 @@ def process_attendance():
                         "time_required": time_required
                     })
             
+            # Windows generated from a recurring schedule
+            try:
+                sessions_info.extend(schedule_from_form(request.form))
+            except ValueError as e:
+                flash(f'Error in schedule: {str(e)}')
+                return redirect(url_for('configure_attendance_sessions'))
+            
             if not sessions_info:
                 flash('Please add at least one session.')
                 return redirect(url_for('configure_attendance_sessions'))
             
+            try:
+                resolution = parse_resolution(request.form.get('occupancy_resolution'))
+            except ValueError as e:
+                flash(f'Error in occupancy resolution: {str(e)}')
+                return redirect(url_for('configure_attendance_sessions'))
+            
             # Process the attendance
-            output_records, session_labels, session_summary = process_sessions_for_file(file_path, sessions_info)
+            log = attendance_log(file_id, file_path)
+            output_records, session_labels, session_summary = process_sessions_for_log(log, sessions_info)
+            occupancy = session_occupancy(log, sessions_info, resolution)
             
             # Calculate statistics
             total_people = len(output_records)
-            total_sessions = len(sessions_info)
+            total_sessions = len(session_labels)
             
             # Count present/absent across all sessions
             present_count = 0
@@ -649,33 +1273,31 @@ def process_attendance():
             }
             
             # Read raw log data
-            with open(file_path, 'r', encoding='utf-8') as f:
-                sample = f.read(1024)
-                f.seek(0)
-                dialect = csv.Sniffer().sniff(sample)
-                raw_data = list(csv.reader(f, dialect))
-            raw_log_df = pd.DataFrame(raw_data)
+            raw_log_df = read_raw_log(file_path)
             
             # Create output Excel file
             output_filename = os.path.splitext(session['filename'])[0] + '_processed.xlsx'
-            output_path = os.path.join(TEMP_DIR, output_filename)
+            output_path = workspace_path(output_filename)
             
-            write_excel(raw_log_df, output_records, output_path)
+            write_excel(raw_log_df, output_records, output_path, occupancy)
             
-            # Store output path in session
-            session['output_path'] = output_path
+            # Store output artifact in session
+            output_info = store_output(output_path, output_filename)
+            session['output_id'] = output_info['id']
             session['output_filename'] = output_filename
             
             # Automatically download the file after processing
             flash('Processing Complete! Your attendance reports have been generated.', 'success')
-            return send_file(output_path, as_attachment=True, download_name=output_filename)
+            return send_artifact(output_info)
         else:  # multiple mode
-            file_paths = session.get('file_paths', [])
+            file_ids = session.get('file_ids', [])
+            file_paths = [artifact_path(file_id) for file_id in file_ids]
             file_names = session.get('file_names', [])
             
-            if not file_paths:
+            if not file_paths or None in file_paths:
                 flash('No files found. Please upload again.')
                 return redirect(url_for('attendance_generator'))
+            file_id_of = dict(zip(file_paths, file_ids))
             
             # Get session configurations from form
             # In multiple mode, we need to associate sessions with specific files
@@ -699,65 +1321,100 @@ def process_attendance():
                         flash(f'Error in session for file {file_name}: Start time must be before end time.')
                         return redirect(url_for('configure_attendance_sessions'))
                     
-                    # Find the file path for this file name
-                    file_path = None
+                    # Find the upload with this file name; keyed by upload index,
+                    # since identical uploads share one artifact path
+                    upload = None
                     for j, name in enumerate(file_names):
                         if name == file_name:
-                            file_path = file_paths[j]
+                            upload = j
                             break
                     
-                    if file_path:
+                    if upload is not None:
                         session_info = {
                             "session_start": session_start,
                             "session_end": session_end,
                             "time_required": time_required
                         }
                         
-                        if file_path not in sessions_by_file:
-                            sessions_by_file[file_path] = {
+                        if upload not in sessions_by_file:
+                            sessions_by_file[upload] = {
                                 "file_name": file_name,
+                                "file_path": file_paths[upload],
                                 "sessions": []
                             }
                         
-                        sessions_by_file[file_path]["sessions"].append(session_info)
+                        sessions_by_file[upload]["sessions"].append(session_info)
+            
+            # A recurring schedule applies to every uploaded file
+            try:
+                scheduled = schedule_from_form(request.form)
+            except ValueError as e:
+                flash(f'Error in schedule: {str(e)}')
+                return redirect(url_for('configure_attendance_sessions'))
+            if scheduled:
+                for upload, (file_path, file_name) in enumerate(zip(file_paths, file_names)):
+                    sessions_by_file.setdefault(upload, {"file_name": file_name, "file_path": file_path, "sessions": []})
+                    sessions_by_file[upload]["sessions"].extend(scheduled)
             
             if not sessions_by_file:
                 flash('Please add at least one session.')
                 return redirect(url_for('configure_attendance_sessions'))
             
+            try:
+                resolution = parse_resolution(request.form.get('occupancy_resolution'))
+            except ValueError as e:
+                flash(f'Error in occupancy resolution: {str(e)}')
+                return redirect(url_for('configure_attendance_sessions'))
+            
+            # Consolidated mode: one participant x session report across all files
+            if request.form.get('consolidate'):
+                meetings = [(file_data["file_name"], file_data["file_path"], file_data["sessions"])
+                            for file_data in sessions_by_file.values()]
+                try:
+                    output_records, session_labels, session_summary = merge_meetings(
+                        meetings, loader=lambda file_path: attendance_log(file_id_of[file_path], file_path))
+                    output_filename = 'consolidated_attendance.xlsx'
+                    output_path = workspace_path(output_filename)
+                    write_consolidated_excel(output_records, session_summary, output_path)
+                except Exception as e:
+                    mark_job_failed()
+                    flash(f'Error consolidating files: {str(e)}')
+                    return redirect(url_for('configure_attendance_sessions'))
+                
+                output_info = store_output(output_path, output_filename)
+                session['attendance_output_files'] = [output_info]
+                flash('Processing Complete! Your consolidated attendance report has been generated.', 'success')
+                return send_artifact(output_info)
+            
             # Process each file
             output_files = []
             summary_all = {}
             
-            for file_path, file_data in sessions_by_file.items():
+            for file_data in sessions_by_file.values():
                 file_name = file_data["file_name"]
+                file_path = file_data["file_path"]
                 sessions_info = file_data["sessions"]
                 
                 try:
                     # Process the attendance
-                    output_records, session_labels, session_summary = process_sessions_for_file(file_path, sessions_info)
+                    log = attendance_log(file_id_of[file_path], file_path)
+                    output_records, session_labels, session_summary = process_sessions_for_log(log, sessions_info)
+                    occupancy = session_occupancy(log, sessions_info, resolution)
                     
                     # Read raw log data
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        sample = f.read(1024)
-                        f.seek(0)
-                        dialect = csv.Sniffer().sniff(sample)
-                        raw_data = list(csv.reader(f, dialect))
-                    raw_log_df = pd.DataFrame(raw_data)
+                    raw_log_df = read_raw_log(file_path)
                     
                     # Create output Excel file
                     output_filename = os.path.splitext(file_name)[0] + '_processed.xlsx'
-                    output_path = os.path.join(TEMP_DIR, output_filename)
+                    output_path = workspace_path(output_filename)
                     
-                    write_excel(raw_log_df, output_records, output_path)
+                    write_excel(raw_log_df, output_records, output_path, occupancy)
                     
-                    output_files.append({
-                        'path': output_path,
-                        'name': output_filename
-                    })
+                    output_files.append(store_output(output_path, output_filename))
                     
                     summary_all[file_name] = "\n".join(session_summary)
                 except Exception as e:
+                    mark_job_failed()
                     flash(f'Error processing file {file_name}: {str(e)}')
                     return redirect(url_for('configure_attendance_sessions'))
             
@@ -769,20 +1426,13 @@ def process_attendance():
             
             if len(output_files) == 1:
                 # Single file - download directly
-                file_info = output_files[0]
-                return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+                return send_artifact(output_files[0])
             else:
                 # Multiple files - create zip
-                zip_filename = 'attendance_reports.zip'
-                zip_path = os.path.join(TEMP_DIR, zip_filename)
-                
-                with zipfile.ZipFile(zip_path, 'w') as zipf:
-                    for file_info in output_files:
-                        zipf.write(file_info['path'], file_info['name'])
-                
-                return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+                return send_zip(output_files, 'attendance_reports.zip', 'attendance_output_zip')
         
     except Exception as e:
+        mark_job_failed()
         flash(f'Error processing attendance: {str(e)}')
         return redirect(url_for('configure_attendance_sessions'))
 
@@ -795,20 +1445,19 @@ def download_attendance():
     download_now = request.args.get('download', 'false') == 'true'
     
     if mode == 'single':
-        output_path = session.get('output_path')
-        output_filename = session.get('output_filename')
+        output_info = {'id': session.get('output_id'), 'name': session.get('output_filename')}
         
-        if not output_path or not os.path.exists(output_path):
+        if not artifact_path(output_info['id']):
             flash('Processed file not found.')
             return redirect(url_for('attendance_generator'))
         
         # If download requested, send file directly
         if download_now:
-            return send_file(output_path, as_attachment=True, download_name=output_filename)
+            return send_artifact(output_info)
         
         # First visit - show template with statistics popup
         return render_template('download_attendance.html', 
-                             files=[{'name': output_filename, 'path': output_path}],
+                             files=[output_info],
                              single_file=True)
     else:
         output_files = session.get('attendance_output_files', [])
@@ -817,8 +1466,8 @@ def download_attendance():
         requested_file = request.args.get('file')
         if requested_file and download_now:
             for file_info in output_files:
-                if file_info['name'] == requested_file:
-                    return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+                if file_info['name'] == requested_file and artifact_path(file_info['id']):
+                    return send_artifact(file_info)
         
         if not output_files:
             flash('No processed files found.')
@@ -831,41 +1480,36 @@ def download_attendance():
 
 # ----------- Raw Excel Generator Routes -----------
 @app.route('/raw_excel_generator')
+@cacheable_public_page
 def raw_excel_generator():
     # Allow public viewing of the tool UI
     return render_template('raw_excel_generator.html', show_navigation=True)
 
 @app.route('/process_raw_excel', methods=['POST'])
 @login_required
+@admission_controlled('raw_excel', estimate_raw_excel)
 def process_raw_excel():
     try:
-        # Get uploaded files
-        files = request.files.getlist('excel_files')
-        if not files or not any(f.filename for f in files):
+        # Get uploaded files (file fields or finalized chunked uploads)
+        files = receive_uploads('excel_files', ('.xlsx',))
+        if not files:
             flash('No files selected')
             return redirect(url_for('raw_excel_generator'))
         
         # Process each file
         output_files = []
-        for file in files:
-            if file.filename:
-                # Save file temporarily
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(TEMP_DIR, filename)
-                file.save(file_path)
-                
-                # Process the file
+        for filename, file_path, _ in files:
+            # Process the file
+            with stage("extract_raw"):
                 raw_df = extract_raw_from_excel(file_path)
-                
-                # Create output file
-                output_filename = os.path.splitext(filename)[0] + '-RAW.xlsx'
-                output_path = os.path.join(TEMP_DIR, output_filename)
+            
+            # Create output file
+            output_filename = os.path.splitext(filename)[0] + '-RAW.xlsx'
+            output_path = workspace_path(output_filename)
+            with stage("write_excel"):
                 raw_df.to_excel(output_path, index=False)
-                
-                output_files.append({
-                    'path': output_path,
-                    'name': output_filename
-                })
+            
+            output_files.append(store_output(output_path, output_filename))
         
         # Store output files in session
         session['raw_output_files'] = output_files
@@ -873,6 +1517,7 @@ def process_raw_excel():
         return redirect(url_for('download_raw_excel'))
         
     except Exception as e:
+        mark_job_failed()
         flash(f'Error processing files: {str(e)}')
         return redirect(url_for('raw_excel_generator'))
 
@@ -885,41 +1530,35 @@ def download_raw_excel():
     requested_file = request.args.get('file')
     if requested_file:
         for file_info in output_files:
-            if file_info['name'] == requested_file:
-                return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+            if file_info['name'] == requested_file and artifact_path(file_info['id']):
+                return send_artifact(file_info)
     
-    if not output_files:
+    if not output_files or not all(artifact_path(file_info['id']) for file_info in output_files):
         flash('No processed files found.')
         return redirect(url_for('raw_excel_generator'))
     
     # If only one file, download it directly
     if len(output_files) == 1:
-        file_info = output_files[0]
-        return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+        return send_artifact(output_files[0])
     else:
         # Create a zip file with all outputs
-        zip_filename = 'raw_excel_files.zip'
-        zip_path = os.path.join(TEMP_DIR, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_info in output_files:
-                zipf.write(file_info['path'], file_info['name'])
-        
-        return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+        return send_zip(output_files, 'raw_excel_files.zip', 'raw_output_zip')
 
 # ----------- Attendance Matching Routes -----------
 @app.route('/attendance_matching')
+@cacheable_public_page
 def attendance_matching():
     # Allow public viewing of the tool UI
     return render_template('attendance_matching.html', show_navigation=True)
 
 @app.route('/process_attendance_matching', methods=['POST'])
 @login_required
+@admission_controlled('matching', estimate_matching)
 def process_attendance_matching():
     try:
-        # Get uploaded files
-        master_files = request.files.getlist('master_files')
-        raw_files = request.files.getlist('raw_files')
+        # Get uploaded files (file fields or finalized chunked uploads)
+        master_files = receive_uploads('master_files', ('.csv', '.xlsx'))
+        raw_files = receive_uploads('raw_files', ('.csv', '.xlsx'))
         
         if not master_files or not raw_files:
             flash('Please select both master and raw files')
@@ -928,27 +1567,10 @@ def process_attendance_matching():
         # Get output format
         output_format = request.form.get('output_format', 'xlsx')
         
-        # Save master files
-        master_file_paths = []
-        master_file_names = []
-        for file in master_files:
-            if file.filename:
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(TEMP_DIR, filename)
-                file.save(file_path)
-                master_file_paths.append(file_path)
-                master_file_names.append(filename)
-        
-        # Save raw files
-        raw_file_paths = []
-        raw_file_names = []
-        for file in raw_files:
-            if file.filename:
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(TEMP_DIR, filename)
-                file.save(file_path)
-                raw_file_paths.append(file_path)
-                raw_file_names.append(filename)
+        master_file_paths = [file_path for _, file_path, _ in master_files]
+        master_file_names = [filename for filename, _, _ in master_files]
+        raw_file_paths = [file_path for _, file_path, _ in raw_files]
+        raw_file_names = [filename for filename, _, _ in raw_files]
         
         # Process file pairs
         output_files = []
@@ -963,12 +1585,10 @@ def process_attendance_matching():
             raw_name = raw_file_names[i]
             
             # Process the matching
-            output_path = match_and_write(master_path, raw_path, output_format)
+            with stage("match"):
+                output_path = match_and_write(master_path, raw_path, output_format)
             
-            output_files.append({
-                'path': output_path,
-                'name': os.path.basename(output_path)
-            })
+            output_files.append(store_output(output_path, os.path.basename(output_path)))
         
         # Store output files in session
         session['matching_output_files'] = output_files
@@ -976,6 +1596,7 @@ def process_attendance_matching():
         return redirect(url_for('download_attendance_matching'))
         
     except Exception as e:
+        mark_job_failed()
         flash(f'Error processing files: {str(e)}')
         return redirect(url_for('attendance_matching'))
 
@@ -988,27 +1609,271 @@ def download_attendance_matching():
     requested_file = request.args.get('file')
     if requested_file:
         for file_info in output_files:
-            if file_info['name'] == requested_file:
-                return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+            if file_info['name'] == requested_file and artifact_path(file_info['id']):
+                return send_artifact(file_info)
     
-    if not output_files:
+    if not output_files or not all(artifact_path(file_info['id']) for file_info in output_files):
         flash('No processed files found.')
         return redirect(url_for('attendance_matching'))
     
     # If only one file, download it directly
     if len(output_files) == 1:
-        file_info = output_files[0]
-        return send_file(file_info['path'], as_attachment=True, download_name=file_info['name'])
+        return send_artifact(output_files[0])
     else:
         # Create a zip file with all outputs
-        zip_filename = 'matching_results.zip'
-        zip_path = os.path.join(TEMP_DIR, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_info in output_files:
-                zipf.write(file_info['path'], file_info['name'])
-        
-        return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+        return send_zip(output_files, 'matching_results.zip', 'matching_output_zip')
+
+# ----------- JSON API -----------
+def api_error(message, status):
+    return jsonify({'error': message}), status
+
+def api_client():
+    """Name of the client whose bearer token was sent, or None."""
+    provided = request.headers.get('Authorization', '')
+    for client, token in app.config['API_TOKENS'].items():
+        if secrets.compare_digest(provided, f'Bearer {token}'):
+            return client
+    return None
+
+def api_token_required(f):
+    """JSON API routes: 404 while no tokens are configured, 401 without a valid one."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not app.config['API_TOKENS']:
+            abort(404)
+        client = api_client()
+        if client is None:
+            return api_error('Missing or invalid API token.', 401)
+        g.api_client = client
+        return f(*args, **kwargs)
+    return decorated_function
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson')
+
+def ndjson_lines(sessions, participants, compress):
+    """One line with the sessions, then one per participant; gzipped on the fly when compress is set."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    lines = [{'sessions': sessions}]
+    lines.extend(participants)
+    for line in lines:
+        data = (json.dumps(line, separators=(',', ':')) + '\n').encode()
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+def api_sessions():
+    """The `sessions` form field as sessions_info; raises ValueError."""
+    try:
+        return parse_session_list(json.loads(request.form.get('sessions', '')))
+    except json.JSONDecodeError:
+        raise ValueError('sessions must be a JSON list.')
+
+def api_load_log(file):
+    """Saves the `log` upload and parses it; `merge_identities=0` skips identity resolution."""
+    file_path = workspace_path(secure_filename(file.filename) or 'log.csv')
+    with stage("upload_save"):
+        file.save(file_path)
+    if app.config['METRICS']:
+        metrics.observe_upload(os.path.getsize(file_path))
+    merge_identities = request.form.get('merge_identities', '1').lower() not in ('0', 'false', 'no')
+    return load_log(file_path, merge_identities)
+
+@app.route('/api/v1/attendance', methods=['POST'])
+@api_token_required
+@admission_controlled('api', estimate_api, api=True)
+def api_attendance():
+    """
+    Participants x sessions as JSON, straight from the engine (no workbook).
+    Takes a multipart `log` upload and a `sessions` JSON list of
+    {"start", "end", "time_required"}; `merge_identities=0` skips identity resolution.
+    """
+    file = request.files.get('log')
+    if not file or not file.filename:
+        return api_error('No log file uploaded.', 400)
+    try:
+        sessions_info = api_sessions()
+    except ValueError as e:
+        return api_error(str(e), 400)
+    try:
+        log = api_load_log(file)
+        sessions, participants = attendance_results(log, sessions_info)
+    except ValueError as e:
+        mark_job_failed()
+        return api_error(str(e), 400)
+    except Exception as e:
+        mark_job_failed()
+        return api_error(f'Error processing log: {str(e)}', 500)
+    if wants_ndjson():
+        compress = accepts_gzip()
+        response = Response(ndjson_lines(sessions, participants, compress), mimetype='application/x-ndjson')
+        response.vary.add('Accept-Encoding')
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+    return jsonify({'sessions': sessions, 'participants': participants})
+
+@app.route('/api/v1/occupancy', methods=['POST'])
+@api_token_required
+@admission_controlled('api', estimate_api, api=True)
+def api_occupancy():
+    """
+    Occupancy curve per session: the same `log` and `sessions` as
+    /api/v1/attendance plus `resolution` (minutes between samples, default 1).
+    Each session has its peak, peak_at, drop_offs and [time, count] curve samples.
+    """
+    file = request.files.get('log')
+    if not file or not file.filename:
+        return api_error('No log file uploaded.', 400)
+    try:
+        sessions_info = api_sessions()
+        resolution = parse_resolution(request.form.get('resolution'))
+    except ValueError as e:
+        return api_error(str(e), 400)
+    try:
+        log = api_load_log(file)
+        occupancy = session_occupancy(log, sessions_info, resolution)
+    except ValueError as e:
+        mark_job_failed()
+        return api_error(str(e), 400)
+    except Exception as e:
+        mark_job_failed()
+        return api_error(f'Error processing log: {str(e)}', 500)
+    return jsonify({'resolution': resolution, 'sessions': occupancy_results(occupancy)})
+
+@app.route('/api/v1/live/<meeting_id>', methods=['PUT'])
+@api_token_required
+def api_live_create(meeting_id):
+    """Starts a live meeting (or restarts it, dropping its events) with a `sessions` list."""
+    body = request.get_json(silent=True) or {}
+    try:
+        sessions_info = parse_session_list(body.get('sessions'))
+        live_meetings.create(meeting_id, sessions_info)
+    except MeetingNotFound:
+        return api_error('Meeting ids are 1-64 letters, digits, "-" or "_".', 400)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    sessions = live_meetings.status(meeting_id)['sessions']
+    return jsonify({'meeting': meeting_id, 'sessions': sessions}), 201
+
+@app.route('/api/v1/live/<meeting_id>/events', methods=['POST'])
+@api_token_required
+def api_live_events(meeting_id):
+    """
+    Appends join/leave events: one JSON object, a list, {"events": [...]} or
+    NDJSON lines, each {"event": "join"|"leave", "name", "email", "time"}.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            events = [json.loads(line) for line in request.get_data().splitlines() if line.strip()]
+        else:
+            events = request.get_json(silent=True)
+            if isinstance(events, dict):
+                events = events.get('events', [events])
+        if not isinstance(events, list):
+            return api_error('Expected a JSON event, a list of events or NDJSON.', 400)
+        with stage("live_append"):
+            accepted = live_meetings.append(meeting_id, events)
+    except MeetingNotFound:
+        return api_error('Meeting not found.', 404)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    count(rows=accepted)
+    return jsonify({'accepted': accepted})
+
+@app.route('/api/v1/live/<meeting_id>')
+@api_token_required
+def api_live_status(meeting_id):
+    """Current P/A and minutes per participant and session, counting open joins up to `at` (default: the latest event)."""
+    try:
+        at = datetime.fromisoformat(request.args['at']).replace(tzinfo=None) if request.args.get('at') else None
+    except ValueError:
+        return api_error('at must be an ISO 8601 time.', 400)
+    try:
+        with stage("live_status"):
+            status = live_meetings.status(meeting_id, at)
+    except MeetingNotFound:
+        return api_error('Meeting not found.', 404)
+    now = at or status['latest']
+    return jsonify({
+        'meeting': meeting_id,
+        'at': now.isoformat() if now else None,
+        'events': status['events'],
+        'sessions': status['sessions'],
+        'participants': status['participants']
+    })
+
+# ----------- Chunked Upload Routes -----------
+# Create an upload, PUT its numbered chunks (each with an X-Chunk-SHA256 header),
+# then finalize; the upload id can then be posted as `<field>_upload_id` in place
+# of a file to the upload and processing routes
+def upload_owner():
+    if not is_logged_in() or not check_token_validity():
+        return None
+    return session['user_id']
+
+def upload_status(status):
+    visible = {key: value for key, value in status.items() if key not in ('owner', 'artifact_id')}
+    visible['finalized'] = bool(status['artifact_id'])
+    return visible
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    owner = upload_owner()
+    if owner is None:
+        return api_error('Please log in.', 401)
+    body = request.get_json(silent=True) or {}
+    try:
+        status = uploads.create(owner, secure_filename(str(body.get('filename', ''))), body.get('size'), body.get('sha256'))
+    except UploadError as e:
+        return api_error(str(e), 400)
+    return jsonify(upload_status(status)), 201
+
+@app.route('/uploads/<upload_id>')
+def get_upload(upload_id):
+    owner = upload_owner()
+    if owner is None:
+        return api_error('Please log in.', 401)
+    try:
+        return jsonify(upload_status(uploads.status(upload_id, owner)))
+    except UploadNotFound:
+        return api_error('Upload not found.', 404)
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_upload_chunk(upload_id, index):
+    owner = upload_owner()
+    if owner is None:
+        return api_error('Please log in.', 401)
+    try:
+        with stage("upload_chunk"):
+            size = uploads.write_chunk(upload_id, owner, index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except UploadNotFound:
+        return api_error('Upload not found.', 404)
+    except UploadError as e:
+        return api_error(str(e), 400)
+    count(bytes=size)
+    return jsonify({'chunk': index, 'size': size})
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    owner = upload_owner()
+    if owner is None:
+        return api_error('Please log in.', 401)
+    try:
+        with stage("upload_assemble"):
+            uploads.finalize(upload_id, owner)
+        status = uploads.status(upload_id, owner)
+    except UploadNotFound:
+        return api_error('Upload not found.', 404)
+    except UploadError as e:
+        return api_error(str(e), 400)
+    if app.config['METRICS']:
+        metrics.observe_upload(status['size'])
+    return jsonify(upload_status(status))
 
 if __name__ == '__main__':
     print("Starting Attendance Tools Suite...")
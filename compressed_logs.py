@@ -0,0 +1,125 @@
+"""
+Compressed log uploads.
+
+Zoom CSV exports compress about 10x, so `.csv.gz` uploads are stored as they
+arrive and every CSV in a `.zip` upload becomes its own gzip file: the
+member's deflate stream is copied into a gzip container as is, without
+decompressing or recompressing it. Readers sniff the gzip magic bytes
+(stored artifacts have no file extension) and decompress while parsing.
+"""
+import os
+import gzip
+import shutil
+import struct
+import zipfile
+
+GZIP_MAGIC = b"\x1f\x8b"
+COPY_SIZE = 1024 * 1024
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"  # deflate, no name, mtime 0, OS unknown
+
+def is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+def csv_compression(path):
+    """The `compression` argument for pd.read_csv on this file."""
+    return "gzip" if is_gzip(path) else None
+
+def open_text(path, encoding="utf-8"):
+    """Opens a plain or gzipped text file for reading."""
+    if is_gzip(path):
+        return gzip.open(path, "rt", encoding=encoding)
+    return open(path, "r", encoding=encoding)
+
+def expanded_size(fileobj, filename):
+    """
+    Size of an upload once decompressed, read from the gzip trailer (modulo
+    4 GB) or the zip directory without decompressing; other files count as
+    their size. fileobj is a seekable binary file, left at its start.
+    """
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    try:
+        if is_zip_upload(filename):
+            with zipfile.ZipFile(fileobj) as archive:
+                size = sum(info.file_size for info in archive.infolist())
+        elif size >= 18:
+            fileobj.seek(0)
+            if fileobj.read(2) == GZIP_MAGIC:
+                fileobj.seek(-4, os.SEEK_END)
+                size = max(struct.unpack("<I", fileobj.read(4))[0], size)
+    except (zipfile.BadZipFile, OSError):
+        pass  # reported when the upload is read
+    fileobj.seek(0)
+    return size
+
+def display_name(filename):
+    """'log.csv.gz' -> 'log.csv'; other names are unchanged."""
+    return filename[:-3] if filename.lower().endswith(".gz") else filename
+
+def is_zip_upload(filename):
+    return filename.lower().endswith(".zip")
+
+def _copy_deflated(archive, info, out):
+    """Writes a deflated zip member to out as a gzip stream, reusing its compressed bytes."""
+    with open(archive.filename, "rb") as src:
+        src.seek(info.header_offset)
+        header = _LOCAL_HEADER.unpack(src.read(_LOCAL_HEADER.size))
+        if header[0] != b"PK\x03\x04":
+            raise ValueError(f"Corrupt zip entry: {info.filename}")
+        src.seek(header[9] + header[10], os.SEEK_CUR)  # file name and extra field
+        out.write(_GZIP_HEADER)
+        remaining = info.compress_size
+        while remaining:
+            block = src.read(min(COPY_SIZE, remaining))
+            if not block:
+                raise ValueError(f"Truncated zip entry: {info.filename}")
+            out.write(block)
+            remaining -= len(block)
+        out.write(struct.pack("<II", info.CRC, info.file_size & 0xFFFFFFFF))
+
+def split_zip(zip_path, dest_dir, extensions, max_uncompressed=None):
+    """
+    Writes each member of the zip whose name ends with one of `extensions`
+    to dest_dir: CSVs as gzip files, anything else (e.g. .xlsx, already
+    compressed) as is. Returns (member file name, path) pairs in archive order.
+    """
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile:
+        raise ValueError(f"Not a valid zip file: {os.path.basename(zip_path)}")
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(extensions)
+            and not info.filename.startswith("__MACOSX/") and not os.path.basename(info.filename).startswith(".")
+        ]
+        if not members:
+            raise ValueError(f"No {' or '.join(extensions)} files found in {os.path.basename(zip_path)}.")
+        if max_uncompressed and sum(info.file_size for info in members) > max_uncompressed:
+            raise ValueError(f"{os.path.basename(zip_path)} expands to more than {max_uncompressed // (1024 * 1024)} MB.")
+        os.makedirs(dest_dir, exist_ok=True)
+        used = set()
+        extracted = []
+        for info in members:
+            if info.flag_bits & 0x1:
+                raise ValueError(f"Encrypted zip entries are not supported: {info.filename}")
+            name = os.path.basename(info.filename)
+            if name in used:
+                # Same file name in two folders of the archive
+                name = info.filename.replace("/", "_")
+            used.add(name)
+            is_csv = name.lower().endswith(".csv")
+            path = os.path.join(dest_dir, name + ".gz" if is_csv else name)
+            with open(path, "wb") as out:
+                if is_csv and info.compress_type == zipfile.ZIP_DEFLATED:
+                    _copy_deflated(archive, info, out)
+                elif is_csv:
+                    with archive.open(info) as src, gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+                        shutil.copyfileobj(src, gz, COPY_SIZE)
+                else:
+                    with archive.open(info) as src:
+                        shutil.copyfileobj(src, out, COPY_SIZE)
+            extracted.append((name, path))
+    return extracted
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings (loaded automatically from the working directory).
+
+Sets up prometheus_client multiprocess mode so /metrics aggregates samples
+from every worker, not just the one that happens to answer the scrape.
+"""
+import os
+import shutil
+import tempfile
+
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "attendancify-metrics")
+)
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be added to the new totals
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+# Import the app once in the master. Forked workers share its pages copy-on-write
+# and boot (or are recycled) without importing anything. ATTENDANCIFY_PRELOAD=0 turns this off,
+# leaving pandas & co. to be imported by each worker's first processing request.
+preload_app = os.environ.get("ATTENDANCIFY_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import gc
+    from lazy_imports import preload
+    missing = preload()
+    if missing:
+        server.log.warning("Could not preload: %s", ", ".join(missing))
+    # Move everything loaded so far out of the collector's reach, so collections in
+    # workers don't write to (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,238 @@
+"""
+Lightweight per-request stage timing and memory accounting.
+
+Engine functions and routes wrap their steps in `stage("name")` and report
+sizes with `count(rows=...)`. Nothing is recorded unless a collector was
+started for the current context with `start_timings()`, so when timing is
+off each stage costs a single context-variable lookup.
+
+A collector started with `memory=True` also records process RSS before and
+after the job and its peak; `trace_allocations=True` additionally runs
+tracemalloc and keeps the top allocation sites of every stage. tracemalloc
+is process-wide and slows allocation-heavy code noticeably, so it is meant
+for investigating one input at a time, not for normal operation.
+
+The RSS high-water mark and tracemalloc's peak are process-wide too. They
+are only reset while a single collector with memory on is active; a job
+that overlapped another one in the same process (threaded server) reports
+`peak_scope: "process"`, since its peaks include the other job's memory.
+tracemalloc runs while any collector tracing allocations is active and is
+stopped by the last one to finish.
+"""
+import os
+import sys
+import time
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+
+TOP_ALLOCATION_SITES = 5
+
+_current = contextvars.ContextVar("attendancify_timings", default=None)
+
+# Collectors with memory on, and whether one of them started tracemalloc
+_memory_lock = threading.Lock()
+_memory_collectors = set()
+_tracing_collectors = set()
+_started_tracemalloc = False
+
+# ====================================================
+# Process Memory
+# ====================================================
+
+def _proc_status_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def rss_bytes():
+    """Current resident set size, or None where it can't be read."""
+    kb = _proc_status_kb("VmRSS")
+    return kb * 1024 if kb is not None else None
+
+def peak_rss_bytes():
+    """High-water RSS since the last reset_peak_rss() (Linux) or since process start."""
+    kb = _proc_status_kb("VmHWM")
+    if kb is not None:
+        return kb * 1024
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def reset_peak_rss():
+    """Resets the kernel's RSS high-water mark; returns False where that isn't supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+# ====================================================
+# Collectors
+# ====================================================
+
+class StageTimings:
+    def __init__(self, memory=False, trace_allocations=False):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.memory = None
+        self.allocations = {}
+        self.trace_allocations = trace_allocations
+        self._peak_stack = []
+        # Set once another collector with memory on overlaps this one
+        self._shared = False
+        if memory or trace_allocations:
+            self.memory = {"rss_before": rss_bytes(), "peak_scope": "process"}
+            self._register()
+
+    def _register(self):
+        global _started_tracemalloc
+        with _memory_lock:
+            if _memory_collectors:
+                self._shared = True
+                for other in _memory_collectors:
+                    other._shared = True
+            elif reset_peak_rss():
+                self.memory["peak_scope"] = "job"
+            _memory_collectors.add(self)
+            if self.trace_allocations:
+                if not _tracing_collectors and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracemalloc = True
+                _tracing_collectors.add(self)
+
+    def _unregister(self):
+        global _started_tracemalloc
+        with _memory_lock:
+            _memory_collectors.discard(self)
+            _tracing_collectors.discard(self)
+            if not _tracing_collectors and _started_tracemalloc:
+                tracemalloc.stop()
+                _started_tracemalloc = False
+
+    def finish(self):
+        """Records RSS after the job and its peak; the last collector tracing allocations stops tracemalloc."""
+        if self.memory is None or "rss_after" in self.memory:
+            return
+        with _memory_lock:
+            self.memory["rss_after"] = rss_bytes()
+            self.memory["peak_rss"] = peak_rss_bytes()
+            if self.trace_allocations and tracemalloc.is_tracing():
+                self.memory["traced_peak"] = tracemalloc.get_traced_memory()[1]
+            if self._shared:
+                self.memory["peak_scope"] = "process"
+        self._unregister()
+
+    def _reset_traced_peak(self):
+        # Another job's stage may be measuring the same process-wide peak
+        with _memory_lock:
+            if not self._shared:
+                tracemalloc.reset_peak()
+
+    def begin_allocations(self):
+        """Snapshot taken at the start of a stage, or None when tracemalloc is off."""
+        if not tracemalloc.is_tracing():
+            return None
+        # The enclosing stage keeps its own running peak across nested stages
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], tracemalloc.get_traced_memory()[1])
+        self._peak_stack.append(0)
+        self._reset_traced_peak()
+        return tracemalloc.take_snapshot()
+
+    def end_allocations(self, name, before):
+        peak = max(self._peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+        if not tracemalloc.is_tracing():
+            return
+        self._reset_traced_peak()
+        diff = _own_frames_removed(tracemalloc.take_snapshot()).compare_to(_own_frames_removed(before), "lineno")
+        entry = self.allocations.setdefault(name, {"traced_peak": 0, "top_sites": []})
+        entry["traced_peak"] = max(entry["traced_peak"], peak)
+        entry["top_sites"] = sorted(entry["top_sites"] + [
+            {
+                "site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff
+            }
+            for stat in diff[:TOP_ALLOCATION_SITES] if stat.size_diff > 0
+        ], key=lambda site: -site["size_diff"])[:TOP_ALLOCATION_SITES]
+
+    def add_stage(self, name, seconds):
+        total, calls = self.stages.get(name, (0.0, 0))
+        self.stages[name] = (total + seconds, calls + 1)
+
+    def add_counts(self, values):
+        for key, value in values.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def server_timing_header(self):
+        """Formats the stages as a Server-Timing header value (durations in ms)."""
+        parts = [f"{name};dur={total * 1000:.1f}" for name, (total, _) in self.stages.items()]
+        parts.append(f"total;dur={self.total_seconds() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        result = {
+            "total_ms": round(self.total_seconds() * 1000, 1),
+            "stages_ms": {name: round(total * 1000, 1) for name, (total, _) in self.stages.items()},
+            **self.counters
+        }
+        if self.memory is not None:
+            result["memory"] = dict(self.memory)
+        if self.allocations:
+            result["allocations"] = self.allocations
+        return result
+
+def _own_frames_removed(snapshot):
+    return snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)
+    ])
+
+def start_timings(memory=False, trace_allocations=False):
+    timings = StageTimings(memory, trace_allocations)
+    return timings, _current.set(timings)
+
+def stop_timings(token):
+    _current.reset(token)
+
+def current_timings():
+    return _current.get()
+
+@contextmanager
+def stage(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    before = timings.begin_allocations() if timings.trace_allocations else None
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_stage(name, time.perf_counter() - start_time)
+        if before is not None:
+            timings.end_allocations(name, before)
+
+def count(**values):
+    """Adds to the request's counters (rows, participants, sessions, bytes, ...)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_counts(values)
@@ -0,0 +1,50 @@
+"""
+Deferred imports for the heavy scientific stack.
+
+pandas, numpy, rapidfuzz and openpyxl take most of the app's import time but
+are only needed by the processing routes. Modules bind them with
+`pd = lazy_module("pandas")`; the real import happens on first attribute
+access, so workers can serve the login page before paying for it.
+
+Under gunicorn with preloading (see gunicorn.conf.py) preload() imports them
+all once in the master, and forked workers share those pages copy-on-write.
+"""
+import importlib
+
+# Everything the processing routes end up importing, including optional engines
+HEAVY_MODULES = ["numpy", "pandas", "rapidfuzz.fuzz", "rapidfuzz.process", "openpyxl"]
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+def lazy_module(name):
+    return LazyModule(name)
+
+def preload(names=HEAVY_MODULES):
+    """Imports the heavy modules now; returns the names that could not be imported."""
+    missing = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
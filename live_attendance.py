@@ -0,0 +1,312 @@
+"""
+Live attendance from streamed join/leave events.
+
+Each live meeting is a directory holding its session windows (meta.json) and
+an append-only event log (events.jsonl), so any worker can take events and
+answer queries. Every process keeps a LiveMeeting per meeting and applies
+only the events appended since it last looked; nothing is re-parsed.
+
+A participant is keyed the way resolve_identities keys the CSV reports: by
+email when the event has one, else by clean display name ("John (iPhone)"
+is "john"), which goes to the email of that name when exactly one email has
+used it so far. A name-keyed participant is folded into the email's one as
+soon as the name gets its first email; near-identical names are not matched
+live.
+
+A participant is in the room while at least one of their joins is open, so
+overlapping joins from two devices count once. When the last one closes,
+the part of the interval not already covered is intersected with every
+session window and added to the running minutes. A query is then
+O(participants x sessions).
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+from attendance_processing import merge_intervals, intersect_interval, compute_total_duration, clean_display_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked
+    fcntl = None
+
+EVENT_TYPES = ("join", "leave")
+_ID_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_")
+
+class MeetingNotFound(KeyError):
+    pass
+
+def parse_event(raw):
+    """Validates one {"event": "join"|"leave", "name", "email", "time"} event; returns it normalized."""
+    if not isinstance(raw, dict):
+        raise ValueError("Each event must be a JSON object.")
+    if raw.get("event") not in EVENT_TYPES:
+        raise ValueError("event must be 'join' or 'leave'.")
+    name = str(raw.get("name") or "").strip()
+    if not name:
+        raise ValueError("Each event needs a participant name.")
+    try:
+        event_time = datetime.fromisoformat(str(raw["time"]).strip()).replace(tzinfo=None)
+    except (KeyError, ValueError):
+        raise ValueError("Each event needs an ISO 8601 time.")
+    return {"event": raw["event"], "name": name, "email": raw.get("email") or None,
+            "time": event_time.isoformat()}
+
+def _uncovered(merged, start, end):
+    """Parts of [start, end) not covered by the sorted, disjoint intervals in merged."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in merged:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+class LiveParticipant:
+    def __init__(self, name, email, total_sessions):
+        self.name = name
+        self.email = email
+        self.open_joins = 0
+        self.open_since = None
+        self.closed = []
+        self.minutes = [0.0] * total_sessions
+
+class LiveMeeting:
+    def __init__(self, sessions_info):
+        self.sessions_info = sessions_info
+        self.windows = [(s["session_start"], s["session_end"]) for s in sessions_info]
+        self.participants = {}
+        # Clean name -> the emails it was used with
+        self.name_emails = {}
+        self.events = 0
+        self.latest = None
+
+    def _key(self, event):
+        name = clean_display_name(event["name"]) or event["name"].lower()
+        email = str(event["email"] or "").strip().lower()
+        if not email:
+            emails = self.name_emails.get(name, ())
+            return next(iter(emails)) if len(emails) == 1 else name
+        emails = self.name_emails.setdefault(name, set())
+        if email not in emails:
+            emails.add(email)
+            if len(emails) == 1 and name in self.participants:
+                self._fold(self.participants.pop(name), email)
+        return email
+
+    def _fold(self, source, key):
+        """Moves a name-keyed participant's time onto the participant at key."""
+        target = self.participants.get(key)
+        if target is None:
+            self.participants[key] = source
+            return
+        for start, end in source.closed:
+            self._close(target, start, end)
+        if source.open_joins:
+            if target.open_joins == 0 or source.open_since < target.open_since:
+                target.open_since = source.open_since
+            target.open_joins += source.open_joins
+
+    def apply(self, event):
+        key = self._key(event)
+        event_time = datetime.fromisoformat(event["time"])
+        participant = self.participants.get(key)
+        if participant is None:
+            participant = self.participants[key] = LiveParticipant(event["name"], event["email"], len(self.windows))
+        if participant.email is None:
+            # Rejoins often come from devices without a signed-in email
+            participant.email = event["email"]
+        if event["event"] == "join":
+            if participant.open_joins == 0:
+                participant.open_since = event_time
+            participant.open_joins += 1
+        elif participant.open_joins:
+            participant.open_joins -= 1
+            if participant.open_joins == 0:
+                self._close(participant, participant.open_since, event_time)
+                participant.open_since = None
+        self.events += 1
+        if self.latest is None or event_time > self.latest:
+            self.latest = event_time
+
+    def _close(self, participant, start, end):
+        if start >= end:
+            return
+        for gap in _uncovered(participant.closed, start, end):
+            for i, window in enumerate(self.windows):
+                part = intersect_interval(gap, window)
+                if part:
+                    participant.minutes[i] += compute_total_duration([part])
+        participant.closed = merge_intervals(participant.closed + [(start, end)])
+
+    def status(self, now=None):
+        """
+        Current (sessions, participants), counting open joins up to `now`
+        (default: the latest event). Participants have name, email, in_meeting
+        and one status (P/A) and minutes value per session.
+        """
+        now = now or self.latest
+        participants = []
+        present = [0] * len(self.windows)
+        for participant in self.participants.values():
+            minutes = list(participant.minutes)
+            if participant.open_since is not None and now is not None:
+                for gap in _uncovered(participant.closed, participant.open_since, now):
+                    for i, window in enumerate(self.windows):
+                        part = intersect_interval(gap, window)
+                        if part:
+                            minutes[i] += compute_total_duration([part])
+            statuses = []
+            for i, session in enumerate(self.sessions_info):
+                status = "P" if minutes[i] >= session["time_required"] else "A"
+                present[i] += status == "P"
+                statuses.append(status)
+            participants.append({
+                "name": participant.name,
+                "email": participant.email,
+                "in_meeting": participant.open_joins > 0,
+                "status": statuses,
+                "minutes": [round(m, 2) for m in minutes]
+            })
+        sessions = [{
+            "start": session["session_start"].isoformat(),
+            "end": session["session_end"].isoformat(),
+            "time_required": session["time_required"],
+            "state": "upcoming" if now is None or now < session["session_start"] else "running" if now < session["session_end"] else "ended",
+            "present": present[i],
+            "absent": len(participants) - present[i]
+        } for i, session in enumerate(self.sessions_info)]
+        return sessions, participants
+
+class LiveStore:
+    """Live meetings under root, shared by every worker through the event logs."""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._meetings = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, meeting_id):
+        if not meeting_id or len(meeting_id) > 64 or not set(meeting_id) <= _ID_CHARS:
+            raise MeetingNotFound(meeting_id)
+        return os.path.join(self.root, meeting_id)
+
+    def create(self, meeting_id, sessions_info):
+        """Starts (or restarts, dropping its events) a meeting with these session windows."""
+        meeting_dir = self._dir(meeting_id)
+        meta = {
+            "created_at": time.time(),
+            "sessions": [{
+                "start": s["session_start"].isoformat(),
+                "end": s["session_end"].isoformat(),
+                "time_required": s["time_required"]
+            } for s in sessions_info]
+        }
+        # The new meeting is built aside and swapped in, so appends never see a half-made directory
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        open(os.path.join(staging, "events.jsonl"), "ab").close()
+        retired = tempfile.mkdtemp(prefix=".retired-", dir=self.root)
+        try:
+            os.replace(meeting_dir, os.path.join(retired, meeting_id))
+        except FileNotFoundError:
+            pass  # a new meeting
+        os.replace(staging, meeting_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _read_meta(self, meeting_id):
+        try:
+            with open(os.path.join(self._dir(meeting_id), "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise MeetingNotFound(meeting_id)
+
+    def append(self, meeting_id, raw_events):
+        """Validates and appends events; returns how many were stored. All or none are written."""
+        self._read_meta(meeting_id)
+        events = [parse_event(raw) for raw in raw_events]
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events).encode()
+        events_path = os.path.join(self._dir(meeting_id), "events.jsonl")
+        try:
+            with open(events_path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                # A restart may have replaced the meeting since the file was opened
+                if not os.path.samestat(os.fstat(f.fileno()), os.stat(events_path)):
+                    raise MeetingNotFound(meeting_id)
+                f.write(data)
+        except OSError:
+            raise MeetingNotFound(meeting_id)
+        return len(events)
+
+    def _meeting(self, meeting_id):
+        """This process's LiveMeeting, brought up to date with the events appended since the last call (hold self._lock)."""
+        meta = self._read_meta(meeting_id)
+        cached = self._meetings.get(meeting_id)
+        if cached is None or cached[0] != meta["created_at"]:
+            sessions_info = [{
+                "session_start": datetime.fromisoformat(s["start"]),
+                "session_end": datetime.fromisoformat(s["end"]),
+                "time_required": s["time_required"]
+            } for s in meta["sessions"]]
+            cached = [meta["created_at"], LiveMeeting(sessions_info), 0]
+            self._meetings[meeting_id] = cached
+        meeting, offset = cached[1], cached[2]
+        try:
+            with open(os.path.join(self._dir(meeting_id), "events.jsonl"), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            raise MeetingNotFound(meeting_id)
+        # A line still being appended is picked up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            meeting.apply(json.loads(line))
+        cached[2] = offset + len(complete)
+        return meeting
+
+    def status(self, meeting_id, now=None):
+        """
+        The meeting's LiveMeeting.status(now) with its event count and latest
+        event time, as {"sessions", "participants", "events", "latest"}.
+        Computed under the lock, so no other request applies events meanwhile.
+        """
+        with self._lock:
+            meeting = self._meeting(meeting_id)
+            sessions, participants = meeting.status(now)
+            return {"sessions": sessions, "participants": participants,
+                    "events": meeting.events, "latest": meeting.latest}
+
+    def reap(self, ttl_seconds):
+        """Removes meetings with no events for ttl_seconds; returns (count, bytes)."""
+        now = time.time()
+        removed = 0
+        reclaimed = 0
+        for entry in os.scandir(self.root):
+            events_path = os.path.join(entry.path, "events.jsonl")
+            if entry.name.startswith(".retired-"):
+                events_path = entry.path  # left behind by an interrupted restart
+            try:
+                if not entry.is_dir() or now - os.path.getmtime(events_path) <= ttl_seconds:
+                    continue
+                size = os.path.getsize(events_path)
+            except OSError:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            with self._lock:
+                self._meetings.pop(entry.name, None)
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed
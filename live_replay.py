@@ -0,0 +1,105 @@
+"""
+Replays join/leave events into a live meeting, standing in for a Zoom webhook.
+
+The source is either a Zoom participant export (each row becomes a join and
+a leave event) or an NDJSON file of {"event", "name", "email", "time"} lines.
+Events are sent in time order, optionally paced against the clock:
+
+    python live_replay.py meeting.csv --url http://localhost:5000 --token $TOKEN \\
+        --meeting math-101 --sessions sessions.csv --speed 60
+
+--sessions (session config CSV) creates or restarts the meeting first;
+--speed 60 plays an hour of meeting in a minute (0 sends everything at once).
+"""
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import pandas as pd
+
+from attendance_processing import load_zoom_log, read_session_config
+
+def events_from_log(file_path):
+    log = load_zoom_log(file_path)
+    events = []
+    # By column name: itertuples would rename "Join Time" and "Leave Time"
+    for name, email, join_time, leave_time in zip(log["Name"], log["Email"], log["Join Time"], log["Leave Time"]):
+        if not isinstance(name, str) or pd.isna(join_time):
+            continue
+        email = email if isinstance(email, str) else None
+        events.append({"event": "join", "name": name, "email": email, "time": join_time.isoformat()})
+        if not pd.isna(leave_time):
+            # Without a leave time the participant stays in the meeting
+            events.append({"event": "leave", "name": name, "email": email, "time": leave_time.isoformat()})
+    return events
+
+def events_from_ndjson(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def call(url, token, method, body):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise SystemExit(f"{method} {url} failed with {e.code}: {e.read().decode(errors='replace')}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay join/leave events into a live meeting.")
+    parser.add_argument("source", help="Zoom participant export (.csv/.csv.gz) or NDJSON events (.jsonl/.ndjson)")
+    parser.add_argument("--url", default="http://localhost:5000", help="Base URL of the app")
+    parser.add_argument("--token", required=True, help="API token (see ATTENDANCIFY_API_TOKENS)")
+    parser.add_argument("--meeting", required=True, help="Live meeting id")
+    parser.add_argument("--sessions", help="Session config CSV; (re)creates the meeting with these windows first")
+    parser.add_argument("--speed", type=float, default=0, help="Playback speed relative to the meeting clock (0: no pacing)")
+    parser.add_argument("--batch", type=int, default=200, help="Events per request when not pacing")
+    args = parser.parse_args(argv)
+
+    base = f"{args.url.rstrip('/')}/api/v1/live/{args.meeting}"
+    if args.sessions:
+        sessions = [{"start": s["session_start"].isoformat(), "end": s["session_end"].isoformat(),
+                     "time_required": s["time_required"]} for s in read_session_config(args.sessions)]
+        call(base, args.token, "PUT", {"sessions": sessions})
+
+    if args.source.endswith((".jsonl", ".ndjson")):
+        events = events_from_ndjson(args.source)
+    else:
+        events = events_from_log(args.source)
+    events.sort(key=lambda event: datetime.fromisoformat(event["time"]))
+
+    started = time.monotonic()
+    first = datetime.fromisoformat(events[0]["time"]) if events else None
+    sent = 0
+    while sent < len(events):
+        if args.speed > 0:
+            # Everything due by now on the scaled meeting clock goes in one request
+            due = (time.monotonic() - started) * args.speed
+            end = sent
+            while end < len(events) and (datetime.fromisoformat(events[end]["time"]) - first).total_seconds() <= due:
+                end += 1
+            if end == sent:
+                time.sleep(0.2)
+                continue
+            batch = events[sent:end]
+        else:
+            batch = events[sent:sent + args.batch]
+        call(base + "/events", args.token, "POST", batch)
+        sent += len(batch)
+        print(f"sent {sent}/{len(events)} events (meeting time {batch[-1]['time']})", file=sys.stderr)
+
+    status = call(base, args.token, "GET", None)
+    for i, session in enumerate(status["sessions"], start=1):
+        print(f"Session {i} ({session['start']}, {session['state']}): Present: {session['present']}, Absent: {session['absent']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Binary snapshots of parsed logs.
+
+Users often go back to the session form, change the windows and process the
+same upload again. Parsing and identity resolution are done once, right
+after the upload, and the typed log is kept next to the artifacts as a
+directory of .npy files, keyed by the upload's artifact id (so a snapshot
+can never be stale):
+
+    meta.json                     format version and row count
+    preview.json                  what the session form shows (log_preview)
+    join.npy, leave.npy           int64 nanoseconds (NaT as int64 min)
+    duration.npy                  int64 or float64, as parsed
+    <column>_codes.npy            int32 category code per row, -1 for missing
+    <column>_offsets.npy          int64 offsets of each category in
+    <column>_text.npy             the UTF-8 bytes of all categories
+
+for the Name, Email and Participant_key columns (Name_lower is derived from
+the name categories). Arrays are opened memory-mapped, so loading costs
+about one pass over the codes instead of a CSV parse.
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+
+from artifact_store import ArtifactNotFound, validate_artifact_id
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# Bump when load_zoom_log or resolve_identities change what they produce
+SNAPSHOT_VERSION = 2
+STRING_COLUMNS = {"Name": "name", "Email": "email", "Participant_key": "key"}
+
+def _write_strings(directory, prefix, values):
+    codes, categories = pd.factorize(values)
+    text = [str(category).encode("utf-8") for category in categories]
+    offsets = np.zeros(len(text) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in text], out=offsets[1:])
+    np.save(os.path.join(directory, f"{prefix}_codes.npy"), codes.astype(np.int32))
+    np.save(os.path.join(directory, f"{prefix}_offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{prefix}_text.npy"), np.frombuffer(b"".join(text), dtype=np.uint8))
+
+def _read_strings(directory, prefix):
+    """The category strings (with NaN appended, for code -1) and the row codes."""
+    codes = np.load(os.path.join(directory, f"{prefix}_codes.npy"), mmap_mode="r")
+    offsets = np.load(os.path.join(directory, f"{prefix}_offsets.npy"))
+    text = np.load(os.path.join(directory, f"{prefix}_text.npy"), mmap_mode="r").tobytes()
+    categories = np.empty(len(offsets), dtype=object)
+    categories[:-1] = [text[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    categories[-1] = np.nan
+    return categories, codes
+
+def _snapshotable(log):
+    """Only string (or empty) names/emails/keys and naive datetimes round-trip."""
+    for column in STRING_COLUMNS:
+        values = log[column].dropna() if column in log.columns else ()
+        if len(values) and pd.api.types.infer_dtype(values) != "string":
+            return False
+    return (all(pd.api.types.is_datetime64_dtype(log[column]) for column in ("Join Time", "Leave Time"))
+            and log["Duration"].to_numpy().dtype.kind in "if")
+
+class SnapshotStore:
+    """Parsed logs under root, one directory per artifact id."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, artifact_id):
+        return os.path.join(self.root, validate_artifact_id(artifact_id))
+
+    def exists(self, artifact_id):
+        """True if a snapshot in the current format is stored."""
+        try:
+            with open(os.path.join(self._dir(artifact_id), "meta.json")) as f:
+                return json.load(f).get("version") == SNAPSHOT_VERSION
+        except (ArtifactNotFound, OSError, ValueError):
+            return False
+
+    def save(self, artifact_id, log, preview=None):
+        """Stores the log from load_log (and its preview); returns False if it cannot be snapshotted exactly."""
+        final_dir = self._dir(artifact_id)
+        if not _snapshotable(log):
+            return False
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            for column, prefix in STRING_COLUMNS.items():
+                if column in log.columns:
+                    _write_strings(staging, prefix, log[column].to_numpy(dtype=object))
+            for column, name in (("Join Time", "join"), ("Leave Time", "leave")):
+                np.save(os.path.join(staging, f"{name}.npy"),
+                        log[column].to_numpy(dtype="datetime64[ns]").view(np.int64))
+            np.save(os.path.join(staging, "duration.npy"), log["Duration"].to_numpy())
+            if preview is not None:
+                with open(os.path.join(staging, "preview.json"), "w") as f:
+                    json.dump(preview, f)
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "rows": len(log),
+                           "columns": [c for c in STRING_COLUMNS if c in log.columns]}, f)
+            if os.path.isdir(final_dir) and not self.exists(artifact_id):
+                shutil.rmtree(final_dir, ignore_errors=True)  # an older format
+            try:
+                os.rename(staging, final_dir)
+            except OSError:
+                pass  # another worker stored it first
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return True
+
+    def preview(self, artifact_id):
+        """The preview stored with the snapshot, or None."""
+        try:
+            with open(os.path.join(self._dir(artifact_id), "preview.json")) as f:
+                return json.load(f)
+        except (ArtifactNotFound, OSError, ValueError):
+            return None
+
+    def load(self, artifact_id):
+        """The log as load_log returned it, or None if there is no usable snapshot."""
+        try:
+            directory = self._dir(artifact_id)
+            meta_path = os.path.join(directory, "meta.json")
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_VERSION:
+                return None
+            # meta.json's mtime is the snapshot's last use, for reap()
+            os.utime(meta_path)
+            columns = {}
+            name_categories = None
+            for column in meta["columns"]:
+                categories, codes = _read_strings(directory, STRING_COLUMNS[column])
+                columns[column] = categories[codes]
+                if column == "Name":
+                    name_categories, name_codes = categories, codes
+            times = {
+                column: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r").view("datetime64[ns]")
+                for column, name in (("Join Time", "join"), ("Leave Time", "leave"))
+            }
+            duration = np.load(os.path.join(directory, "duration.npy"), mmap_mode="r")
+        except (ArtifactNotFound, OSError, ValueError, KeyError):
+            return None
+        lower = np.array([c.lower() if isinstance(c, str) else c for c in name_categories], dtype=object)
+        log = pd.DataFrame({
+            "Name": columns["Name"],
+            "Email": columns["Email"],
+            "Name_lower": lower[name_codes],
+            "Join Time": np.array(times["Join Time"]),
+            "Leave Time": np.array(times["Leave Time"]),
+            "Duration": np.array(duration)
+        })
+        if "Participant_key" in columns:
+            log["Participant_key"] = columns["Participant_key"]
+        return log
+
+    def reap(self, ttl_seconds):
+        """Removes snapshots not loaded for ttl_seconds; returns (count, bytes)."""
+        now = time.time()
+        removed = 0
+        reclaimed = 0
+        for entry in os.scandir(self.root):
+            try:
+                if not entry.is_dir():
+                    continue
+                marker = entry.path if entry.name.startswith(".staging-") else os.path.join(entry.path, "meta.json")
+                if now - os.path.getmtime(marker) <= ttl_seconds:
+                    continue
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            except OSError:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed
@@ -0,0 +1,104 @@
+"""
+Prometheus metrics for the web app.
+
+Under gunicorn every worker is a separate process, so metrics are kept in
+prometheus_client's multiprocess mode: each worker writes its samples to
+files in PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and /metrics
+aggregates all of them. Without that variable the in-process registry is
+used, which is correct for `python comprehensive_app.py`.
+"""
+import os
+
+from prometheus_client import (
+    Counter, Histogram, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST,
+    generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    "attendancify_request_duration_seconds", "Request latency by route.",
+    ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+JOBS = Counter("attendancify_jobs_total", "Processing and matching jobs by outcome.", ["kind", "outcome"])
+JOB_LATENCY = Histogram(
+    "attendancify_job_duration_seconds", "Processing and matching job latency.", ["kind"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+UPLOAD_BYTES = Histogram(
+    "attendancify_upload_bytes", "Size of each uploaded file.",
+    buckets=(10e3, 100e3, 1e6, 5e6, 10e6, 25e6, 50e6, 100e6)
+)
+JOB_PARTICIPANTS = Histogram(
+    "attendancify_job_participants", "Participants per processing job.", ["kind"],
+    buckets=(10, 50, 100, 250, 500, 1000, 5000, 10000, 50000)
+)
+JOB_SESSIONS = Histogram(
+    "attendancify_job_sessions", "Sessions per processing job.", ["kind"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+JOB_PEAK_RSS = Histogram(
+    "attendancify_job_peak_rss_bytes", "Peak resident memory of the worker during a job.", ["kind"],
+    buckets=(64 * 2**20, 128 * 2**20, 256 * 2**20, 512 * 2**20, 2**30, 2 * 2**30, 4 * 2**30, 8 * 2**30)
+)
+ADMISSIONS = Counter("attendancify_admissions_total", "Admission decisions for heavy jobs.", ["kind", "outcome"])
+ADMISSION_WAIT = Histogram(
+    "attendancify_admission_wait_seconds", "Time jobs waited for admission (admitted or not).", ["kind"],
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+)
+CACHE_REQUESTS = Counter("attendancify_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+
+def observe_request(route, method, status, seconds):
+    REQUEST_LATENCY.labels(route, method, str(status)).observe(seconds)
+
+def observe_job(kind, seconds, failed, counters, memory=None):
+    JOBS.labels(kind, "error" if failed else "ok").inc()
+    JOB_LATENCY.labels(kind).observe(seconds)
+    if "participants" in counters:
+        JOB_PARTICIPANTS.labels(kind).observe(counters["participants"])
+    if "sessions" in counters:
+        JOB_SESSIONS.labels(kind).observe(counters["sessions"])
+    if memory and memory.get("peak_rss") is not None:
+        JOB_PEAK_RSS.labels(kind).observe(memory["peak_rss"])
+
+def observe_admission(kind, admitted, waited_seconds):
+    ADMISSIONS.labels(kind, "admitted" if admitted else "rejected").inc()
+    ADMISSION_WAIT.labels(kind).observe(waited_seconds)
+
+def observe_upload(size):
+    UPLOAD_BYTES.observe(size)
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+class StorageCollector:
+    """Reports the bytes and files held in the app's own directories at scrape time."""
+    def __init__(self, directories):
+        # Directories inside another listed one (e.g. uploads/ in the artifact store) are walked once
+        roots = sorted({os.path.abspath(d) for d in directories})
+        self.directories = [d for d in roots if not any(d.startswith(other + os.sep) for other in roots)]
+
+    def collect(self):
+        total_bytes = 0
+        files = 0
+        for directory in self.directories:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    try:
+                        total_bytes += os.path.getsize(os.path.join(root, name))
+                        files += 1
+                    except OSError:
+                        continue
+        yield GaugeMetricFamily("attendancify_temp_dir_bytes", "Bytes stored in the app's artifact and job directories.", value=total_bytes)
+        yield GaugeMetricFamily("attendancify_temp_dir_files", "Files stored in the app's artifact and job directories.", value=files)
+
+def render_metrics(directories):
+    """Returns (body, content type) for a /metrics response; `directories` are sized for the storage gauges."""
+    scrape = CollectorRegistry()
+    scrape.register(StorageCollector(directories))
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.MultiProcessCollector(scrape)
+        body = generate_latest(scrape)
+    else:
+        body = generate_latest(REGISTRY) + generate_latest(scrape)
+    return body, CONTENT_TYPE_LATEST
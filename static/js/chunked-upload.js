@@ -0,0 +1,132 @@
+// Resumable chunked uploads for large files
+// Forms with data-chunked-upload="<uploads url>" send big selections chunk by chunk,
+// then submit the finalized upload ids (<field>_upload_id) instead of the files.
+// An interrupted upload of the same file resumes with the chunks still missing.
+document.addEventListener('DOMContentLoaded', function() {
+    const CHUNKED_THRESHOLD = 16 * 1024 * 1024;
+    const MAX_ATTEMPTS = 5;
+
+    // Per-chunk SHA-256 needs Web Crypto, which browsers only offer on HTTPS or localhost
+    if (!window.crypto || !window.crypto.subtle || !window.fetch) {
+        return;
+    }
+
+    document.querySelectorAll('form[data-chunked-upload]').forEach(function(form) {
+        if (form.getAttribute('data-logged-in') === 'false') {
+            return;
+        }
+        form.addEventListener('submit', function(e) {
+            const inputs = Array.from(form.querySelectorAll('input[type="file"]')).filter(function(input) {
+                return !input.disabled && input.files.length;
+            });
+            let totalSize = 0;
+            inputs.forEach(function(input) {
+                Array.from(input.files).forEach(function(file) { totalSize += file.size; });
+            });
+            if (totalSize < CHUNKED_THRESHOLD) {
+                return;
+            }
+            e.preventDefault();
+            uploadForm(form, form.getAttribute('data-chunked-upload'), inputs, totalSize);
+        });
+    });
+
+    async function uploadForm(form, baseUrl, inputs, totalSize) {
+        const submitBtn = form.querySelector('button[type="submit"]');
+        const originalLabel = submitBtn ? submitBtn.innerHTML : '';
+        let sent = 0;
+        const progress = function(bytes) {
+            sent += bytes;
+            if (submitBtn) {
+                submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Uploading ' + Math.floor(sent * 100 / totalSize) + '%';
+            }
+        };
+        if (submitBtn) {
+            submitBtn.disabled = true;
+        }
+        try {
+            for (const input of inputs) {
+                for (const file of Array.from(input.files)) {
+                    const uploadId = await uploadFile(baseUrl, file, progress);
+                    const hidden = document.createElement('input');
+                    hidden.type = 'hidden';
+                    hidden.name = input.name + '_upload_id';
+                    hidden.value = uploadId;
+                    form.appendChild(hidden);
+                }
+                // Disabled inputs are left out of the submission
+                input.disabled = true;
+            }
+            form.submit();
+        } catch (err) {
+            alert('Upload failed: ' + err.message + '\nSubmit again to resume where it stopped.');
+            inputs.forEach(function(input) { input.disabled = false; });
+            form.querySelectorAll('input[type="hidden"][name$="_upload_id"]').forEach(function(hidden) { hidden.remove(); });
+            if (submitBtn) {
+                submitBtn.disabled = false;
+                submitBtn.innerHTML = originalLabel;
+            }
+        }
+    }
+
+    async function uploadFile(baseUrl, file, progress) {
+        const resumeKey = 'chunked-upload:' + [file.name, file.size, file.lastModified].join(':');
+        let status = null;
+        const previousId = localStorage.getItem(resumeKey);
+        if (previousId) {
+            const response = await fetch(baseUrl + '/' + previousId, { credentials: 'same-origin' });
+            status = response.ok ? await response.json() : null;
+        }
+        if (!status) {
+            status = await requestJson(baseUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename: file.name, size: file.size })
+            });
+            localStorage.setItem(resumeKey, status.id);
+        }
+        const missing = new Set(status.missing);
+        for (let index = 0; index < status.chunks; index++) {
+            const start = index * status.chunk_size;
+            const chunk = file.slice(start, Math.min(start + status.chunk_size, file.size));
+            if (missing.has(index)) {
+                await putChunk(baseUrl, status.id, index, chunk);
+            }
+            progress(chunk.size);
+        }
+        if (!status.finalized) {
+            await requestJson(baseUrl + '/' + status.id + '/finalize', { method: 'POST' });
+        }
+        localStorage.removeItem(resumeKey);
+        return status.id;
+    }
+
+    async function putChunk(baseUrl, uploadId, index, chunk) {
+        const data = await chunk.arrayBuffer();
+        const digest = await crypto.subtle.digest('SHA-256', data);
+        const hex = Array.from(new Uint8Array(digest)).map(function(b) { return b.toString(16).padStart(2, '0'); }).join('');
+        for (let attempt = 1; ; attempt++) {
+            try {
+                return await requestJson(baseUrl + '/' + uploadId + '/chunks/' + index, {
+                    method: 'PUT',
+                    headers: { 'X-Chunk-SHA256': hex, 'Content-Type': 'application/octet-stream' },
+                    body: data
+                });
+            } catch (err) {
+                if (attempt >= MAX_ATTEMPTS) {
+                    throw err;
+                }
+                await new Promise(function(resolve) { setTimeout(resolve, 1000 * attempt); });
+            }
+        }
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, Object.assign({ credentials: 'same-origin' }, options));
+        const body = await response.json().catch(function() { return {}; });
+        if (!response.ok) {
+            throw new Error(body.error || ('HTTP ' + response.status));
+        }
+        return body;
+    }
+});
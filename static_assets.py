@@ -0,0 +1,57 @@
+"""
+Fingerprinted, precompressed static assets.
+
+At startup every file under static/ is hashed and text assets are gzipped
+once into a cache directory keyed by content hash. Templates link assets
+through asset_url(), which adds the hash as ?v=..., so the URL changes
+whenever the file does and responses can be cached as immutable.
+"""
+import os
+import gzip
+import hashlib
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map")
+# Below this size gzip saves less than the extra round of header bytes is worth
+MIN_COMPRESS_BYTES = 1024
+
+class Asset:
+    def __init__(self, path, digest, gzip_path=None):
+        self.path = path
+        self.digest = digest
+        self.gzip_path = gzip_path
+
+class AssetManifest:
+    def __init__(self, static_folder, cache_dir):
+        self.static_folder = static_folder
+        self.cache_dir = cache_dir
+        self.assets = {}
+
+    def build(self):
+        """Hashes every static file and writes gzip variants of compressible ones."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        assets = {}
+        for dirpath, _, names in os.walk(self.static_folder):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:16]
+                gzip_path = None
+                if name.lower().endswith(COMPRESSIBLE_EXTENSIONS) and len(data) >= MIN_COMPRESS_BYTES:
+                    gzip_path = os.path.join(self.cache_dir, digest + ".gz")
+                    if not os.path.exists(gzip_path):
+                        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                        if len(compressed) < len(data):
+                            staging = gzip_path + f".{os.getpid()}.tmp"
+                            with open(staging, "wb") as f:
+                                f.write(compressed)
+                            os.replace(staging, gzip_path)
+                        else:
+                            gzip_path = None
+                assets[filename] = Asset(path, digest, gzip_path)
+        self.assets = assets
+        return self
+
+    def lookup(self, filename):
+        return self.assets.get(filename)
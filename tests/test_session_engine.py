@@ -0,0 +1,124 @@
+"""
+The indexed session engine against the original per-session loop.
+
+reference_sessions is the engine as it was before the rewrite: every
+session re-reads the log, merges each participant's intervals and clips
+them to the window. process_sessions_for_file must give the same P/A,
+minutes and totals (keyed by lower-cased name, as the old loop was).
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from attendance_processing import (
+    merge_intervals, intersect_interval, compute_total_duration,
+    load_log, evaluate_participants, process_sessions_for_file
+)
+from benchmarks.synthetic_logs import generate_zoom_log, participant_names
+
+PARTICIPANTS = 40
+
+def reference_sessions(file_path, sessions_info):
+    """Per-participant session minutes and P/A, plus raw total duration, the old way."""
+    df = pd.read_csv(file_path, skiprows=3)
+    df.columns = df.columns.str.strip()
+    df["Join Time"] = pd.to_datetime(df["Join Time"])
+    df["Leave Time"] = pd.to_datetime(df["Leave Time"])
+    df["Name_lower"] = df["Name (Original Name)"].str.lower()
+    totals = df.groupby("Name_lower")["Duration (minutes)"].sum().to_dict()
+    results = {}
+    for name_lower, group in df.groupby("Name_lower"):
+        merged = merge_intervals(list(zip(group["Join Time"], group["Leave Time"])))
+        sessions = []
+        for session in sessions_info:
+            period = (session["session_start"], session["session_end"])
+            clipped = [part for part in (intersect_interval(iv, period) for iv in merged) if part]
+            minutes = compute_total_duration(merge_intervals(clipped))
+            sessions.append(("P" if minutes >= session["time_required"] else "A", minutes))
+        results[name_lower] = {"sessions": sessions, "total_duration": totals[name_lower]}
+    return results
+
+def engine_sessions(file_path, sessions_info):
+    kept, _, participants = evaluate_participants(load_log(file_path, merge_identities=False), sessions_info)
+    return kept, {
+        name_lower: {
+            "sessions": [(participant["sessions"][i]["status"], participant["sessions"][i]["session_duration"])
+                         for i in range(1, len(kept) + 1)],
+            "total_duration": participant["total_duration"]
+        }
+        for name_lower, participant in participants.items()
+    }
+
+def assert_same(expected, actual):
+    assert sorted(actual) == sorted(expected)
+    for name_lower, reference in expected.items():
+        result = actual[name_lower]
+        assert [status for status, _ in result["sessions"]] == [status for status, _ in reference["sessions"]], name_lower
+        assert [minutes for _, minutes in result["sessions"]] == pytest.approx([minutes for _, minutes in reference["sessions"]])
+        assert result["total_duration"] == pytest.approx(reference["total_duration"])
+
+@pytest.fixture
+def zoom_log(tmp_path):
+    """A synthetic export plus overlapping rejoins (a second device joining mid-stay)."""
+    path = tmp_path / "meeting.csv"
+    sessions_info = generate_zoom_log(path, participants=PARTICIPANTS, rejoins=3, sessions=3, seed=7)
+    start = sessions_info[0]["session_start"]
+    names = participant_names(PARTICIPANTS, seed=7)
+    overlapping = [
+        (names[0], start + timedelta(minutes=5), start + timedelta(minutes=40)),
+        (names[0], start + timedelta(minutes=20), start + timedelta(minutes=55)),
+        (names[1], start - timedelta(minutes=10), start + timedelta(minutes=90)),
+        (names[1], start + timedelta(minutes=30), start + timedelta(minutes=31)),
+        (names[2], start + timedelta(minutes=59), start + timedelta(minutes=80))
+    ]
+    with open(path, "a", encoding="utf-8") as f:
+        for i, (name, join, leave) in enumerate(overlapping):
+            minutes = int((leave - join).total_seconds() // 60)
+            f.write(f"\"{name}\",user{names.index(name)}@example.edu,{join:%Y-%m-%d %H:%M:%S},"
+                    f"{leave:%Y-%m-%d %H:%M:%S},{minutes},No,No\n")
+    return path, sessions_info
+
+def test_matches_reference_with_overlapping_rejoins(zoom_log):
+    path, sessions_info = zoom_log
+    kept, actual = engine_sessions(path, sessions_info)
+    assert kept == sessions_info
+    assert_same(reference_sessions(path, sessions_info), actual)
+
+def test_records_match_reference(zoom_log):
+    path, sessions_info = zoom_log
+    expected = reference_sessions(path, sessions_info)
+    output_records, session_labels, session_summary = process_sessions_for_file(path, sessions_info, merge_identities=False)
+    assert len(output_records) == len(expected)
+    for i, label in enumerate(session_labels):
+        present = sum(1 for reference in expected.values() if reference["sessions"][i][0] == "P")
+        assert session_summary[i] == f"Session {i + 1}: Present: {present}, Absent: {len(expected) - present}"
+        assert sorted(record[label] for record in output_records) == sorted(
+            reference["sessions"][i][0] for reference in expected.values())
+
+def test_unattended_generated_windows_are_pruned(zoom_log):
+    path, sessions_info = zoom_log
+    night = datetime.combine(sessions_info[0]["session_start"].date(), datetime.min.time())
+    unattended = [{
+        "session_start": night + timedelta(hours=h),
+        "session_end": night + timedelta(hours=h, minutes=30),
+        "time_required": 10,
+        "generated": True
+    } for h in (1, 3)]
+    attended = [dict(session, generated=True) for session in sessions_info]
+    kept, actual = engine_sessions(path, unattended[:1] + attended + unattended[1:])
+    assert kept == attended
+    assert_same(reference_sessions(path, sessions_info), actual)
+
+def test_all_windows_pruned(zoom_log):
+    path, sessions_info = zoom_log
+    night = datetime.combine(sessions_info[0]["session_start"].date(), datetime.min.time())
+    unattended = [{
+        "session_start": night + timedelta(hours=h),
+        "session_end": night + timedelta(hours=h, minutes=30),
+        "time_required": 10,
+        "generated": True
+    } for h in (1, 2, 3)]
+    kept, actual = engine_sessions(path, unattended)
+    assert kept == []
+    assert actual == {}
@@ -0,0 +1,235 @@
+"""
+SQLite-backed user accounts shared by all worker processes.
+
+The database runs in WAL mode so logins and admin edits on one worker never
+block readers on another. Each write bumps a version counter in the same
+transaction; every worker keeps a small cache of user records and checks
+the counter at most once per `ttl` seconds, dropping the cache when another
+worker has written. Auth checks on a warm cache never touch the database.
+"""
+import os
+import time
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+USER_FIELDS = ("password_hash", "role", "created_at", "expires_at", "must_change_password", "password_plain")
+DATETIME_FIELDS = ("created_at", "expires_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'user',
+    created_at TEXT,
+    expires_at TEXT,
+    must_change_password INTEGER NOT NULL DEFAULT 0,
+    password_plain TEXT
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0);
+"""
+
+def _to_row(fields):
+    row = {}
+    for key, value in fields.items():
+        if key not in USER_FIELDS:
+            raise ValueError(f"Unknown user field: {key}")
+        if key in DATETIME_FIELDS and value is not None:
+            value = value.isoformat()
+        elif key == "must_change_password":
+            value = int(bool(value))
+        row[key] = value
+    return row
+
+def _from_row(row):
+    user = {key: row[key] for key in USER_FIELDS}
+    for key in DATETIME_FIELDS:
+        if user[key]:
+            user[key] = datetime.fromisoformat(user[key])
+    user["must_change_password"] = bool(user["must_change_password"])
+    return user
+
+class UserStore:
+    def __init__(self, path, seed_users=None, ttl=1.0, cache_size=1024, pool_size=4, on_cache_lookup=None):
+        self.path = path
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.pool_size = pool_size
+        self.on_cache_lookup = on_cache_lookup
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._generation = 0
+        self._checked_at = 0.0
+        self._pool = None
+        self._pool_pid = None
+        # Schema and seed use a throwaway connection, so nothing is inherited by forked workers.
+        # Seed users only go into an empty database, in the schema's transaction, so an
+        # account that was renamed or deleted is never brought back on restart.
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.executescript("BEGIN IMMEDIATE;" + SCHEMA)
+            try:
+                if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                    for email, fields in (seed_users or {}).items():
+                        self._insert(conn, email, fields)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # ====================================================
+    # Connections
+    # ====================================================
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            # First use in this process (or after a fork): start a fresh pool
+            self._pool = queue.LifoQueue(maxsize=self.pool_size)
+            self._pool_pid = pid
+        pool = self._pool
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _insert(self, conn, email, fields):
+        row = _to_row(fields)
+        columns = ", ".join(["email"] + list(row))
+        placeholders = ", ".join("?" * (len(row) + 1))
+        cursor = conn.execute(f"INSERT INTO users ({columns}) VALUES ({placeholders})", [email] + list(row.values()))
+        if cursor.rowcount:
+            self._bump_version(conn)
+        return cursor.rowcount == 1
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+
+    def _write(self, statement, params):
+        """Runs one write and bumps the version in the same transaction; returns the rowcount."""
+        with self._connection() as conn:
+            try:
+                with conn:
+                    rowcount = conn.execute(statement, params).rowcount
+                    if rowcount:
+                        self._bump_version(conn)
+            finally:
+                self._invalidate()
+        return rowcount
+
+    # ====================================================
+    # Cache
+    # ====================================================
+
+    def _invalidate(self):
+        with self._lock:
+            self._cache.clear()
+            self._checked_at = 0.0
+            self._generation += 1
+
+    def _refresh_version(self, conn):
+        now = time.monotonic()
+        if now - self._checked_at < self.ttl:
+            return
+        version = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+        with self._lock:
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+                self._generation += 1
+            self._checked_at = now
+
+    def get(self, email, default=None):
+        """Returns a copy of the user's record; edits must go through update()."""
+        if email is None:
+            return default
+        if time.monotonic() - self._checked_at < self.ttl:
+            with self._lock:
+                user = self._cache.get(email)
+                if user is not None:
+                    self._cache.move_to_end(email)
+            if user is not None:
+                if self.on_cache_lookup:
+                    self.on_cache_lookup(True)
+                return dict(user)
+        if self.on_cache_lookup:
+            self.on_cache_lookup(False)
+        with self._connection() as conn:
+            self._refresh_version(conn)
+            generation = self._generation
+            row = conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            return default
+        user = _from_row(row)
+        with self._lock:
+            # Skip caching a row read while a write in this worker was invalidating
+            if generation != self._generation:
+                return dict(user)
+            self._cache[email] = user
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(user)
+
+    # ====================================================
+    # Queries and writes
+    # ====================================================
+
+    def __contains__(self, email):
+        return self.get(email) is not None
+
+    def items(self):
+        with self._connection() as conn:
+            rows = conn.execute("SELECT * FROM users ORDER BY created_at, email").fetchall()
+        return [(row["email"], _from_row(row)) for row in rows]
+
+    def create(self, email, fields):
+        """Adds a user; returns False if the email is already taken."""
+        with self._connection() as conn:
+            try:
+                with conn:
+                    return self._insert(conn, email, fields)
+            except sqlite3.IntegrityError:
+                return False
+            finally:
+                self._invalidate()
+
+    def update(self, email, **fields):
+        """Changes the given fields; returns False if the user does not exist."""
+        if not fields:
+            return email in self
+        row = _to_row(fields)
+        assignments = ", ".join(f"{key} = ?" for key in row)
+        return self._write(f"UPDATE users SET {assignments} WHERE email = ?", list(row.values()) + [email]) == 1
+
+    def rename(self, email, new_email):
+        """Moves a user to a new email; returns False if the new email is taken."""
+        try:
+            return self._write("UPDATE users SET email = ? WHERE email = ?", (new_email, email)) == 1
+        except sqlite3.IntegrityError:
+            return False
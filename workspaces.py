@@ -0,0 +1,109 @@
+"""
+Per-job scratch directories and the background reaper.
+
+Every upload or processing request works inside its own directory under the
+workspace root, so same-named files from different users never collide, and
+the directory is removed when the request ends (results live on in the
+artifact store). The reaper thread periodically expires and evicts
+artifacts (see LocalArtifactStore.reap) and removes workspaces left behind
+by crashed workers, plus expired chunked uploads, live meetings and log
+snapshots, logging how much space it reclaimed.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process reaps on its own
+    fcntl = None
+
+reaper_logger = logging.getLogger("attendancify.reaper")
+
+def create_workspace(root):
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="job-", dir=root)
+
+def remove_workspace(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                continue
+    return total
+
+def reap_workspaces(root, ttl_seconds):
+    """Removes workspaces untouched for ttl_seconds; returns (count, bytes)."""
+    if not os.path.isdir(root):
+        return 0, 0
+    now = time.time()
+    removed = 0
+    reclaimed = 0
+    for entry in os.scandir(root):
+        if not entry.is_dir() or not entry.name.startswith("job-"):
+            continue
+        try:
+            newest = max([entry.stat().st_mtime] + [
+                os.path.getmtime(os.path.join(dirpath, name))
+                for dirpath, _, names in os.walk(entry.path) for name in names
+            ])
+        except OSError:
+            continue
+        if now - newest > ttl_seconds:
+            reclaimed += _tree_size(entry.path)
+            remove_workspace(entry.path)
+            removed += 1
+    return removed, reclaimed
+
+class Reaper(threading.Thread):
+    """Daemon thread running one reaping pass every `interval` seconds."""
+
+    def __init__(self, store, workspace_root, interval, artifact_ttl, quota_bytes, workspace_ttl, expiring=None):
+        super().__init__(name="attendancify-reaper", daemon=True)
+        self.store = store
+        self.workspace_root = workspace_root
+        self.interval = interval
+        self.artifact_ttl = artifact_ttl
+        self.quota_bytes = quota_bytes
+        self.workspace_ttl = workspace_ttl
+        # {name: store}; each store's reap(ttl) returns (count, bytes)
+        self.expiring = expiring or {}
+        self.lock_path = os.path.join(store.root, "reaper.lock")
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reap_once()
+            except Exception:
+                reaper_logger.exception("Reaper pass failed")
+
+    def reap_once(self):
+        """Runs one pass unless another process holds the reaper lock; returns the stats or None."""
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            stats = self.store.reap(self.artifact_ttl, self.quota_bytes)
+            workspaces, workspace_bytes = reap_workspaces(self.workspace_root, self.workspace_ttl)
+            # These get as long as artifacts, so e.g. an interrupted upload can be resumed the next day
+            expired = {name: expiring.reap(self.artifact_ttl) for name, expiring in self.expiring.items()}
+        stats["workspaces"] = workspaces
+        stats["reclaimed_bytes"] += workspace_bytes
+        for name, (count, size) in expired.items():
+            stats[name] = count
+            stats["reclaimed_bytes"] += size
+        if stats["reclaimed_bytes"] or workspaces or any(count for count, _ in expired.values()):
+            reaper_logger.info(json.dumps({"event": "reaped", **stats}))
+        return stats